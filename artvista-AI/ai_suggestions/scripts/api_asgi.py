@@ -0,0 +1,148 @@
+"""Async (ASGI) serving mode for the AI Suggestions API
+
+Same routes and JSON shapes as api_mock.py, but Gemini calls are awaited, so a
+single process can hold thousands of slow upstream requests without a thread
+each. Run with any ASGI server, e.g.:
+
+    hypercorn api_asgi:app --bind 0.0.0.0:5001
+    python api_asgi.py
+"""
+from quart import Quart, g, request, jsonify
+from quart_cors import cors
+import asyncio
+import hmac
+import sys
+import os
+import time
+
+# Add the scripts directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "shared"))
+
+from enhanced_suggestion_engine import (adaptive_suggestions_async, adaptive_suggestions_batch, event_error,
+                                        get_art_chat_response_async, record_events)
+from art_creation_suggestions import art_creation_suggestions_async
+from dataset import get_holder
+from metrics import CONTENT_TYPE, get_metrics
+
+# Shared secret for /admin/* endpoints; unset disables them
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Largest number of users accepted by /adaptive_suggest/batch
+MAX_BATCH_SIZE = int(os.environ.get("ADAPTIVE_BATCH_MAX_USERS", 1000))
+
+# Largest number of events accepted by /events
+MAX_EVENTS_PER_REQUEST = int(os.environ.get("EVENTS_MAX_BATCH", 1000))
+
+app = Quart(__name__)
+# Enable CORS for all routes
+app = cors(app, allow_origin="*")
+
+# Request counts and latencies per route, plus stage timings and cache statistics (see shared/metrics.py)
+metrics = get_metrics()
+
+@app.before_request
+async def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+async def record_request_metrics(response):
+    # The URL rule (e.g. /check_scene/<int:game_id>) rather than the path keeps the series bounded
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    metrics.track_request(route, request.method, response.status_code, time.perf_counter() - g.request_start)
+    return response
+
+@app.route("/metrics", methods=["GET"])
+async def get_metrics_text():
+    """Prometheus text-format metrics"""
+    return metrics.render(), 200, {"Content-Type": CONTENT_TYPE}
+
+@app.route('/')
+async def home():
+    return jsonify({
+        'message': 'Welcome to ArtVista AI Suggestions API',
+        'endpoints': [
+            '/adaptive_suggest?user_id=<user_id>',
+            '/adaptive_suggest/batch (POST {"user_ids": [...]})',
+            '/events (POST {"events": [{"user_id", "type": "click"|"complete", "item_id"}]})',
+            '/metrics (GET, Prometheus text format)',
+            '/art_creation_suggestions/<user_id>'
+        ],
+        'method': 'GET'
+    })
+
+@app.route('/health', methods=['GET'])
+async def health_check():
+    """Health check endpoint to verify the API is running"""
+    return jsonify({'status': 'healthy', 'message': 'AI Suggestions API is running'})
+
+@app.route("/adaptive_suggest", methods=["GET"])
+async def suggest():
+    user_id_str = request.args.get("user_id")
+    if user_id_str is None:
+        return jsonify({"error": "user_id is required"}), 400
+    user_id = int(user_id_str)
+    result = await adaptive_suggestions_async(user_id)
+    return jsonify(result)
+
+@app.route("/adaptive_suggest/batch", methods=["POST"])
+async def suggest_batch():
+    """Adaptive suggestions for many users in one request"""
+    body = await request.get_json(silent=True)
+    user_ids = body.get("user_ids") if isinstance(body, dict) else None
+    if not isinstance(user_ids, list) or not all(isinstance(u, int) and not isinstance(u, bool) for u in user_ids):
+        return jsonify({"error": "user_ids must be a list of integers"}), 400
+    if len(user_ids) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"at most {MAX_BATCH_SIZE} user_ids per request"}), 400
+    # The batch is CPU-heavy; keep it off the event loop
+    results = await asyncio.to_thread(adaptive_suggestions_batch, user_ids)
+    return jsonify({"results": [dict(results[u], user_id=u) for u in user_ids]})
+
+@app.route("/events", methods=["POST"])
+async def post_events():
+    """Record clicks and tutorial completions; suggestions reflect them on the next request"""
+    body = await request.get_json(silent=True)
+    events = body.get("events") if isinstance(body, dict) else None
+    if not isinstance(events, list):
+        return jsonify({"error": "events must be a list"}), 400
+    if len(events) > MAX_EVENTS_PER_REQUEST:
+        return jsonify({"error": f"at most {MAX_EVENTS_PER_REQUEST} events per request"}), 400
+    for position, event in enumerate(events):
+        error = event_error(event)
+        if error:
+            return jsonify({"error": f"event {position}: {error}"}), 400
+    # Recording waits on an fsync of the log; keep it off the event loop
+    recorded = await asyncio.to_thread(record_events, events)
+    return jsonify({"received": len(events), "recorded": recorded})
+
+@app.route("/art_creation_suggestions/<int:user_id>", methods=["GET"])
+async def get_art_creation_suggestions(user_id):
+    result = await art_creation_suggestions_async(user_id)
+    return jsonify(result)
+
+@app.route("/admin/reload", methods=["POST"])
+async def reload_dataset():
+    """Re-read the dataset and swap in freshly built indexes"""
+    if not ADMIN_TOKEN or not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+        return jsonify({"error": "forbidden"}), 403
+    holder = get_holder()
+    # Parsing and index building are CPU-heavy; keep them off the event loop
+    if not await asyncio.to_thread(holder.reload, True):
+        return jsonify({"error": "reload failed", "version": holder.version}), 500
+    return jsonify({"status": "reloaded", "version": holder.version})
+
+@app.route("/chat", methods=["POST"])
+async def chat():
+    data = await request.get_json(silent=True)
+    if not data or "message" not in data:
+        return jsonify({"error": "Message is required"}), 400
+
+    message = data["message"]
+    history = data.get("history", [])
+
+    result = await get_art_chat_response_async(message, history)
+    return jsonify(result)
+
+if __name__ == "__main__":
+    port = int(os.environ.get("PORT", 5001))
+    app.run(host='0.0.0.0', port=port, debug=False)
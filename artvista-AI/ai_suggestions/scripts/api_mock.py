@@ -1,53 +1,106 @@
-from flask import Flask, request, jsonify
+from flask import Flask, g, request, jsonify, send_file
 from flask_cors import CORS
-import json
+import hmac
 import sys
 import os
+import time
 
 # Add the scripts directory to the path so we can import our modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "shared"))
 
-from enhanced_suggestion_engine import adaptive_suggestions
+from enhanced_suggestion_engine import adaptive_suggestions, adaptive_suggestions_batch, event_error, record_events
 from art_creation_suggestions import art_creation_suggestions
+from dataset import get_holder
+from metrics import CONTENT_TYPE, get_metrics
+from profiling import profiler_from_env
 
-def load_dataset():
-    """Load the art suggestions dataset with fallback for deployment environments"""
-    # Get the directory of this script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    dataset_path = os.path.join(script_dir, "../dataset/art_suggestions.json")
-    
-    # If that doesn't work, try alternative path for deployment
-    if not os.path.exists(dataset_path):
-        dataset_path = os.path.join(script_dir, "..", "..", "artvista-AI", "ai_suggestions", "dataset", "art_suggestions.json")
-    
-    # Handle case where file might not exist (for deployment safety)
-    try:
-        with open(dataset_path, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        # Fallback to a minimal dataset for deployment
-        return {
-            "users": [],
-            "art_elements": [],
-            "art_styles": [],
-            "art_periods": [],
-            "artists": [],
-            "color_palettes": []
-        }
-
-# Load dataset when module is imported
-data = load_dataset()
+# Shared secret for /admin/* endpoints; unset disables them
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Largest number of users accepted by /adaptive_suggest/batch
+MAX_BATCH_SIZE = int(os.environ.get("ADAPTIVE_BATCH_MAX_USERS", 1000))
+
+# Largest number of events accepted by /events
+MAX_EVENTS_PER_REQUEST = int(os.environ.get("EVENTS_MAX_BATCH", 1000))
 
 app = Flask(__name__)
 # Enable CORS for all routes
 CORS(app)
 
+# Request counts and latencies per route, plus stage timings and cache statistics (see shared/metrics.py)
+metrics = get_metrics()
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # The URL rule (e.g. /check_scene/<int:game_id>) rather than the path keeps the series bounded
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    metrics.track_request(route, request.method, response.status_code, time.perf_counter() - g.request_start)
+    return response
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics_text():
+    """Prometheus text-format metrics"""
+    return metrics.render(), 200, {"Content-Type": CONTENT_TYPE}
+
+# Opt-in request profiles, saved for download from /admin/profiles (see shared/profiling.py)
+profiler = profiler_from_env()
+
+def is_admin():
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN)
+
+@app.before_request
+def start_profile():
+    # Admins ask with X-Profile: cprofile|sample; any request may also be sampled at PROFILE_SAMPLE_RATE
+    mode = request.headers.get("X-Profile")
+    g.profile = profiler.start(request.endpoint or "unmatched", mode if mode and is_admin() else None)
+
+@app.after_request
+def finish_profile(response):
+    profile = g.pop("profile", None)
+    if profile is not None:
+        profile_id = profile.stop()
+        if profile_id:
+            response.headers["X-Profile-Id"] = profile_id
+    return response
+
+@app.teardown_request
+def discard_profile(error):
+    # Stops the profiler when after_request did not run
+    profile = g.pop("profile", None)
+    if profile is not None:
+        profile.stop()
+
+@app.route("/admin/profiles", methods=["GET"])
+def list_profiles():
+    """Ids of the saved request profiles, newest first"""
+    if not is_admin():
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify({"profiles": profiler.list()})
+
+@app.route("/admin/profiles/<profile_id>", methods=["GET"])
+def download_profile(profile_id):
+    """A saved profile: .pstats (cProfile) or .collapsed (flame graph stacks)"""
+    if not is_admin():
+        return jsonify({"error": "forbidden"}), 403
+    path = profiler.path(profile_id)
+    if path is None:
+        return jsonify({"error": "profile not found"}), 404
+    return send_file(path, as_attachment=True, download_name=profile_id)
+
 @app.route('/')
 def home():
     return jsonify({
         'message': 'Welcome to ArtVista AI Suggestions API',
         'endpoints': [
             '/adaptive_suggest?user_id=<user_id>',
+            '/adaptive_suggest/batch (POST {"user_ids": [...]})',
+            '/events (POST {"events": [{"user_id", "type": "click"|"complete", "item_id"}]})',
+            '/metrics (GET, Prometheus text format)',
             '/art_creation_suggestions/<user_id>'
         ],
         'method': 'GET'
@@ -67,11 +120,49 @@ def suggest():
     result = adaptive_suggestions(user_id)
     return jsonify(result)
 
+@app.route("/adaptive_suggest/batch", methods=["POST"])
+def suggest_batch():
+    """Adaptive suggestions for many users in one request"""
+    body = request.get_json(silent=True)
+    user_ids = body.get("user_ids") if isinstance(body, dict) else None
+    if not isinstance(user_ids, list) or not all(isinstance(u, int) and not isinstance(u, bool) for u in user_ids):
+        return jsonify({"error": "user_ids must be a list of integers"}), 400
+    if len(user_ids) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"at most {MAX_BATCH_SIZE} user_ids per request"}), 400
+    results = adaptive_suggestions_batch(user_ids)
+    return jsonify({"results": [dict(results[u], user_id=u) for u in user_ids]})
+
+@app.route("/events", methods=["POST"])
+def post_events():
+    """Record clicks and tutorial completions; suggestions reflect them on the next request"""
+    body = request.get_json(silent=True)
+    events = body.get("events") if isinstance(body, dict) else None
+    if not isinstance(events, list):
+        return jsonify({"error": "events must be a list"}), 400
+    if len(events) > MAX_EVENTS_PER_REQUEST:
+        return jsonify({"error": f"at most {MAX_EVENTS_PER_REQUEST} events per request"}), 400
+    for position, event in enumerate(events):
+        error = event_error(event)
+        if error:
+            return jsonify({"error": f"event {position}: {error}"}), 400
+    recorded = record_events(events)
+    return jsonify({"received": len(events), "recorded": recorded})
+
 @app.route("/art_creation_suggestions/<int:user_id>", methods=["GET"])
 def get_art_creation_suggestions(user_id):
     result = art_creation_suggestions(user_id)
     return jsonify(result)
 
+@app.route("/admin/reload", methods=["POST"])
+def reload_dataset():
+    """Re-read the dataset and swap in freshly built indexes"""
+    if not is_admin():
+        return jsonify({"error": "forbidden"}), 403
+    holder = get_holder()
+    if not holder.reload(force=True):
+        return jsonify({"error": "reload failed", "version": holder.version}), 500
+    return jsonify({"status": "reloaded", "version": holder.version})
+
 @app.route("/chat", methods=["POST"])
 def chat():
     data = request.json
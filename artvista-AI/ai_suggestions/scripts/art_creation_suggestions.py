@@ -1,9 +1,18 @@
 import json
 import random
 import os
+import sys
 from collections import defaultdict
 from dotenv import load_dotenv
 
+# Shared helpers used by both AI services
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "shared"))
+from llm_cache import make_key, canonical_preferences
+from llm_guard import get_guard
+from metrics import get_metrics
+
+from enhanced_suggestion_engine import current_catalog
+
 # Load environment variables
 load_dotenv()
 
@@ -20,38 +29,17 @@ if GEMINI_API_KEY and genai:
 else:
     model = None
 
-def load_dataset():
-    """Load the art suggestions dataset with fallback for deployment environments"""
-    # Get the directory of this script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    dataset_path = os.path.join(script_dir, "../dataset/art_suggestions.json")
-    
-    # If that doesn't work, try alternative path for deployment
-    if not os.path.exists(dataset_path):
-        dataset_path = os.path.join(script_dir, "..", "..", "artvista-AI", "ai_suggestions", "dataset", "art_suggestions.json")
-    
-    # Handle case where file might not exist (for deployment safety)
-    try:
-        with open(dataset_path, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        # Fallback to a minimal dataset for deployment
-        return {
-            "users": [],
-            "art_elements": [],
-            "art_styles": [],
-            "art_periods": [],
-            "artists": [],
-            "color_palettes": []
-        }
+# Cached, coalesced and time-boxed Gemini calls (see shared/llm_guard.py)
+llm_guard = get_guard()
 
-# Load dataset when module is imported
-data = load_dataset()
+# Stage timings served at /metrics (see shared/metrics.py)
+metrics = get_metrics()
 
 def get_user_preferences(user_id):
-    """Get user preferences based on their profile and interaction history"""
-    user = next(u for u in data["users"] if u["id"] == user_id)
-    return user["preferences"]
+    """Get user preferences based on their profile and interaction history, or None for an unknown user"""
+    # Shares the recommendation catalog's user map, so a lookup does not scan every user
+    user = current_catalog().index.get_user(user_id)
+    return user["preferences"] if user is not None else None
 
 def generate_color_palettes(user_preferences):
     """Generate color palettes based on user preferences"""
@@ -210,50 +198,91 @@ def generate_themes(user_preferences):
     
     return themes
 
+def art_creation_prompt(user_preferences):
+    """Gemini prompt for palettes, techniques and themes"""
+    return f"""
+    Generate creative art suggestions for an artist who likes these styles: {", ".join(user_preferences)}.
+    Provide the response strictly as a JSON object with this exact structure:
+    {{
+        "colorPalettes": [
+            {{"name": "Palette Name", "colors": ["#HEX1", "#HEX2", "#HEX3"], "uses": "suggested uses"}}
+        ],
+        "techniques": [
+            {{"name": "Technique Name", "description": "how to do it", "tools": "needed tools", "time": "estimated time", "difficulty": "Beginner/Intermediate/Advanced"}}
+        ],
+        "themes": [
+            {{"name": "Theme Name", "description": "prompt details"}}
+        ]
+    }}
+    Provide exactly 3 color palettes, 4 techniques, and 3 themes. Do not include markdown formatting like ```json.
+    """
+
+def parse_art_creation_response(text):
+    """Parse Gemini's art creation JSON, stripping code fences"""
+    if text.startswith('```json'):
+        text = text[7:]
+    if text.startswith('```'):
+        text = text[3:]
+    if text.endswith('```'):
+        text = text[:-3]
+    
+    return json.loads(text.strip())
+
+def gemini_art_creation_suggestions(user_preferences):
+    """Ask Gemini for palettes, techniques and themes matching the given preferences"""
+    with metrics.stage("gemini", endpoint="art_creation_suggestions"):
+        response = model.generate_content(art_creation_prompt(user_preferences))
+    with metrics.stage("json_parse", endpoint="art_creation_suggestions"):
+        return parse_art_creation_response(response.text)
+
+async def gemini_art_creation_suggestions_async(user_preferences):
+    """Non-blocking variant of gemini_art_creation_suggestions"""
+    with metrics.stage("gemini", endpoint="art_creation_suggestions"):
+        response = await model.generate_content_async(art_creation_prompt(user_preferences))
+    with metrics.stage("json_parse", endpoint="art_creation_suggestions"):
+        return parse_art_creation_response(response.text)
+
+def _user_preferences(user_id):
+    preferences = get_user_preferences(user_id)
+    if preferences is None:
+        # Fallback if user not found
+        return ["landscape", "watercolor"]
+    return preferences
+
 def art_creation_suggestions(user_id):
     """Generate personalized art creation suggestions for a user"""
-    # Get user preferences
-    try:
-        user_preferences = get_user_preferences(user_id)
-    except StopIteration:
-        # Fallback if user not found
-        user_preferences = ["landscape", "watercolor"]
+    with metrics.stage("dataset_lookup"):
+        user_preferences = _user_preferences(user_id)
     
     # Try using Gemini AI if configured
     if model:
-        try:
-            prompt = f"""
-            Generate creative art suggestions for an artist who likes these styles: {", ".join(user_preferences)}.
-            Provide the response strictly as a JSON object with this exact structure:
-            {{
-                "colorPalettes": [
-                    {{"name": "Palette Name", "colors": ["#HEX1", "#HEX2", "#HEX3"], "uses": "suggested uses"}}
-                ],
-                "techniques": [
-                    {{"name": "Technique Name", "description": "how to do it", "tools": "needed tools", "time": "estimated time", "difficulty": "Beginner/Intermediate/Advanced"}}
-                ],
-                "themes": [
-                    {{"name": "Theme Name", "description": "prompt details"}}
-                ]
-            }}
-            Provide exactly 3 color palettes, 4 techniques, and 3 themes. Do not include markdown formatting like ```json.
-            """
-            response = model.generate_content(prompt)
-            # Parse the JSON response
-            text = response.text
-            if text.startswith('```json'):
-                text = text[7:]
-            if text.startswith('```'):
-                text = text[3:]
-            if text.endswith('```'):
-                text = text[:-3]
-            
-            result = json.loads(text.strip())
+        cache_key = make_key("art_creation_suggestions", preferences=canonical_preferences(user_preferences))
+        result = llm_guard.call("art_creation_suggestions", cache_key, lambda: gemini_art_creation_suggestions(user_preferences))
+        if result is not None:
+            return result
+        metrics.inc("fallbacks_total", endpoint="art_creation_suggestions", reason="gemini_unavailable")
+    
+    with metrics.stage("local_suggestions", endpoint="art_creation_suggestions"):
+        return local_art_creation_suggestions(user_preferences)
+
+async def art_creation_suggestions_async(user_id):
+    """Async variant of art_creation_suggestions: awaits Gemini instead of blocking"""
+    with metrics.stage("dataset_lookup"):
+        user_preferences = _user_preferences(user_id)
+    
+    if model:
+        cache_key = make_key("art_creation_suggestions", preferences=canonical_preferences(user_preferences))
+        result = await llm_guard.call_async("art_creation_suggestions", cache_key,
+                                            lambda: gemini_art_creation_suggestions_async(user_preferences))
+        if result is not None:
             return result
-        except Exception as e:
-            print(f"Gemini AI error: {e}. Falling back to default generation.")
+        metrics.inc("fallbacks_total", endpoint="art_creation_suggestions", reason="gemini_unavailable")
     
-    # Fallback to default generation if Gemini fails or is not configured
+    with metrics.stage("local_suggestions", endpoint="art_creation_suggestions"):
+        return local_art_creation_suggestions(user_preferences)
+
+def local_art_creation_suggestions(user_preferences):
+    """Generate suggestions from the built-in palettes, techniques and themes"""
     color_palettes = generate_color_palettes(user_preferences)
     techniques = generate_techniques(user_preferences)
     themes = generate_themes(user_preferences)
@@ -0,0 +1,76 @@
+"""Per-user cache of the deterministic recommendation candidates
+
+Collaborative and content-based candidate lists only change when the dataset
+is reloaded or when the user, or one of the neighbours the collaborative list
+came from, records an interaction. Entries hold item row numbers (not records)
+and are checked against those versions on every read, so a change invalidates
+exactly the users it affects; least recently used entries are evicted to stay
+under a byte budget.
+"""
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+
+
+class CandidateCache:
+    """LRU map of user_id -> candidate row lists, bounded by approximate size in bytes
+
+    version(user_id) returns a number that changes whenever that user's live
+    interactions do (e.g. InteractionLog.version).
+    """
+
+    def __init__(self, max_bytes, version):
+        self.max_bytes = max_bytes
+        self.version = version
+        self.size = 0
+        self._entries = OrderedDict()   # user_id -> (stamp, neighbour ids, row lists, size), least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stamp(self, user_id, generation, neighbour_ids):
+        """Versions an entry depends on; take it before computing the lists it will be stored with"""
+        return (generation, self.version(user_id), tuple(self.version(other_id) for other_id in neighbour_ids))
+
+    def get(self, user_id, generation):
+        """The cached row lists for user_id if still current for this catalog generation, else None"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                stamp, neighbour_ids, lists, _ = entry
+                if stamp == self.stamp(user_id, generation, neighbour_ids):
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return lists
+                self._drop(user_id)
+            self.misses += 1
+            return None
+
+    def put(self, user_id, stamp, neighbour_ids, lists):
+        """Cache lists (sequences of row numbers) computed from neighbour_ids after stamp was taken"""
+        if self.max_bytes <= 0:
+            return
+        neighbour_ids = tuple(neighbour_ids)
+        lists = tuple(array("i", rows) for rows in lists)
+        size = sys.getsizeof(neighbour_ids) + sum(sys.getsizeof(rows) for rows in lists) + 200
+        with self._lock:
+            if user_id in self._entries:
+                self._drop(user_id)
+            self._entries[user_id] = (stamp, neighbour_ids, lists, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, user_id):
+        self.size -= self._entries.pop(user_id)[3]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
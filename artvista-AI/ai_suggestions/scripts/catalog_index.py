@@ -0,0 +1,88 @@
+import os
+import sys
+from collections import defaultdict
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "shared"))
+from item_store import as_item_store
+
+
+class CatalogIndex:
+    """Lookup tables over the suggestions dataset, built once and shared by the recommenders"""
+
+    def __init__(self, dataset, events=None):
+        self.users = dataset.get("users", [])
+        # Live interactions recorded since the dataset was built (an InteractionLog), merged on read
+        self.events = events
+        # Column stores (see shared/item_store.py): id -> row lookups, style/medium codes
+        # and records materialized on read
+        self.artworks = as_item_store(dataset.get("artworks", []), ("style", "medium"))
+        self.tutorials = as_item_store(dataset.get("tutorials", []), ("style",))
+
+        self.users_by_id = {}
+        # id -> position in the dataset, used to keep results in dataset order
+        self.user_positions = {}
+        self.users_by_preference = defaultdict(list)
+
+        # Per-user preference and interaction sets
+        self.preferences_by_user = {}
+        self.clicked_by_user = {}
+        self.completed_by_user = {}
+
+        for position, user in enumerate(self.users):
+            user_id = user["id"]
+            self.users_by_id[user_id] = user
+            self.user_positions[user_id] = position
+            prefs = set(user.get("preferences", []))
+            self.preferences_by_user[user_id] = prefs
+            for pref in prefs:
+                self.users_by_preference[pref].append(user_id)
+            interactions = user.get("interactions", {})
+            self.clicked_by_user[user_id] = set(interactions.get("clicked_artworks", []))
+            self.completed_by_user[user_id] = set(interactions.get("completed_tutorials", []))
+
+    def get_user(self, user_id):
+        """Return the user record, or None if the user is unknown"""
+        return self.users_by_id.get(user_id)
+
+    def get_preferences(self, user_id):
+        """Return the user's preferences as a set (empty for unknown users)"""
+        return self.preferences_by_user.get(user_id, set())
+
+    def get_interactions(self, user_id):
+        """Return (clicked_artworks, completed_tutorials) id sets for a user, live events included"""
+        clicked = self.clicked_by_user.get(user_id, set())
+        completed = self.completed_by_user.get(user_id, set())
+        if self.events is not None:
+            live_clicked, live_completed = self.events.interactions(user_id)
+            if live_clicked:
+                clicked = clicked | live_clicked
+            if live_completed:
+                completed = completed | live_completed
+        return clicked, completed
+
+    def clicked_rows(self, user_id):
+        """Rows in self.artworks of the artworks a user clicked, in dataset order"""
+        clicked, _ = self.get_interactions(user_id)
+        return sorted(self.artworks.positions[i] for i in clicked if i in self.artworks.positions)
+
+    def completed_rows(self, user_id):
+        """Rows in self.tutorials of the tutorials a user completed, in dataset order"""
+        _, completed = self.get_interactions(user_id)
+        return sorted(self.tutorials.positions[i] for i in completed if i in self.tutorials.positions)
+
+    def clicked_artworks(self, user_id):
+        """Artwork records a user clicked, in dataset order"""
+        return [self.artworks.record(row) for row in self.clicked_rows(user_id)]
+
+    def completed_tutorials(self, user_id):
+        """Tutorial records a user completed, in dataset order"""
+        return [self.tutorials.record(row) for row in self.completed_rows(user_id)]
+
+    def preference_overlap(self, user_id):
+        """Count shared preferences with every user who shares at least one"""
+        overlap = defaultdict(int)
+        for pref in self.get_preferences(user_id):
+            for other_id in self.users_by_preference.get(pref, ()):
+                if other_id != user_id:
+                    overlap[other_id] += 1
+        return overlap
@@ -1,10 +1,32 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import itertools
 import json
-import random
 import os
-from collections import defaultdict
+import sys
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
+from candidate_cache import CandidateCache
+from catalog_index import CatalogIndex
+from interaction_log import DEFAULT_LOG_PATH, EVENT_TYPES, MAX_CLOCK_SKEW_SECONDS, InteractionLog
+from neighbor_table import NeighborTable
+from precompute_suggestions import SuggestionStore
+from rank_fusion import fuse
+from similarity_engine import SparseSimilarityEngine, is_available as sparse_engine_available
+from trending import TrendingTracker
+
+# Shared helpers used by both AI services
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "shared"))
+from dataset import get_holder
+from llm_cache import make_key, canonical_preferences
+from llm_guard import get_guard, llm_metrics
+from metrics import get_metrics
+
 # Load environment variables
 load_dotenv()
 
@@ -21,44 +43,145 @@ if GEMINI_API_KEY and genai:
 else:
     model = None
 
-def load_dataset():
-    """Load the art suggestions dataset with fallback for deployment environments"""
-    # Get the directory of this script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    dataset_path = os.path.join(script_dir, "../dataset/art_suggestions.json")
-    
-    # If that doesn't work, try alternative path for deployment
-    if not os.path.exists(dataset_path):
-        dataset_path = os.path.join(script_dir, "..", "..", "artvista-AI", "ai_suggestions", "dataset", "art_suggestions.json")
+# Cached, coalesced and time-boxed Gemini calls (see shared/llm_guard.py)
+llm_guard = get_guard()
+
+# Request and stage timings served at /metrics (see shared/metrics.py)
+metrics = get_metrics()
+
+# Neighbour search backend: "sparse" (NumPy/SciPy), "python" or "auto"
+SIMILARITY_BACKEND = os.environ.get("SIMILARITY_BACKEND", "auto")
+
+# Precomputed neighbour table (see neighbor_table.py); when present, similar-user
+# search is a lookup. Rows for users edited since the last build are refreshed here.
+NEIGHBOR_TABLE_PATH = os.environ.get("NEIGHBOR_TABLE_PATH",
+                                     os.path.join(os.path.dirname(os.path.abspath(__file__)), "../dataset/neighbor_table.json"))
+
+# Items returned by the local recommenders
+MAX_ARTWORKS = 5
+MAX_TUTORIALS = 3
+TRENDING_ARTWORKS = 3
+TRENDING_TUTORIALS = 2
+
+# Rank fusion weights of the blended sources
+CONTENT_WEIGHT = 0.4
+COLLABORATIVE_WEIGHT = 0.3
+TRENDING_WEIGHT = 0.3
+
+# Trending interaction counts halve every TRENDING_HALF_LIFE_HOURS; TRENDING_SKETCH_WIDTH=0
+# keeps exact per-item counts instead of a fixed-size count-min sketch
+TRENDING_HALF_LIFE_HOURS = float(os.environ.get("TRENDING_HALF_LIFE_HOURS", 24))
+TRENDING_SKETCH_WIDTH = int(os.environ.get("TRENDING_SKETCH_WIDTH", 65536))
+
+# Recorded events' trending counts outlive dataset reloads; the interactions stored in the
+# dataset are counted per catalog (Catalog.trending_seed) as of the dataset file's mtime
+trending = TrendingTracker(half_life=TRENDING_HALF_LIFE_HOURS * 3600, sketch_width=TRENDING_SKETCH_WIDTH)
+
+# Clicks and completions posted to /events since the dataset was built; replayed from
+# INTERACTION_LOG_PATH at startup ("" keeps them in memory only)
+INTERACTION_LOG_PATH = os.environ.get("INTERACTION_LOG_PATH", DEFAULT_LOG_PATH)
+interaction_log = InteractionLog(
+    INTERACTION_LOG_PATH or None,
+    listener=lambda event: trending.record(event["type"], event["item_id"], event["timestamp"]),
+)
+
+# Per-user collaborative and content candidates (see candidate_cache.py), bounded to
+# CANDIDATE_CACHE_MAX_BYTES; 0 disables the cache
+CANDIDATE_CACHE_MAX_BYTES = int(os.environ.get("CANDIDATE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+candidate_cache = CandidateCache(CANDIDATE_CACHE_MAX_BYTES, interaction_log.version)
+
+_catalog_generations = itertools.count(1)
+
+def _dataset_built_at():
+    """When the dataset file was last written; its stored interactions count as happening then"""
+    try:
+        return os.path.getmtime(get_holder().path)
+    except OSError:
+        return time.time()
+
+class Catalog:
+    """Lookup tables and neighbour search built from one version of the dataset"""
     
-    # Handle case where file might not exist (for deployment safety)
+    def __init__(self, data):
+        self.data = data
+        # Distinguishes catalogs in cache stamps, including two builds of the same dataset version
+        self.generation = next(_catalog_generations)
+        
+        # Build lookup tables once so each request only touches the records it needs
+        self.index = CatalogIndex(data, interaction_log)
+        
+        self.trending_seed = trending.seeded(data.get("users", []), _dataset_built_at())
+        
+        self.similarity_engine = None
+        if SIMILARITY_BACKEND in ("auto", "sparse"):
+            if sparse_engine_available():
+                self.similarity_engine = SparseSimilarityEngine(self.index.users)
+            elif SIMILARITY_BACKEND == "sparse":
+                print("numpy/scipy not installed. Falling back to the python similarity backend.")
+        
+        self.neighbor_table = None
+        if os.path.exists(NEIGHBOR_TABLE_PATH):
+            try:
+                self.neighbor_table = NeighborTable.load(NEIGHBOR_TABLE_PATH).sync(self.index.users)
+            except Exception as e:
+                print(f"Neighbor table load error: {e}. Using live similarity search.")
+
+# The catalog is rebuilt off to the side and swapped in whole when the dataset is
+# reloaded (DATASET_WATCH_SECONDS or the /admin/reload endpoint)
+dataset_holder = get_holder()
+dataset_holder.register("recommendations", Catalog)
+
+_request_catalog = contextvars.ContextVar("request_catalog", default=None)
+
+def current_catalog():
+    """Catalog pinned for the current request, else the latest one"""
+    return _request_catalog.get() or dataset_holder.get("recommendations")
+
+@contextmanager
+def pinned_catalog():
+    """Serve everything inside the block from one catalog, even if a reload lands meanwhile"""
+    token = _request_catalog.set(current_catalog())
+    try:
+        yield _request_catalog.get()
+    finally:
+        _request_catalog.reset(token)
+
+def uses_one_catalog(fn):
+    """Decorator: run a request entry point (sync or async) inside pinned_catalog()"""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with pinned_catalog():
+                return await fn(*args, **kwargs)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with pinned_catalog():
+                return fn(*args, **kwargs)
+    return wrapper
+
+# Nightly precomputed results (see precompute_suggestions.py); when configured,
+# /adaptive_suggest answers users found in the store without computing anything.
+# The store reopens the file when a new precompute run replaces it.
+SUGGESTION_STORE_PATH = os.environ.get("SUGGESTION_STORE_PATH")
+suggestion_store = None
+if SUGGESTION_STORE_PATH:
     try:
-        if os.path.exists(dataset_path):
-            with open(dataset_path, "r") as f:
-                return json.load(f)
+        suggestion_store = SuggestionStore(SUGGESTION_STORE_PATH, readonly=True)
     except Exception as e:
-        print(f"Dataset load error: {e}")
-    
-    # Fallback to a rich minimal dataset for deployment
-    return {
-        "users": [
-            {"id": 1, "name": "Aditi", "preferences": ["landscape", "watercolor", "nature"], "interactions": {"clicked_artworks": [], "completed_tutorials": []}},
-            {"id": 2, "name": "Rohan", "preferences": ["urban", "abstract", "oil"], "interactions": {"clicked_artworks": [], "completed_tutorials": []}}
-        ],
-        "artworks": [
-            {"id": "A1", "title": "Sunset Valley", "style": "landscape", "medium": "watercolor", "artist": "Aditi Rao", "image": "https://images.unsplash.com/photo-1579783902614-a3f140026229?w=500&q=80", "description": "A tranquil valley at sunset."},
-            {"id": "A2", "title": "City Rush", "style": "urban", "medium": "oil", "artist": "Rohan Sharma", "image": "https://images.unsplash.com/photo-1578301978693-85fa9c0320b9?w=500&q=80", "description": "The vibrant energy of a metropolis."},
-            {"id": "A3", "title": "Dream Shapes", "style": "abstract", "medium": "digital", "artist": "Priya Singh", "image": "https://images.unsplash.com/photo-1541701494587-cb58502866ab?w=500&q=80", "description": "An ethereal abstract composition."}
-        ],
-        "tutorials": [
-            {"id": "T1", "title": "How to paint landscapes with watercolor", "style": "landscape", "description": "Master the basics of outdoor painting.", "duration": "20 min", "level": "Beginner"},
-            {"id": "T2", "title": "Urban sketching for beginners", "style": "urban", "description": "Capture the city in your sketchbook.", "duration": "15 min", "level": "Beginner"},
-            {"id": "T3", "title": "Abstract art basics", "style": "abstract", "description": "Explore the world of non-representational art.", "duration": "25 min", "level": "Intermediate"}
-        ]
-    }
+        print(f"Suggestion store load error: {e}. Computing suggestions live.")
+
+def recommendation_metrics():
+    """Metrics collector for the candidate cache and the dataset version"""
+    yield "candidate_cache_lookups_total", "counter", {"result": "hit"}, candidate_cache.hits
+    yield "candidate_cache_lookups_total", "counter", {"result": "miss"}, candidate_cache.misses
+    yield "candidate_cache_evictions_total", "counter", {}, candidate_cache.evictions
+    yield "candidate_cache_entries", "gauge", {}, len(candidate_cache)
+    yield "candidate_cache_bytes", "gauge", {}, candidate_cache.size
+    yield "dataset_version", "gauge", {}, dataset_holder.version
 
-# Load dataset when module is imported
-data = load_dataset()
+metrics.add_collector("recommendations", recommendation_metrics)
+metrics.add_collector("llm", llm_metrics)
 
 def calculate_user_similarity(user1, user2):
     """Calculate similarity between two users based on preferences"""
@@ -74,217 +197,443 @@ def calculate_user_similarity(user1, user2):
     
     return intersection / union
 
-def collaborative_filtering(user_id, k=3):
-    """Find k similar users and recommend items they liked"""
-    target_user = next(u for u in data["users"] if u["id"] == user_id)
+def similar_users(user_id, k=3):
+    """Return the k users most similar to user_id as (user_id, similarity) pairs"""
+    catalog = current_catalog()
+    index = catalog.index
+    if catalog.neighbor_table is not None:
+        neighbours = catalog.neighbor_table.get(user_id, k)
+        if neighbours is not None:
+            return neighbours
+    
+    if catalog.similarity_engine is not None:
+        return catalog.similarity_engine.top_k(user_id, k)
+    
+    if index.get_user(user_id) is None:
+        return []
+    prefs = index.get_preferences(user_id)
     similarities = []
     
-    # Calculate similarity with all other users
-    for user in data["users"]:
-        if user["id"] != user_id:
-            similarity = calculate_user_similarity(target_user, user)
-            similarities.append((user["id"], similarity))
-    
-    # Sort by similarity and get top k
-    similarities.sort(key=lambda x: x[1], reverse=True)
-    top_users = [user_id for user_id, _ in similarities[:k]]
-    
-    # Get items liked by similar users
-    recommendations = []
-    for user in data["users"]:
-        if user["id"] in top_users:
-            clicked = user.get("interactions", {}).get("clicked_artworks", [])
-            completed = user.get("interactions", {}).get("completed_tutorials", [])
-            
-            # Add these items to recommendations
-            for artwork in data["artworks"]:
-                if artwork["id"] in clicked and artwork not in recommendations:
-                    recommendations.append(artwork)
-            
-            for tutorial in data["tutorials"]:
-                if tutorial["id"] in completed and tutorial not in recommendations:
-                    recommendations.append(tutorial)
-    
-    return recommendations
-
-def content_based_filtering(user_id):
-    """Recommend items based on user's past preferences"""
-    user = next(u for u in data["users"] if u["id"] == user_id)
-    prefs = set(user["preferences"])
-    
-    # Score artworks and tutorials based on preference match
-    scored_artworks = []
-    scored_tutorials = []
-    
-    for artwork in data["artworks"]:
-        score = 0
-        if artwork["style"] in prefs:
-            score += 2
-        if artwork["medium"] in prefs:
-            score += 1
-            
-        if score > 0:
-            scored_artworks.append((artwork, score))
-    
-    for tutorial in data["tutorials"]:
-        score = 0
-        if tutorial["style"] in prefs:
-            score += 2
-            
-        if score > 0:
-            scored_tutorials.append((tutorial, score))
-    
-    # Sort by score
-    scored_artworks.sort(key=lambda x: x[1], reverse=True)
-    scored_tutorials.sort(key=lambda x: x[1], reverse=True)
-    
-    return [artwork for artwork, _ in scored_artworks], [tutorial for tutorial, _ in scored_tutorials]
-
-def trending_recommendations():
-    """Recommend currently trending items"""
-    # In a real implementation, this would use actual interaction data
-    # For now, we'll randomly select some items as "trending"
-    trending_artworks = random.sample(data["artworks"], min(3, len(data["artworks"])))
-    trending_tutorials = random.sample(data["tutorials"], min(2, len(data["tutorials"])))
+    # Only users sharing at least one preference have a non-zero Jaccard similarity
+    for other_id, shared in index.preference_overlap(user_id).items():
+        union = len(prefs) + len(index.get_preferences(other_id)) - shared
+        similarities.append((other_id, shared / union))
+    
+    # Sort by similarity (ties keep dataset order) and get top k
+    similarities.sort(key=lambda x: (-x[1], index.user_positions[x[0]]))
+    neighbours = similarities[:k]
+    
+    # Pad with zero-similarity users, as a full scan would have
+    if len(neighbours) < k:
+        chosen = {other_id for other_id, _ in neighbours}
+        for user in index.users:
+            if len(neighbours) >= k:
+                break
+            if user["id"] != user_id and user["id"] not in chosen:
+                neighbours.append((user["id"], 0))
+                chosen.add(user["id"])
+    
+    return neighbours
+
+def similar_users_batch(user_ids, k=3):
+    """similar_users for many users; misses in the neighbour table share batched sparse products"""
+    catalog = current_catalog()
+    neighbours = {}
+    remaining = []
+    for user_id in user_ids:
+        row = catalog.neighbor_table.get(user_id, k) if catalog.neighbor_table is not None else None
+        if row is not None:
+            neighbours[user_id] = row
+        else:
+            remaining.append(user_id)
+    
+    if catalog.similarity_engine is not None:
+        neighbours.update(catalog.similarity_engine.top_k_batch(remaining, k))
+    else:
+        for user_id in remaining:
+            neighbours[user_id] = similar_users(user_id, k)
+    return neighbours
+
+def collaborative_filtering(user_id, k=3):
+    """Find k similar users and recommend items they liked, as (artworks, tutorials)"""
+    return items_liked_by([other_id for other_id, _ in similar_users(user_id, k)])
+
+def items_liked_by(top_users):
+    """Artworks clicked and tutorials completed by the given users, without duplicates
+
+    Returns lazy sequences (records are built when read).
+    """
+    index = current_catalog().index
+    artwork_rows = []
+    tutorial_rows = []
+    for other_id in sorted(top_users, key=index.user_positions.__getitem__):
+        artwork_rows.extend(index.clicked_rows(other_id))
+        tutorial_rows.extend(index.completed_rows(other_id))
+    
+    # dict.fromkeys drops repeats and keeps first-seen order
+    artwork_rows = list(dict.fromkeys(artwork_rows))
+    tutorial_rows = list(dict.fromkeys(tutorial_rows))
+    return index.artworks.rows(artwork_rows), index.tutorials.rows(tutorial_rows)
+
+def content_based_filtering(user_id, limit=None):
+    """Recommend items based on user's past preferences (at most limit of each kind)"""
+    return content_based_for_preferences(current_catalog().index.get_preferences(user_id), limit)
+
+def content_limit(user_id):
+    """Content matches passed to the blend: its slots plus one per item the user already saw
+
+    Enough to fill every slot from content alone; matches further down are left
+    out of the rank fusion, where they would add at most CONTENT_WEIGHT / (limit + 1).
+    """
+    clicked, completed = current_catalog().index.get_interactions(user_id)
+    return max(MAX_ARTWORKS + len(clicked), MAX_TUTORIALS + len(completed))
+
+def content_based_for_preferences(prefs, limit=None):
+    """Artworks and tutorials matching a preference set, best matches first
+
+    Scores the style/medium code columns directly; the returned sequences build
+    each record only when it is read.
+    """
+    index = current_catalog().index
+    # A style match is worth 2, a medium match 1; ties keep dataset order
+    artwork_rows = index.artworks.rank(prefs, {"style": 2, "medium": 1}, limit)
+    tutorial_rows = index.tutorials.rank(prefs, {"style": 2}, limit)
+    
+    return index.artworks.rows(artwork_rows), index.tutorials.rows(tutorial_rows)
+
+def event_error(event):
+    """Why an /events entry cannot be recorded, or None if it is valid"""
+    if not isinstance(event, dict):
+        return "each event must be an object"
+    user_id = event.get("user_id")
+    if not isinstance(user_id, int) or isinstance(user_id, bool):
+        return "user_id must be an integer"
+    if event.get("type") not in EVENT_TYPES:
+        return f"type must be one of {', '.join(EVENT_TYPES)}"
+    timestamp = event.get("timestamp")
+    if timestamp is not None and (not isinstance(timestamp, (int, float)) or isinstance(timestamp, bool)):
+        return "timestamp must be a number"
+    # Also rejects milliseconds (e.g. JavaScript's Date.now()), NaN and infinities
+    if timestamp is not None and not 0 <= timestamp <= time.time() + MAX_CLOCK_SKEW_SECONDS:
+        return "timestamp must be in seconds since the epoch and not in the future"
+    index = current_catalog().index
+    store = index.artworks if event["type"] == "click" else index.tutorials
+    # True == 1 would otherwise match an integer item id
+    if isinstance(event.get("item_id"), bool) or event.get("item_id") not in store.positions:
+        return f"unknown item_id {event.get('item_id')!r}"
+    return None
+
+def record_events(events):
+    """Record validated click/complete events for the recommenders and trending; returns how many were new"""
+    return interaction_log.append(
+        [{key: event[key] for key in ("user_id", "type", "item_id", "timestamp") if key in event} for event in events]
+    )
+
+def _trending_items(store, section, count, exclude):
+    items = []
+    for item_id, _ in trending.top(section, seed=current_catalog().trending_seed):
+        if len(items) >= count:
+            break
+        # Items dropped from the catalog by a reload keep their counts until they decay
+        if item_id not in exclude and item_id in store.positions:
+            items.append(store.get(item_id))
+    return items
+
+def trending_recommendations(exclude_artworks=(), exclude_tutorials=()):
+    """Most interacted-with artworks and tutorials lately, skipping the excluded ids"""
+    index = current_catalog().index
+    trending_artworks = _trending_items(index.artworks, "artworks", TRENDING_ARTWORKS, exclude_artworks)
+    trending_tutorials = _trending_items(index.tutorials, "tutorials", TRENDING_TUTORIALS, exclude_tutorials)
     
     return trending_artworks, trending_tutorials
 
+def adaptive_prompt(user_preferences):
+    """Gemini prompt for personalized artwork and tutorial recommendations"""
+    return f"""
+    You are an art recommendation engine.
+    The user likes these styles/mediums: {", ".join(user_preferences)}.
+    Generate highly personalized recommendations for this user.
+    Return strictly a JSON object exactly matching this structure:
+    {{
+        "artworks": [
+            {{"id": "gen1", "title": "Artwork Title", "artist": "Artist Name", "style": "Style", "medium": "Medium", "description": "Short description", "image": "https://images.unsplash.com/photo-1579783902614-a3f140026229?w=500&q=80"}}
+        ],
+        "tutorials": [
+            {{"id": "tut1", "title": "Tutorial Title", "style": "Style", "description": "Short description", "duration": "15 min", "level": "Beginner/Intermediate/Advanced"}}
+        ]
+    }}
+    Provide exactly 5 artworks and 3 tutorials. Do not include markdown formatting like ```json.
+    Make the image URLs pointing to realistic unsplash photos of art.
+    """
+
+def parse_adaptive_response(text):
+    """Parse Gemini's recommendation JSON robustly"""
+    text = text.strip()
+    
+    # Extract JSON if wrapped in code blocks
+    if '```json' in text:
+        text = text.split('```json')[1].split('```')[0]
+    elif '```' in text:
+        text = text.split('```')[1].split('```')[0]
+        
+    result = json.loads(text.strip())
+    # Ensure keys exist
+    if "artworks" not in result: result["artworks"] = []
+    if "tutorials" not in result: result["tutorials"] = []
+    
+    return result
+
+def gemini_adaptive_suggestions(user_preferences):
+    """Ask Gemini for recommendations matching the given preferences"""
+    with metrics.stage("gemini", endpoint="adaptive_suggestions"):
+        response = model.generate_content(adaptive_prompt(user_preferences))
+    with metrics.stage("json_parse", endpoint="adaptive_suggestions"):
+        return parse_adaptive_response(response.text)
+
+async def gemini_adaptive_suggestions_async(user_preferences):
+    """Non-blocking variant of gemini_adaptive_suggestions"""
+    with metrics.stage("gemini", endpoint="adaptive_suggestions"):
+        response = await model.generate_content_async(adaptive_prompt(user_preferences))
+    with metrics.stage("json_parse", endpoint="adaptive_suggestions"):
+        return parse_adaptive_response(response.text)
+
+def _user_preferences(user_id):
+    user = current_catalog().index.get_user(user_id)
+    if user is not None:
+        return user["preferences"]
+    return ["landscape", "watercolor"]
+
+def stored_suggestions(user_id):
+    """Precomputed suggestions for user_id, or None if there is no store or no row
+
+    Rows are built from the dataset alone, so users with live events (POST
+    /events) are left to the live engines, which already see them.
+    """
+    if suggestion_store is None:
+        return None
+    if interaction_log.version(user_id) > 0:
+        metrics.inc("suggestion_store_lookups_total", result="stale")
+        return None
+    result = suggestion_store.get(user_id, current_catalog().index)
+    metrics.inc("suggestion_store_lookups_total", result="miss" if result is None else "hit")
+    return result
+
+@uses_one_catalog
 def adaptive_suggestions(user_id):
     """Enhanced recommendation system combining multiple approaches"""
-    try:
-        user = next(u for u in data["users"] if u["id"] == user_id)
-        user_preferences = user["preferences"]
-    except StopIteration:
-        user_preferences = ["landscape", "watercolor"]
+    with metrics.stage("dataset_lookup"):
+        result = stored_suggestions(user_id)
+        if result is None:
+            user_preferences = _user_preferences(user_id)
+    if result is not None:
+        return result
     
     # Try using Gemini AI if configured
     if model:
-        try:
-            prompt = f"""
-            You are an art recommendation engine.
-            The user likes these styles/mediums: {", ".join(user_preferences)}.
-            Generate highly personalized recommendations for this user.
-            Return strictly a JSON object exactly matching this structure:
-            {{
-                "artworks": [
-                    {{"id": "gen1", "title": "Artwork Title", "artist": "Artist Name", "style": "Style", "medium": "Medium", "description": "Short description", "image": "https://images.unsplash.com/photo-1579783902614-a3f140026229?w=500&q=80"}}
-                ],
-                "tutorials": [
-                    {{"id": "tut1", "title": "Tutorial Title", "style": "Style", "description": "Short description", "duration": "15 min", "level": "Beginner/Intermediate/Advanced"}}
-                ]
-            }}
-            Provide exactly 5 artworks and 3 tutorials. Do not include markdown formatting like ```json.
-            Make the image URLs pointing to realistic unsplash photos of art.
-            """
-            response = model.generate_content(prompt)
-            # Parse the JSON response robustly
-            text = response.text.strip()
-            
-            # Extract JSON if wrapped in code blocks
-            if '```json' in text:
-                text = text.split('```json')[1].split('```')[0]
-            elif '```' in text:
-                text = text.split('```')[1].split('```')[0]
-                
-            result = json.loads(text.strip())
-            # Ensure keys exist
-            if "artworks" not in result: result["artworks"] = []
-            if "tutorials" not in result: result["tutorials"] = []
-            
+        cache_key = make_key("adaptive_suggestions", preferences=canonical_preferences(user_preferences))
+        result = llm_guard.call("adaptive_suggestions", cache_key, lambda: gemini_adaptive_suggestions(user_preferences))
+        if result is not None:
             return result
-        except Exception as e:
-            print(f"Gemini AI error: {e}. Falling back to default recommendation engine.")
+        metrics.inc("fallbacks_total", endpoint="adaptive_suggestions", reason="gemini_unavailable")
     
-    # Get collaborative filtering recommendations
-    collab_recs = collaborative_filtering(user_id)
+    return local_adaptive_suggestions(user_id)
+
+@uses_one_catalog
+async def adaptive_suggestions_async(user_id):
+    """Async variant of adaptive_suggestions: awaits Gemini, runs the local engine inline"""
+    with metrics.stage("dataset_lookup"):
+        result = None
+        if suggestion_store is not None:
+            # A SQLite read; to_thread copies the pinned catalog along with the context
+            result = await asyncio.to_thread(stored_suggestions, user_id)
+        if result is None:
+            user_preferences = _user_preferences(user_id)
+    if result is not None:
+        return result
     
-    # Get content-based filtering recommendations
-    content_artworks, content_tutorials = content_based_filtering(user_id)
+    if model:
+        cache_key = make_key("adaptive_suggestions", preferences=canonical_preferences(user_preferences))
+        result = await llm_guard.call_async("adaptive_suggestions", cache_key,
+                                            lambda: gemini_adaptive_suggestions_async(user_preferences))
+        if result is not None:
+            return result
+        metrics.inc("fallbacks_total", endpoint="adaptive_suggestions", reason="gemini_unavailable")
     
-    # Get trending recommendations
-    trending_artworks, trending_tutorials = trending_recommendations()
+    return local_adaptive_suggestions(user_id)
+
+@uses_one_catalog
+def adaptive_suggestions_batch(user_ids):
+    """adaptive_suggestions for many users at once, sharing work across the batch
+
+    Gemini requests run concurrently, one per distinct preference set; the local
+    engine computes neighbours with batched similarity and content matches once
+    per distinct preference set. Returns {user_id: result}.
+    """
+    results = {}
+    remaining = []
+    with metrics.stage("dataset_lookup"):
+        for user_id in dict.fromkeys(user_ids):
+            result = stored_suggestions(user_id)
+            if result is not None:
+                results[user_id] = result
+            else:
+                remaining.append(user_id)
     
-    # Combine all recommendations with weights
-    # Content-based: 40%, Collaborative: 30%, Trending: 30%
+    if model and remaining:
+        keys = {}
+        requests = {}
+        for user_id in remaining:
+            user_preferences = _user_preferences(user_id)
+            keys[user_id] = make_key("adaptive_suggestions", preferences=canonical_preferences(user_preferences))
+            requests.setdefault(keys[user_id], lambda p=user_preferences: gemini_adaptive_suggestions(p))
+        answers = llm_guard.call_many("adaptive_suggestions", list(requests.items()))
+        for user_id in remaining:
+            if keys[user_id] in answers:
+                results[user_id] = answers[keys[user_id]]
+        remaining = [user_id for user_id in remaining if user_id not in results]
+        if remaining:
+            metrics.inc("fallbacks_total", len(remaining), endpoint="adaptive_suggestions", reason="gemini_unavailable")
     
+    results.update(local_adaptive_suggestions_batch(remaining))
+    return results
+
+def cached_candidates(user_id):
+    """(collab artworks, collab tutorials, content artworks, content tutorials) from the cache, or None"""
+    catalog = current_catalog()
+    lists = candidate_cache.get(user_id, catalog.generation)
+    if lists is None:
+        return None
+    artworks, tutorials = catalog.index.artworks, catalog.index.tutorials
+    return artworks.rows(lists[0]), tutorials.rows(lists[1]), artworks.rows(lists[2]), tutorials.rows(lists[3])
+
+def compute_candidates(user_id, neighbour_ids, content=None):
+    """Candidate lists for user_id from its neighbours (and content matches, if not given); cached"""
+    catalog = current_catalog()
+    # Stamped before reading any interactions, so an event landing meanwhile invalidates the entry
+    stamp = candidate_cache.stamp(user_id, catalog.generation, neighbour_ids)
+    with metrics.stage("collaborative"):
+        collab_artworks, collab_tutorials = items_liked_by(neighbour_ids)
+    if content is None:
+        with metrics.stage("content"):
+            content = content_based_filtering(user_id, content_limit(user_id))
+    lists = (collab_artworks, collab_tutorials) + tuple(content)
+    candidate_cache.put(user_id, stamp, neighbour_ids, [rows.row_numbers for rows in lists])
+    return lists
+
+@uses_one_catalog
+def local_adaptive_suggestions_batch(user_ids):
+    """local_adaptive_suggestions for many users, sharing neighbour search and content matches"""
+    index = current_catalog().index
+    candidates = {user_id: cached_candidates(user_id) for user_id in user_ids}
+    misses = [user_id for user_id, lists in candidates.items() if lists is None]
+    with metrics.stage("neighbours"):
+        neighbours = similar_users_batch(misses)
+    content_by_prefs = {}
+    for user_id in misses:
+        prefs = frozenset(index.get_preferences(user_id))
+        key = (prefs, content_limit(user_id))
+        if key not in content_by_prefs:
+            with metrics.stage("content"):
+                content_by_prefs[key] = content_based_for_preferences(prefs, key[1])
+        neighbour_ids = [other_id for other_id, _ in neighbours[user_id]]
+        candidates[user_id] = compute_candidates(user_id, neighbour_ids, content_by_prefs[key])
+    
+    return {user_id: blend_recommendations(user_id, *candidates[user_id]) for user_id in user_ids}
+
+@uses_one_catalog
+def local_adaptive_suggestions(user_id):
+    """Blend collaborative, content-based and trending recommendations without Gemini"""
+    # Collaborative and content-based candidates only change with the dataset or new
+    # interactions, so repeat views reuse them; trending is blended in fresh every time
+    candidates = cached_candidates(user_id)
+    if candidates is None:
+        with metrics.stage("neighbours"):
+            neighbour_ids = [other_id for other_id, _ in similar_users(user_id)]
+        candidates = compute_candidates(user_id, neighbour_ids)
+    
+    return blend_recommendations(user_id, *candidates)
+
+def blend_recommendations(user_id, collab_artworks, collab_tutorials, content_artworks, content_tutorials):
+    """Fuse content, collaborative and trending candidates by weighted rank, dropping what the user already saw"""
+    index = current_catalog().index
     # Get user's already interacted items
-    try:
-        user = next(u for u in data["users"] if u["id"] == user_id)
-        clicked = set(user.get("interactions", {}).get("clicked_artworks", []))
-        completed = set(user.get("interactions", {}).get("completed_tutorials", []))
-    except StopIteration:
-        clicked = set()
-        completed = set()
-    
-    # Filter out already interacted items
-    final_artworks = []
-    final_tutorials = []
-    
-    # Add content-based recommendations (weighted more heavily)
-    for artwork in content_artworks:
-        if artwork["id"] not in clicked and artwork not in final_artworks:
-            final_artworks.append(artwork)
-    
-    # Add some collaborative filtering recommendations
-    for item in collab_recs:
-        if "style" in item:  # It's an artwork
-            if item["id"] not in clicked and item not in final_artworks:
-                final_artworks.append(item)
-        else:  # It's a tutorial
-            if item["id"] not in completed and item not in final_tutorials:
-                final_tutorials.append(item)
-    
-    # Add some trending recommendations
-    for artwork in trending_artworks:
-        if artwork["id"] not in clicked and artwork not in final_artworks:
-            final_artworks.append(artwork)
-    
-    for tutorial in trending_tutorials:
-        if tutorial["id"] not in completed and tutorial not in final_tutorials:
-            final_tutorials.append(tutorial)
-    
-    # Limit results
-    final_artworks = final_artworks[:5]
-    final_tutorials = final_tutorials[:3]
+    clicked, completed = index.get_interactions(user_id)
+    
+    # Get trending recommendations
+    with metrics.stage("trending"):
+        trending_artworks, trending_tutorials = trending_recommendations(clicked, completed)
+    
+    # Content-based: 40%, Collaborative: 30%, Trending: 30%; fuse() stops reading the
+    # (lazy) candidate lists once the top MAX_ARTWORKS / MAX_TUTORIALS are settled
+    with metrics.stage("blend"):
+        final_artworks = fuse(
+            [(CONTENT_WEIGHT, content_artworks), (COLLABORATIVE_WEIGHT, collab_artworks), (TRENDING_WEIGHT, trending_artworks)],
+            MAX_ARTWORKS, clicked,
+        )
+        final_tutorials = fuse(
+            [(CONTENT_WEIGHT, content_tutorials), (COLLABORATIVE_WEIGHT, collab_tutorials), (TRENDING_WEIGHT, trending_tutorials)],
+            MAX_TUTORIALS, completed,
+        )
     
     return {"artworks": final_artworks, "tutorials": final_tutorials}
 
+CHAT_OFFLINE_RESPONSE = {
+    "response": "I'm currently in offline mode, but I can still tell you that art is the window to the soul! To have a real conversation, please ensure the GEMINI_API_KEY is configured.",
+    "status": "offline"
+}
+
+CHAT_ERROR_RESPONSE = {
+    "response": "I'm sorry, I'm having a bit of trouble connecting to my creative database right now. Let's talk about art again in a moment!",
+    "status": "error"
+}
+
+def chat_prompt(message, history=None):
+    """Art Expert persona prompt for a chat message"""
+    # Construct the context/persona
+    system_prompt = """
+    You are the 'ArtVista Virtual Professor', a world-class expert in art history, techniques, and criticism.
+    Your goal is to provide deeply satisfying, educational, and inspiring answers about art.
+    
+    Guidelines for your persona:
+    1. Tone: Professional, passionate, and encouraging.
+    2. Depth: Provide comprehensive explanations. Don't just give facts; explain the 'why' and 'how'. For example, if asked about a style, discuss its historical context, key characteristics, and famous masters.
+    3. Structure: Use clear, readable paragraphs. If explaining a technique, you can use step-by-step logic.
+    4. Focus: Stay strictly on the topic of art (history, creation, theory, artists). If the user drifts off-topic, gracefully bring them back to the beauty of art.
+    5. Engagement: Occasionally ask the user a follow-up question to encourage their own artistic curiosity.
+    """
+    
+    # In a more advanced version, we would use the history here
+    return f"{system_prompt}\n\nUser: {message}\nAssistant:"
+
 def get_art_chat_response(message, history=None):
     """Generate a chat response using Gemini with an Art Expert persona"""
     if not model:
-        return {
-            "response": "I'm currently in offline mode, but I can still tell you that art is the window to the soul! To have a real conversation, please ensure the GEMINI_API_KEY is configured.",
-            "status": "offline"
-        }
+        return dict(CHAT_OFFLINE_RESPONSE)
     
     try:
-        # Construct the context/persona
-        system_prompt = """
-        You are the 'ArtVista Virtual Professor', a world-class expert in art history, techniques, and criticism.
-        Your goal is to provide deeply satisfying, educational, and inspiring answers about art.
-        
-        Guidelines for your persona:
-        1. Tone: Professional, passionate, and encouraging.
-        2. Depth: Provide comprehensive explanations. Don't just give facts; explain the 'why' and 'how'. For example, if asked about a style, discuss its historical context, key characteristics, and famous masters.
-        3. Structure: Use clear, readable paragraphs. If explaining a technique, you can use step-by-step logic.
-        4. Focus: Stay strictly on the topic of art (history, creation, theory, artists). If the user drifts off-topic, gracefully bring them back to the beauty of art.
-        5. Engagement: Occasionally ask the user a follow-up question to encourage their own artistic curiosity.
-        """
-        
-        # In a more advanced version, we would use the history here
-        full_prompt = f"{system_prompt}\n\nUser: {message}\nAssistant:"
-        
-        response = model.generate_content(full_prompt)
+        response = model.generate_content(chat_prompt(message, history))
         return {
             "response": response.text.strip(),
             "status": "online"
         }
     except Exception as e:
         print(f"Chat error: {e}")
+        return dict(CHAT_ERROR_RESPONSE)
+
+async def get_art_chat_response_async(message, history=None):
+    """Non-blocking variant of get_art_chat_response"""
+    if not model:
+        return dict(CHAT_OFFLINE_RESPONSE)
+    
+    try:
+        response = await model.generate_content_async(chat_prompt(message, history))
         return {
-            "response": "I'm sorry, I'm having a bit of trouble connecting to my creative database right now. Let's talk about art again in a moment!",
-            "status": "error"
+            "response": response.text.strip(),
+            "status": "online"
         }
+    except Exception as e:
+        print(f"Chat error: {e}")
+        return dict(CHAT_ERROR_RESPONSE)
 
 # Example usage
 if __name__ == "__main__":
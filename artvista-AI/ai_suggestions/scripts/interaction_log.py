@@ -0,0 +1,135 @@
+"""Live click and tutorial-completion events recorded after the dataset was built
+
+Events are appended to a JSON-lines log (one fsync per batch) and folded into
+per-user id sets, so the recommenders see them at once; on startup the log is
+replayed. The dataset's own interaction lists are left untouched, and
+CatalogIndex merges both (see catalog_index.py).
+
+Repeated events (the same user, type and item) change nothing, so once the log
+holds COMPACT_MIN_LINES lines and at least half of them are repeats, it is
+rewritten with only the first of each and swapped in atomically.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dataset", "interactions.log")
+
+# Event type -> the per-user set it adds to
+EVENT_TYPES = ("click", "complete")
+
+# Event timestamps may run this many seconds ahead of server time (client clock skew)
+MAX_CLOCK_SKEW_SECONDS = 300
+
+# The log is compacted once it has this many lines, half of them repeats
+COMPACT_MIN_LINES = int(os.environ.get("INTERACTION_LOG_COMPACT_LINES", 100000))
+
+
+class InteractionLog:
+    """Per-user clicked/completed id sets backed by an append-only log file (or memory only, path=None)
+
+    listener, if given, is called with every event that is new to its user,
+    replayed ones included (e.g. to count it towards trending). The file is
+    created by the first append.
+    """
+
+    def __init__(self, path=DEFAULT_LOG_PATH, listener=None):
+        self.path = path
+        self.listener = listener
+        self.clicked = {}                    # user_id -> frozenset of artwork ids
+        self.completed = {}                  # user_id -> frozenset of tutorial ids
+        self.versions = defaultdict(int)     # user_id -> events applied, bumped on every change
+        self._lock = threading.Lock()
+        self._file = None
+        self._closed = False
+        self._lines = 0     # lines in the file
+        self._kept = 0      # of those, events that were new to their user
+        if path:
+            for event in self._read():
+                self._lines += 1
+                self._kept += self._apply(event)
+
+    def _read(self):
+        """Events in the log file, skipping a torn last line from a crash mid-write"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+
+    def _compact(self):
+        """Rewrite the log keeping only the first of each repeated event (lock held)"""
+        tmp_path = self.path + ".tmp"
+        seen = set()
+        kept = 0
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for event in self._read():
+                key = (event["type"], event["user_id"], event["item_id"])
+                if key in seen:
+                    continue
+                seen.add(key)
+                f.write(json.dumps(event) + "\n")
+                kept += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._file.close()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._lines = self._kept = kept
+
+    def _apply(self, event):
+        sets = self.clicked if event["type"] == "click" else self.completed
+        user_id = event["user_id"]
+        items = sets.get(user_id, frozenset())
+        if event["item_id"] in items:
+            return False
+        # Replaced rather than mutated, so readers can iterate a set without the lock
+        sets[user_id] = items | {event["item_id"]}
+        self.versions[user_id] += 1
+        if self.listener is not None:
+            self.listener(event)
+        return True
+
+    def append(self, events):
+        """Log and apply validated events; returns how many were new to their user"""
+        # Never logged ahead of server time, so a fast client clock cannot reach trending on replay
+        now = time.time()
+        events = [dict(event, timestamp=now if event.get("timestamp") is None else min(event["timestamp"], now))
+                  for event in events]
+        with self._lock:
+            logged = self.path and not self._closed
+            if logged:
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write("".join(json.dumps(event) + "\n" for event in events))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._lines += len(events)
+            new = sum(self._apply(event) for event in events)
+            self._kept += new
+            if logged and self._lines >= COMPACT_MIN_LINES and self._lines >= 2 * self._kept:
+                try:
+                    self._compact()
+                except OSError as e:
+                    print(f"Interaction log compaction error: {e}")
+            return new
+
+    def interactions(self, user_id):
+        """(clicked, completed) id sets recorded live for user_id; empty sets if none"""
+        return self.clicked.get(user_id, frozenset()), self.completed.get(user_id, frozenset())
+
+    def version(self, user_id):
+        return self.versions.get(user_id, 0)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,220 @@
+"""Precomputed top-k similar users with incremental refresh
+
+Build or refresh the table offline (e.g. from cron) and the suggestion engine
+serves collaborative_filtering neighbours from it with a dictionary lookup:
+
+    python neighbor_table.py build --k 3
+    python neighbor_table.py refresh
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from similarity_engine import SparseSimilarityEngine, is_available as sparse_engine_available, user_features
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "shared"))
+from dataset import read_dataset
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dataset", "neighbor_table.json")
+
+
+class NeighborTable:
+    """Each user's k most similar users (Jaccard, ties in dataset order), kept up to date per user"""
+
+    def __init__(self, k=3, include_interactions=False):
+        self.k = k
+        self.include_interactions = include_interactions
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.rows = {}                          # user_id -> [(neighbour_id, similarity), ...] best first
+        self.features = {}                      # user_id -> frozenset of features
+        self.positions = {}                     # user_id -> dataset order, used to break ties
+        self.order = []                         # user ids in dataset order
+        self.users_by_feature = defaultdict(set)
+        self.referenced_by = defaultdict(set)   # neighbour_id -> users whose row contains it
+        self.padded = set()                     # rows ending in zero-similarity (or missing) entries
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, user_id, k=None):
+        """Return the precomputed neighbours for user_id, or None if the table cannot answer"""
+        k = self.k if k is None else k
+        row = self.rows.get(user_id)
+        if row is None or k > self.k:
+            return None
+        return row[:k]
+
+    def _key(self, entry):
+        return (-entry[1], self.positions[entry[0]])
+
+    def _add_user(self, user_id, features):
+        if user_id not in self.positions:
+            self.positions[user_id] = len(self.order)
+            self.order.append(user_id)
+        for feature in self.features.get(user_id, ()):
+            self.users_by_feature[feature].discard(user_id)
+        self.features[user_id] = features
+        for feature in features:
+            self.users_by_feature[feature].add(user_id)
+
+    def _set_row(self, user_id, row):
+        for neighbour_id, _ in self.rows.get(user_id, ()):
+            self.referenced_by[neighbour_id].discard(user_id)
+        self.rows[user_id] = row
+        for neighbour_id, _ in row:
+            self.referenced_by[neighbour_id].add(user_id)
+        if len(row) < self.k or (row and row[-1][1] == 0):
+            self.padded.add(user_id)
+        else:
+            self.padded.discard(user_id)
+
+    def _similarities(self, user_id):
+        """Jaccard similarity to every user sharing at least one feature"""
+        features = self.features[user_id]
+        overlap = defaultdict(int)
+        for feature in features:
+            for other_id in self.users_by_feature[feature]:
+                if other_id != user_id:
+                    overlap[other_id] += 1
+        return {
+            other_id: shared / (len(features) + len(self.features[other_id]) - shared)
+            for other_id, shared in overlap.items()
+        }
+
+    def _compute_row(self, user_id):
+        row = sorted(self._similarities(user_id).items(), key=self._key)[:self.k]
+        if len(row) < self.k:
+            chosen = {other_id for other_id, _ in row}
+            for other_id in self.order:
+                if len(row) >= self.k:
+                    break
+                if other_id != user_id and other_id not in chosen:
+                    row.append((other_id, 0))
+        return row
+
+    def build(self, users):
+        """Compute every row from scratch"""
+        with self._lock:
+            self._reset()
+            for user in users:
+                self._add_user(user["id"], frozenset(user_features(user, self.include_interactions)))
+            if sparse_engine_available():
+                engine = SparseSimilarityEngine(users, include_interactions=self.include_interactions)
+                rows = engine.top_k_batch(self.order, self.k)
+                for user_id in self.order:
+                    self._set_row(user_id, rows[user_id])
+            else:
+                for user_id in self.order:
+                    self._set_row(user_id, self._compute_row(user_id))
+        return self
+
+    def update_user(self, user):
+        """Apply a change to one user's features; returns the ids of the rows that changed"""
+        user_id = user["id"]
+        features = frozenset(user_features(user, self.include_interactions))
+        with self._lock:
+            if self.features.get(user_id) == features and user_id in self.rows:
+                return set()
+            self._add_user(user_id, features)
+            similarities = self._similarities(user_id)
+            changed = {user_id}
+            self._set_row(user_id, self._compute_row(user_id))
+
+            # Only rows that contain this user, could now contain it, or end in
+            # zero-similarity padding can change
+            candidates = set(similarities) | self.referenced_by[user_id] | self.padded
+            candidates.discard(user_id)
+            for other_id in candidates:
+                row = self.rows[other_id]
+                entry = (user_id, similarities.get(other_id, 0))
+                previous = next((score for neighbour_id, score in row if neighbour_id == user_id), None)
+                if previous is not None:
+                    if entry[1] == previous:
+                        continue
+                    if entry[1] > previous:
+                        # Still in the top k, just moves up
+                        rest = [e for e in row if e[0] != user_id]
+                        self._set_row(other_id, sorted(rest + [entry], key=self._key))
+                    else:
+                        # Dropped score: the next-best user is unknown, recompute
+                        self._set_row(other_id, self._compute_row(other_id))
+                elif len(row) < self.k or self._key(entry) < self._key(row[-1]):
+                    self._set_row(other_id, sorted(row + [entry], key=self._key)[:self.k])
+                else:
+                    continue
+                changed.add(other_id)
+            return changed
+
+    def sync(self, users, rebuild_ratio=0.1):
+        """Bring the table in line with the dataset, updating only users whose features changed"""
+        with self._lock:
+            if [user["id"] for user in users[:len(self.order)]] != self.order:
+                # Removed or reordered users change tie-breaking; start over
+                return self.build(users)
+            stale = [
+                user for user in users
+                if self.features.get(user["id"]) != frozenset(user_features(user, self.include_interactions))
+                or user["id"] not in self.rows
+            ]
+            if len(stale) > rebuild_ratio * max(len(users), 1):
+                return self.build(users)
+            for user in stale:
+                self.update_user(user)
+        return self
+
+    def save(self, path=DEFAULT_TABLE_PATH):
+        """Write the table as JSON, atomically replacing any previous file"""
+        with self._lock:
+            payload = {
+                "k": self.k,
+                "include_interactions": self.include_interactions,
+                "users": [
+                    [user_id, sorted(self.features[user_id]), self.rows[user_id]]
+                    for user_id in self.order
+                ],
+            }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_TABLE_PATH):
+        """Read a table written by save()"""
+        with open(path, "r") as f:
+            payload = json.load(f)
+        table = cls(payload["k"], payload["include_interactions"])
+        for user_id, features, _ in payload["users"]:
+            table._add_user(user_id, frozenset(features))
+        for user_id, _, row in payload["users"]:
+            table._set_row(user_id, [(neighbour_id, score) for neighbour_id, score in row])
+        return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the precomputed neighbour table")
+    parser.add_argument("command", choices=["build", "refresh"])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--path", default=os.environ.get("NEIGHBOR_TABLE_PATH", DEFAULT_TABLE_PATH))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    # Read the dataset directly: importing the suggestion engine would load and sync the table first
+    users = read_dataset().get("users", [])
+    if args.command == "refresh" and os.path.exists(args.path):
+        table = NeighborTable.load(args.path).sync(users)
+    else:
+        table = NeighborTable(args.k).build(users)
+    table.save(args.path)
+    print(f"{args.command}: {len(table)} users in {time.perf_counter() - start:.2f}s -> {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Offline bulk precompute of adaptive suggestions for every user
+
+Run nightly (e.g. from cron) to warm email digests and home pages; the API
+serves users found in the store without computing anything when
+SUGGESTION_STORE_PATH points at it:
+
+    python precompute_suggestions.py --workers 4
+    SUGGESTION_STORE_PATH=../dataset/suggestions.sqlite python api_mock.py
+
+Results match local_adaptive_suggestions (Gemini is not called), with
+trending items as counted from the dataset's stored interactions.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dataset", "suggestions.sqlite")
+
+# A read-only store checks this often whether a new run has replaced its file
+REOPEN_CHECK_SECONDS = 1.0
+
+
+def _file_stamp(path):
+    """(inode, mtime) of path, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+class SuggestionStore:
+    """SQLite table of precomputed suggestions, one row of artwork and tutorial ids per user
+
+    precompute() replaces the file with a new one, so a readonly store (the
+    API's) reopens it when its inode or mtime changes; until a file exists it
+    has no rows.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        if readonly:
+            self._db = None
+            self._stamp = None
+            self._checked = time.monotonic()
+            self._reopen()
+        else:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS suggestions ("
+                "user_id INTEGER PRIMARY KEY, artworks TEXT NOT NULL, tutorials TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.commit()
+
+    def _reopen(self):
+        stamp = _file_stamp(self.path)
+        if stamp == self._stamp:
+            return
+        if self._db is not None:
+            self._db.close()
+        self._db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False) if stamp else None
+        self._stamp = stamp
+
+    def _current(self):
+        """The open database, reopened first if a new run replaced the file (lock held)"""
+        if self.readonly and time.monotonic() - self._checked >= REOPEN_CHECK_SECONDS:
+            self._checked = time.monotonic()
+            self._reopen()
+        return self._db
+
+    def __len__(self):
+        with self._lock:
+            db = self._current()
+            return db.execute("SELECT COUNT(*) FROM suggestions").fetchone()[0] if db is not None else 0
+
+    def get(self, user_id, catalog):
+        """Suggestions for user_id with items looked up in catalog (a CatalogIndex), or None"""
+        with self._lock:
+            db = self._current()
+            if db is None:
+                return None
+            row = db.execute(
+                "SELECT artworks, tutorials FROM suggestions WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        # Items removed from the dataset since the run are dropped
+        artworks = [catalog.artworks.get(i) for i in json.loads(row[0]) if i in catalog.artworks.positions]
+        tutorials = [catalog.tutorials.get(i) for i in json.loads(row[1]) if i in catalog.tutorials.positions]
+        return {"artworks": artworks, "tutorials": tutorials}
+
+    def put_many(self, rows):
+        """Store (user_id, artwork_ids, tutorial_ids) rows in one transaction"""
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO suggestions (user_id, artworks, tutorials) VALUES (?, ?, ?)",
+                [(user_id, json.dumps(artworks), json.dumps(tutorials)) for user_id, artworks, tutorials in rows]
+            )
+            self._db.commit()
+
+    def set_meta(self, **values):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in values.items()]
+            )
+            self._db.commit()
+
+    def meta(self):
+        with self._lock:
+            db = self._current()
+            return {key: json.loads(value) for key, value in db.execute("SELECT key, value FROM meta")} if db else {}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def _compute_chunk(user_ids):
+    """Suggestion ids for a chunk of users; runs in a pool worker"""
+    from enhanced_suggestion_engine import local_adaptive_suggestions_batch
+
+    results = local_adaptive_suggestions_batch(user_ids)
+    return [
+        (user_id,
+         [artwork["id"] for artwork in results[user_id]["artworks"]],
+         [tutorial["id"] for tutorial in results[user_id]["tutorials"]])
+        for user_id in user_ids
+    ]
+
+
+def _chunks(users, size):
+    for start in range(0, len(users), size):
+        yield [user["id"] for user in users[start:start + size]]
+
+
+def precompute(path=DEFAULT_STORE_PATH, workers=None, chunk_size=500):
+    """Compute suggestions for every user into a fresh store at path; returns the user count"""
+    from enhanced_suggestion_engine import candidate_cache, current_catalog
+
+    # Every user is computed once; caching their candidates would only churn the LRU
+    candidate_cache.max_bytes = 0
+
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    store = SuggestionStore(tmp_path)
+    workers = workers or os.cpu_count() or 1
+    done = 0
+    chunks = _chunks(current_catalog().index.users, chunk_size)
+    try:
+        if workers == 1:
+            for user_ids in chunks:
+                rows = _compute_chunk(user_ids)
+                store.put_many(rows)
+                done += len(rows)
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                for rows in pool.imap_unordered(_compute_chunk, chunks):
+                    store.put_many(rows)
+                    done += len(rows)
+        store.set_meta(generated_at=datetime.now().isoformat(), users=done)
+    finally:
+        store.close()
+    os.replace(tmp_path, path)
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute adaptive suggestions for every user")
+    parser.add_argument("--path", default=os.environ.get("SUGGESTION_STORE_PATH", DEFAULT_STORE_PATH))
+    parser.add_argument("--workers", type=int, default=None, help="pool size (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    # Load the dataset and indexes before timing
+    import enhanced_suggestion_engine
+
+    start = time.perf_counter()
+    count = precompute(args.path, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"precomputed {count} users in {elapsed:.2f}s ({count / elapsed:.0f} users/sec) -> {args.path}")
+
+
+if __name__ == "__main__":
+    main()
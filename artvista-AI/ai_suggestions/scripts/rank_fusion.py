@@ -0,0 +1,60 @@
+"""Weighted rank fusion of candidate lists, reading only as deep as the top results need
+
+Each list contributes weight / (rank + 1) to every item it holds (rank counts
+from 0 among the items that are not excluded); items are identified by their
+"id". Lists are read one rank at a time, all in step, and reading stops as
+soon as no item further down can change the top limit or their order, so long
+lazy lists (ItemRows) only build the records that can matter.
+"""
+
+
+def _beats(a, b):
+    """True if candidate a's worst case outranks candidate b's best case (ties go to the earlier one)"""
+    return a["score"] > b["upper"] or (a["score"] == b["upper"] and a["order"] < b["order"])
+
+
+def fuse(rankings, limit, exclude=()):
+    """The best limit items of the (weight, items) rankings, best first"""
+    if limit <= 0:
+        return []
+    candidates = {}        # id -> {"item", "score", "upper", "order", "sources"}
+    sources = [{"weight": weight, "items": items, "position": 0, "rank": 0} for weight, items in rankings]
+    while True:
+        # Read the next acceptable item from every source that has one left
+        for source_id, source in enumerate(sources):
+            items = source["items"]
+            while source["position"] < len(items):
+                item = items[source["position"]]
+                source["position"] += 1
+                if item["id"] in exclude:
+                    continue
+                candidate = candidates.get(item["id"])
+                if candidate is None:
+                    candidate = candidates[item["id"]] = {
+                        "item": item, "score": 0, "order": len(candidates), "sources": set(),
+                    }
+                if source_id in candidate["sources"]:
+                    continue
+                candidate["sources"].add(source_id)
+                candidate["score"] += source["weight"] / (source["rank"] + 1)
+                source["rank"] += 1
+                break
+
+        # What an item could still gain from each source it has not appeared in
+        open_sources = [(source_id, source["weight"] / (source["rank"] + 1))
+                        for source_id, source in enumerate(sources) if source["position"] < len(source["items"])]
+        for candidate in candidates.values():
+            candidate["upper"] = candidate["score"] + sum(
+                bound for source_id, bound in open_sources if source_id not in candidate["sources"]
+            )
+        ranked = sorted(candidates.values(), key=lambda c: (-c["score"], c["order"]))
+        if not open_sources:
+            return [candidate["item"] for candidate in ranked[:limit]]
+
+        # Done when each of the top limit beats everything after it, including items not read yet
+        unseen = {"upper": sum(bound for _, bound in open_sources), "order": len(candidates)}
+        top = ranked[:limit]
+        if len(top) == limit and all(
+            _beats(candidate, other) for i, candidate in enumerate(top) for other in ranked[i + 1:] + [unseen]
+        ):
+            return [candidate["item"] for candidate in top]
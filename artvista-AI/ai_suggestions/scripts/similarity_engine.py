@@ -0,0 +1,166 @@
+# NumPy/SciPy are optional; without them the engine reports itself unavailable
+try:
+    import numpy as np
+    from scipy import sparse
+except ModuleNotFoundError:
+    np = None
+    sparse = None
+
+
+def is_available():
+    """True when NumPy and SciPy are installed"""
+    return np is not None and sparse is not None
+
+
+def user_features(user, include_interactions=False):
+    """Feature set for one user: preferences, optionally plus clicked/completed items"""
+    features = set(user.get("preferences", []))
+    if include_interactions:
+        interactions = user.get("interactions", {})
+        features.update("clicked:" + str(i) for i in interactions.get("clicked_artworks", []))
+        features.update("completed:" + str(i) for i in interactions.get("completed_tutorials", []))
+    return features
+
+
+# top_k_batch multiplies as many profiles at once as keep the product under this many nonzeros
+MAX_PRODUCT_NNZ = 1 << 20
+
+
+class SparseSimilarityEngine:
+    """Binary feature matrix with vectorized Jaccard/cosine neighbour search
+
+    Users with the same feature set (a profile) score the same against
+    everyone, so the matrix has one row per distinct profile and a search
+    scores profiles, then picks users from the best ones in dataset order.
+    """
+
+    def __init__(self, users, metric="jaccard", include_interactions=False):
+        if not is_available():
+            raise RuntimeError("SparseSimilarityEngine requires numpy and scipy")
+        if metric not in ("jaccard", "cosine"):
+            raise ValueError(f"Unknown similarity metric: {metric}")
+        self.metric = metric
+        self.include_interactions = include_interactions
+        self.user_ids = [user["id"] for user in users]
+        self.row_of = {user_id: row for row, user_id in enumerate(self.user_ids)}
+
+        feature_ids = {}
+        profile_ids = {}    # frozenset of feature ids -> profile
+        profile_of = np.empty(len(users), dtype=np.int64)
+        for row, user in enumerate(users):
+            features = frozenset(feature_ids.setdefault(feature, len(feature_ids))
+                                 for feature in user_features(user, include_interactions))
+            profile_of[row] = profile_ids.setdefault(features, len(profile_ids))
+        self.feature_ids = feature_ids
+        self.profile_of = profile_of
+
+        rows = []
+        cols = []
+        for profile, features in enumerate(profile_ids):
+            rows.extend([profile] * len(features))
+            cols.extend(features)
+        shape = (len(profile_ids), max(len(feature_ids), 1))
+        values = np.ones(len(rows), dtype=np.float64)
+        self.profiles = sparse.csr_matrix((values, (rows, cols)), shape=shape)
+        self.transposed = self.profiles.T.tocsr()
+        self.profile_sizes = np.diff(self.profiles.indptr).astype(np.float64)
+        # Upper bound on a profile's nonzeros in a product with every profile
+        self.profile_work = self.profiles @ np.diff(self.transposed.indptr).astype(np.float64)
+
+        # Rows of each profile's users in dataset order: members[starts[p]:starts[p] + counts[p]]
+        self.members = np.argsort(profile_of, kind="stable")
+        self.counts = np.bincount(profile_of, minlength=len(profile_ids))
+        self.starts = np.cumsum(self.counts) - self.counts
+        self.first_row = self.members[self.starts]
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def _scores(self, profile, intersections, columns):
+        """Similarity of `profile` to each profile in `columns` given intersection sizes"""
+        size = self.profile_sizes[profile]
+        if self.metric == "jaccard":
+            return intersections / (size + self.profile_sizes[columns] - intersections)
+        return intersections / np.sqrt(size * self.profile_sizes[columns])
+
+    def _best_users(self, columns, scores, m):
+        """The m best (rows, scores) among the users of the scored profiles, ties by dataset order"""
+        if len(columns) > m:
+            # Partial selection: every profile above the m-th best score, then the
+            # tied ones whose first user comes earliest
+            threshold = np.partition(scores, len(scores) - m)[len(scores) - m]
+            above = np.flatnonzero(scores > threshold)
+            tied = np.flatnonzero(scores == threshold)
+            need = m - len(above)
+            if len(tied) > need:
+                tied = tied[np.argpartition(self.first_row[columns[tied]], need - 1)[:need]]
+            picked = np.concatenate([above, tied])
+        else:
+            picked = np.arange(len(columns))
+
+        # At most m users from each picked profile can be among the m best
+        taken = np.minimum(self.counts[columns[picked]], m)
+        rows = np.concatenate([self.members[start:start + count]
+                               for start, count in zip(self.starts[columns[picked]], taken)] or [np.empty(0, np.int64)])
+        row_scores = np.repeat(scores[picked], taken)
+        order = np.lexsort((rows, -row_scores))[:m]
+        return rows[order], row_scores[order]
+
+    def _neighbours(self, row, best, k):
+        """Top-k (user_id, similarity) for the user at row from its profile's best users"""
+        rows, scores = best
+        keep = rows != row
+        rows = rows[keep][:k]
+        neighbours = [(self.user_ids[r], float(s)) for r, s in zip(rows, scores[keep][:k])]
+
+        # Users sharing nothing score 0; fill remaining slots in dataset order
+        if len(neighbours) < k:
+            chosen = set(rows.tolist())
+            chosen.add(row)
+            for other in range(len(self.user_ids)):
+                if len(neighbours) >= k:
+                    break
+                if other not in chosen:
+                    neighbours.append((self.user_ids[other], 0.0))
+        return neighbours
+
+    def _chunks(self, profiles, max_nnz):
+        """Runs of profiles whose product with every profile stays under max_nnz nonzeros"""
+        chunk = []
+        work = 0
+        for profile in profiles:
+            cost = self.profile_work[profile]
+            if chunk and work + cost > max_nnz:
+                yield chunk
+                chunk = []
+                work = 0
+            chunk.append(profile)
+            work += cost
+        if chunk:
+            yield chunk
+
+    def top_k(self, user_id, k=3):
+        """Return the k most similar users to `user_id` as (user_id, similarity) pairs"""
+        return self.top_k_batch([user_id], k)[user_id]
+
+    def top_k_batch(self, user_ids, k=3, max_product_nnz=MAX_PRODUCT_NNZ):
+        """Top-k neighbours for many users; users with the same profile share one search"""
+        if k <= 0:
+            return {user_id: [] for user_id in user_ids}
+        rows = {user_id: self.row_of[user_id] for user_id in user_ids if user_id in self.row_of}
+        wanted = list(dict.fromkeys(int(self.profile_of[row]) for row in rows.values()))
+        best = {}
+        for chunk in self._chunks(wanted, max_product_nnz):
+            # (chunk x features) @ (features x profiles) -> intersection counts
+            product = (self.profiles[chunk] @ self.transposed).tocsr()
+            for i, profile in enumerate(chunk):
+                lo, hi = product.indptr[i], product.indptr[i + 1]
+                columns = product.indices[lo:hi]
+                scores = self._scores(profile, product.data[lo:hi], columns)
+                # One more than k, in case the user asking is among them
+                best[profile] = self._best_users(columns, scores, k + 1)
+        return {
+            user_id: self._neighbours(rows[user_id], best[int(self.profile_of[rows[user_id]])], k)
+            if user_id in rows else []
+            for user_id in user_ids
+        }
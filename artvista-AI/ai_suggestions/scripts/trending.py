@@ -0,0 +1,199 @@
+"""Trending artworks and tutorials from exponentially time-decayed interaction counts
+
+Every click or tutorial completion adds weight 1 that halves every half_life
+seconds. Counts use forward decay: an event at time t adds exp(rate * (t - origin))
+instead of decaying every counter as time passes, so ingest is O(1) and the
+relative order of items never changes with time alone. Counts live in a
+count-min sketch (fixed memory however many items there are) or, with
+sketch_width=0, an exact dict; the best capacity items are tracked alongside,
+so top() reads only those.
+
+Interactions stored in the dataset carry no time of their own; TrendingTracker
+counts them separately as of the dataset's build time (seeded()), so they are
+not made recent again by every restart and can be replaced on a reload.
+"""
+import heapq
+import math
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter
+
+# Counts are rescaled once weights reach exp(RESCALE_EXPONENT), long before floats overflow
+RESCALE_EXPONENT = 40
+
+
+class CountMinSketch:
+    """Approximate per-key totals in depth x width floats; estimates never undercount"""
+
+    def __init__(self, width=65536, depth=4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("d", bytes(8 * width)) for _ in range(depth)]
+
+    def _cells(self, key):
+        # Double hashing (crc32 + adler32) stays stable across processes, unlike hash()
+        data = str(key).encode("utf-8")
+        h1 = zlib.crc32(data)
+        h2 = zlib.adler32(data) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key, amount):
+        """Add amount to key and return its new estimate (conservative update)"""
+        cells = self._cells(key)
+        rows = self.rows
+        estimate = min(rows[i][cell] for i, cell in enumerate(cells)) + amount
+        for i, cell in enumerate(cells):
+            if rows[i][cell] < estimate:
+                rows[i][cell] = estimate
+        return estimate
+
+    def estimate(self, key):
+        return min(self.rows[i][cell] for i, cell in enumerate(self._cells(key)))
+
+    def scale(self, factor):
+        for row in self.rows:
+            for cell in range(self.width):
+                row[cell] *= factor
+
+
+class ExactCounts:
+    """CountMinSketch interface over an exact dict, for small catalogs"""
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, key, amount):
+        value = self.counts[key] = self.counts.get(key, 0.0) + amount
+        return value
+
+    def estimate(self, key):
+        return self.counts.get(key, 0.0)
+
+    def scale(self, factor):
+        for key in self.counts:
+            self.counts[key] *= factor
+
+
+class DecayedTopK:
+    """Time-decayed counts per key with the best capacity keys kept ready to read"""
+
+    def __init__(self, half_life=86400, capacity=100, sketch_width=65536, sketch_depth=4):
+        self.rate = math.log(2) / half_life
+        self.capacity = capacity
+        self.counts = CountMinSketch(sketch_width, sketch_depth) if sketch_width else ExactCounts()
+        self.origin = None
+        self.top_counts = {}    # key -> forward-decayed count, for the current top capacity keys
+        self._heap = []         # (count, key) min-heap over top_counts; stale entries skipped lazily
+        self._lock = threading.Lock()
+
+    def add(self, key, timestamp=None, weight=1.0):
+        """Count one event (or weight events) for key at timestamp (default now)"""
+        # A timestamp from the future would move origin ahead of every later top() call
+        timestamp = time.time() if timestamp is None else min(timestamp, time.time())
+        with self._lock:
+            if self.origin is None:
+                self.origin = timestamp
+            exponent = self.rate * (timestamp - self.origin)
+            if exponent > RESCALE_EXPONENT:
+                self._rescale(timestamp)
+                exponent = 0
+            self._offer(key, self.counts.add(key, weight * math.exp(exponent)))
+
+    def _offer(self, key, count):
+        top_counts = self.top_counts
+        if key not in top_counts and len(top_counts) >= self.capacity:
+            heap = self._heap
+            while top_counts.get(heap[0][1]) != heap[0][0]:
+                heapq.heappop(heap)
+            if count <= heap[0][0]:
+                return
+            del top_counts[heapq.heappop(heap)[1]]
+        top_counts[key] = count
+        heapq.heappush(self._heap, (count, key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(value, k) for k, value in top_counts.items()]
+            heapq.heapify(self._heap)
+
+    def _rescale(self, timestamp):
+        factor = math.exp(-self.rate * (timestamp - self.origin))
+        self.counts.scale(factor)
+        for key in self.top_counts:
+            self.top_counts[key] *= factor
+        self._heap = [(value, k) for k, value in self.top_counts.items()]
+        heapq.heapify(self._heap)
+        self.origin = timestamp
+
+    def estimate(self, key, now=None):
+        """Decayed count of key at now, whether or not it is in the top"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.origin is None:
+                return 0.0
+            count = self.top_counts.get(key)
+            if count is None:
+                count = self.counts.estimate(key)
+            return count * math.exp(min(-self.rate * (now - self.origin), RESCALE_EXPONENT))
+
+    def top(self, n=None, now=None):
+        """[(key, decayed count)] best first (ties by key), at most n of them"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.origin is None:
+                return []
+            # Capped like add(), so a now before origin cannot overflow
+            decay = math.exp(min(-self.rate * (now - self.origin), RESCALE_EXPONENT))
+            ranked = sorted(self.top_counts.items(), key=lambda item: (-item[1], str(item[0])))
+        return [(key, count * decay) for key, count in ranked[:n]]
+
+
+class TrendingTracker:
+    """Trending artworks (by clicks) and tutorials (by completions)"""
+
+    # Event type -> catalog section it counts towards
+    EVENT_SECTIONS = {"click": "artworks", "complete": "tutorials"}
+
+    def __init__(self, half_life=86400, capacity=100, sketch_width=65536, sketch_depth=4):
+        self._params = (half_life, capacity, sketch_width, sketch_depth)
+        self.sections = self._new_sections()
+
+    def _new_sections(self):
+        return {section: DecayedTopK(*self._params) for section in self.EVENT_SECTIONS.values()}
+
+    def record(self, event_type, item_id, timestamp=None):
+        """Count a "click" on an artwork or a "complete" of a tutorial"""
+        self.sections[self.EVENT_SECTIONS[event_type]].add(item_id, timestamp)
+
+    def seeded(self, users, timestamp):
+        """Counts of the interactions stored on dataset users as if they happened at timestamp
+
+        Pass the result to top() as seed; recorded events are kept apart from it.
+        """
+        sections = self._new_sections()
+        for section, key in (("artworks", "clicked_artworks"), ("tutorials", "completed_tutorials")):
+            totals = Counter()
+            for user in users:
+                totals.update(set(user.get("interactions", {}).get(key, ())))
+            # Most interacted first, so the top keys are settled without evictions
+            for item_id, count in sorted(totals.items(), key=lambda item: (-item[1], str(item[0]))):
+                sections[section].add(item_id, timestamp, count)
+        return sections
+
+    def top(self, section, n=None, now=None, seed=None):
+        """[(item_id, decayed count)] for "artworks" or "tutorials", best first
+
+        With seed (from seeded()), recorded and seeded counts are summed over
+        the items at the top of either.
+        """
+        now = time.time() if now is None else now
+        recorded = self.sections[section]
+        if seed is None:
+            return recorded.top(n, now)
+        seeded = seed[section]
+        totals = dict(recorded.top(None, now))
+        for item_id, count in seeded.top(None, now):
+            totals[item_id] = totals.get(item_id, recorded.estimate(item_id, now)) + count
+        for item_id in set(totals) - set(seeded.top_counts):
+            totals[item_id] += seeded.estimate(item_id, now)
+        return sorted(totals.items(), key=lambda item: (-item[1], str(item[0])))[:n]
@@ -0,0 +1,152 @@
+"""Load test: Flask (api_mock.py) vs ASGI (api_asgi.py) with a slow stub Gemini model
+
+Each server runs in its own process with the stub model patched in; the client
+fires concurrent POST /chat requests (uncached, so every request waits on the
+stub upstream) and reports throughput, latency and the server's thread count.
+
+Usage:
+    python bench_async_serving.py --requests 2000 --concurrency 500 --latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BENCH_DIR, "..", "ai_suggestions", "scripts")
+
+
+def serve(mode, port, latency):
+    """Run one server with the stub model (invoked in a child process)"""
+    sys.path.append(SCRIPTS_DIR)
+    sys.path.append(BENCH_DIR)
+    import enhanced_suggestion_engine
+    from stub_gemini import StubModel
+    enhanced_suggestion_engine.model = StubModel(latency)
+
+    if mode == "flask":
+        from api_mock import app
+        app.run(host="127.0.0.1", port=port, threaded=True)
+    else:
+        from hypercorn.asyncio import serve as hypercorn_serve
+        from hypercorn.config import Config
+        from api_asgi import app
+        config = Config()
+        config.bind = [f"127.0.0.1:{port}"]
+        config.backlog = 4096
+        config.accesslog = None
+        asyncio.run(hypercorn_serve(app, config))
+
+
+async def request(port, body):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode()
+    writer.write(
+        b"POST /chat HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        b"Connection: close\r\nContent-Length: " + str(len(payload)).encode() + b"\r\n\r\n" + payload
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response.split(b" ", 2)[1] == b"200"
+
+
+async def load(port, total, concurrency, server_pid):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+    peak_threads = 0
+
+    async def one(i):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                ok = await request(port, {"message": f"Tell me about brushwork #{i}"})
+            except OSError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                failures += 1
+
+    async def sample_threads():
+        nonlocal peak_threads
+        while True:
+            peak_threads = max(peak_threads, thread_count(server_pid))
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.ensure_future(sample_threads())
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    latencies.sort()
+    return {
+        "requests": total,
+        "failures": failures,
+        "seconds": round(elapsed, 2),
+        "requests_per_sec": round(total / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 1),
+        "peak_server_threads": peak_threads
+    }
+
+
+def thread_count(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            asyncio.run(asyncio.open_connection("127.0.0.1", port))
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub Gemini latency in seconds")
+    parser.add_argument("--modes", nargs="+", default=["flask", "asgi"])
+    parser.add_argument("--serve", choices=["flask", "asgi"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=5901)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.latency)
+        return
+
+    report = {}
+    for offset, mode in enumerate(args.modes):
+        port = args.port + offset
+        server = subprocess.Popen(
+            [sys.executable, __file__, "--serve", mode, "--port", str(port), "--latency", str(args.latency)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_for_port(port)
+            report[mode] = asyncio.run(load(port, args.requests, args.concurrency, server.pid))
+        finally:
+            server.terminate()
+            server.wait()
+        print(mode, json.dumps(report[mode]))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
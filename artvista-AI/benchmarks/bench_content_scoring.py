@@ -0,0 +1,95 @@
+"""Latency of content-based artwork scoring: python loop + full sort vs vectorized ItemStore.rank
+
+Modes:
+    loop        the original scan over artwork dicts, then a full sort
+    rank        ItemStore.rank over the code arrays, every match sorted
+    rank top-N  ItemStore.rank with limit (argpartition)
+    heap top-N  ItemStore.rank with limit, without NumPy (posting lists + heap)
+
+Usage:
+    python bench_content_scoring.py --sizes 100000 1000000 --limit 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+
+import item_store
+from item_store import ItemStore
+from synthetic import MEDIUMS, STYLES
+
+WEIGHTS = {"style": 2, "medium": 1}
+
+
+def generate_artworks(count, seed=42):
+    rng = random.Random(seed)
+    return [{"id": f"A{i}", "title": f"Artwork {i}", "style": rng.choice(STYLES), "medium": rng.choice(MEDIUMS)}
+            for i in range(count)]
+
+
+def loop_scoring(artworks, prefs):
+    """content_based_filtering's artwork scoring before the item store"""
+    scored = []
+    for artwork in artworks:
+        score = 0
+        if artwork["style"] in prefs:
+            score += 2
+        if artwork["medium"] in prefs:
+            score += 1
+        if score > 0:
+            scored.append((artwork, score))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return [artwork for artwork, _ in scored]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def time_queries(fn, queries):
+    samples = []
+    for prefs in queries:
+        start = time.perf_counter()
+        fn(prefs)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    vocabulary = STYLES + MEDIUMS
+    print(f"{'items':>9} {'mode':>11} {'p50 ms':>8} {'p99 ms':>8}")
+    for size in args.sizes:
+        artworks = generate_artworks(size)
+        store = ItemStore(artworks, ("style", "medium"))
+        rng = random.Random(size)
+        queries = [set(rng.sample(vocabulary, rng.randint(1, 4))) for _ in range(args.queries)]
+
+        numpy = item_store.np
+        modes = [
+            ("loop", lambda prefs: loop_scoring(artworks, prefs)),
+            ("rank", lambda prefs: store.rank(prefs, WEIGHTS)),
+            ("rank top-N", lambda prefs: store.rank(prefs, WEIGHTS, args.limit)),
+            ("heap top-N", None),
+        ]
+        for name, fn in modes:
+            if name == "heap top-N":
+                item_store.np = None
+                fn = lambda prefs: store.rank(prefs, WEIGHTS, args.limit)
+                fn(queries[0])   # build the posting lists outside the timing
+            samples = time_queries(fn, queries)
+            item_store.np = numpy
+            print(f"{size:>9} {name:>11} {percentile(samples, 50):>8.1f} {percentile(samples, 99):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Startup time and peak memory of dataset loading: json.load, ijson streaming, binary snapshot
+
+Each mode runs in a fresh interpreter so peak RSS is measured in isolation.
+"json x4" repeats json.load four times, as the services did before the
+shared dataset module; "json+columns" also converts artworks and tutorials
+to ItemStores, as the services do on load.
+
+Usage:
+    python bench_dataset_load.py --users 200000 500000
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+
+from dataset import columnar, snapshot_path, write_snapshot
+from synthetic import MEDIUMS, STYLES, generate_users
+
+LOADERS = {
+    "json x4": "import json\ncopies = [json.load(open(path, 'rb')) for _ in range(4)]",
+    "json": "from dataset import read_json\nread_json(path, streaming=False)",
+    "json+columns": "from dataset import columnar, read_json\ndata = columnar(read_json(path, streaming=False))",
+    "ijson": "from dataset import read_json\nread_json(path, streaming=True)",
+    "snapshot": "from dataset import read_snapshot, snapshot_path\nread_snapshot(snapshot_path(path), path)",
+}
+
+# VmHWM is reset by exec, unlike ru_maxrss, which can carry the parent's peak
+CHILD = """
+import sys, time
+sys.path.append({shared!r})
+path = {path!r}
+start = time.perf_counter()
+{loader}
+elapsed = time.perf_counter() - start
+peak_kb = next(line.split()[1] for line in open("/proc/self/status") if line.startswith("VmHWM"))
+print(elapsed, peak_kb)
+"""
+
+
+def generate_dataset(users, seed=42):
+    """Synthetic art_suggestions.json-shaped dataset with one artwork per 10 users"""
+    rng = random.Random(seed)
+    artworks = [
+        {"id": f"A{i}", "title": f"Artwork {i}", "style": rng.choice(STYLES), "medium": rng.choice(MEDIUMS),
+         "artist": f"Artist {i % 500}", "description": "Synthetic artwork for benchmarks."}
+        for i in range(1, users // 10 + 2)
+    ]
+    tutorials = [{"id": f"T{i}", "title": f"Tutorial {i}", "style": style} for i, style in enumerate(STYLES, 1)]
+    dataset_users = generate_users(users, seed)
+    for user in dataset_users:
+        user["interactions"]["clicked_artworks"] = [rng.choice(artworks)["id"] for _ in range(rng.randint(0, 5))]
+    return {"users": dataset_users, "artworks": artworks, "tutorials": tutorials}
+
+
+def run(mode, path):
+    shared = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared")
+    code = CHILD.format(shared=shared, path=path, loader=LOADERS[mode])
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    elapsed, peak_kb = output.split()
+    return float(elapsed), int(peak_kb) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[200000])
+    args = parser.parse_args()
+
+    print(f"{'users':>9} {'file MB':>8} {'mode':>12} {'load s':>8} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for users in args.users:
+            path = os.path.join(tmp, f"dataset_{users}.json")
+            data = generate_dataset(users)
+            with open(path, "w") as f:
+                json.dump(data, f)
+            write_snapshot(columnar(data), snapshot_path(path), source=path)
+            del data
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            for mode in LOADERS:
+                elapsed, peak = run(mode, path)
+                print(f"{users:>9} {size_mb:>8.0f} {mode:>12} {elapsed:>8.2f} {peak:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Micro-benchmarks of the recommendation, art-creation and game engines on a synthetic dataset
+
+Cases:
+    calculate_user_similarity          Jaccard similarity of two user records
+    collaborative_filtering            neighbours + their items, records built
+    content_based_filtering            ranked matches as the blend asks for them, records built
+    adaptive_suggestions (cold)        local path with the candidate cache emptied before each call
+    adaptive_suggestions (cached)      local path, every user already in the candidate cache
+    generate_color_palettes            palette selection for one user's preferences
+    EnhancedDragDropGame.add_element   one element added to a scene
+
+Gemini is disabled so every case measures local work. Results are saved as a
+JSON report (see report.py) for comparing runs.
+
+Usage:
+    python bench_engines.py --users 10000 100000 --clicks 5
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BENCH_DIR, "..", "ai_suggestions", "scripts"))
+sys.path.append(os.path.join(BENCH_DIR, "..", "game_logic", "scripts"))
+
+from report import REPORT_DIR, latency_stats, write_report
+from synthetic import write_dataset
+
+
+def time_calls(fn, args_list):
+    samples = []
+    start = time.perf_counter()
+    for args in args_list:
+        call_start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - call_start)
+    return latency_stats(samples, time.perf_counter() - start)
+
+
+def run(calls, seed):
+    """Time every case against the dataset at DATASET_PATH"""
+    import art_creation_suggestions
+    import enhanced_drag_drop_game
+    import enhanced_suggestion_engine as engine
+
+    engine.model = None
+    art_creation_suggestions.model = None
+    enhanced_drag_drop_game.model = None
+
+    rng = random.Random(seed)
+    catalog = engine.current_catalog()
+    users = catalog.index.users
+    user_ids = [rng.choice(users)["id"] for _ in range(calls)]
+    pairs = [(rng.choice(users), rng.choice(users)) for _ in range(calls)]
+
+    def collaborative(user_id):
+        artworks, tutorials = engine.collaborative_filtering(user_id)
+        return list(artworks), list(tutorials)
+
+    def content(user_id):
+        artworks, tutorials = engine.content_based_filtering(user_id, engine.content_limit(user_id))
+        return list(artworks), list(tutorials)
+
+    def cold_suggestions(user_id):
+        engine.candidate_cache.clear()
+        return engine.adaptive_suggestions(user_id)
+
+    elements = enhanced_drag_drop_game.ALL_ELEMENTS
+    game = enhanced_drag_drop_game.EnhancedDragDropGame("Bench", 2)
+
+    def add_element(element):
+        # Fresh scenes keep the element list at a realistic length
+        if len(game.elements) >= 20:
+            game.elements.clear()
+        game.add_element(element)
+
+    results = {}
+    with engine.pinned_catalog():
+        results["calculate_user_similarity"] = time_calls(engine.calculate_user_similarity, pairs)
+        results["collaborative_filtering"] = time_calls(collaborative, [(u,) for u in user_ids])
+        results["content_based_filtering"] = time_calls(content, [(u,) for u in user_ids])
+    results["adaptive_suggestions (cold)"] = time_calls(cold_suggestions, [(u,) for u in user_ids])
+    for user_id in set(user_ids):
+        engine.adaptive_suggestions(user_id)
+    results["adaptive_suggestions (cached)"] = time_calls(engine.adaptive_suggestions, [(u,) for u in user_ids])
+    results["generate_color_palettes"] = time_calls(
+        art_creation_suggestions.generate_color_palettes,
+        [(art_creation_suggestions.get_user_preferences(u),) for u in user_ids[:200]] * (calls // 200 + 1)
+    )
+    results["EnhancedDragDropGame.add_element"] = time_calls(add_element, [(rng.choice(elements),) for _ in range(calls)])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[10000])
+    parser.add_argument("--artworks", type=int, help="default: one per 10 users")
+    parser.add_argument("--tutorials", type=int, help="default: one per 100 users")
+    parser.add_argument("--clicks", type=float, default=3.0, help="mean clicked artworks per user")
+    parser.add_argument("--completions", type=float, default=1.0, help="mean completed tutorials per user")
+    parser.add_argument("--calls", type=int, default=1000, help="calls per case")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--report-dir", default=REPORT_DIR)
+    parser.add_argument("--run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        # Child process: the engines load DATASET_PATH on import, so each size gets a fresh interpreter
+        print(json.dumps(run(args.calls, args.seed)))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for users in args.users:
+            path = write_dataset(os.path.join(tmp, f"synthetic-{users}.json"), users=users, artworks=args.artworks,
+                                 tutorials=args.tutorials, clicks=args.clicks, completions=args.completions,
+                                 seed=args.seed)
+            env = dict(os.environ, DATASET_PATH=path, INTERACTION_LOG_PATH="", GEMINI_API_KEY="",
+                       NEIGHBOR_TABLE_PATH=os.path.join(tmp, "no-neighbor-table.json"))
+            env.pop("SUGGESTION_STORE_PATH", None)
+            child = subprocess.run([sys.executable, __file__, "--run", "--calls", str(args.calls),
+                                    "--seed", str(args.seed)], env=env, capture_output=True, text=True, check=True)
+            sized = json.loads(child.stdout.strip().splitlines()[-1])
+            print(f"{'users':>8} {'case':<36} {'p50 ms':>9} {'p99 ms':>9} {'calls/s':>10}")
+            for case, stats in sized.items():
+                print(f"{users:>8} {case:<36} {stats['p50_ms']:>9.3f} {stats['p99_ms']:>9.3f} {stats['per_sec']:>10.0f}")
+                results[f"{case} @ {users} users"] = stats
+
+    params = {key: value for key, value in vars(args).items() if key not in ("run", "report_dir")}
+    print(f"Report: {write_report('engines', params, results, args.report_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""HTTP load on both Flask apps (api_mock.py, game_api.py) with a stub Gemini model
+
+Each server runs in its own process on a synthetic dataset, with the stub model
+(see stub_gemini.py) patched in. Concurrent clients loop over a user session
+until the duration is up:
+
+    suggestions  GET /adaptive_suggest, GET /art_creation_suggestions/<id>, POST /events
+    game         POST /start_game, /choose_background, 4 x /add_element,
+                 GET /check_scene, /get_suggestions
+                 (with --batched: POST /start_game, POST /scene/<id>/actions,
+                 GET /get_suggestions)
+
+Latency per route and overall throughput are printed and saved as a JSON
+report (see report.py) for comparing runs.
+
+Usage:
+    python bench_http_load.py --users 10000 --concurrency 50 --duration 30 --latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_async_serving import wait_for_port
+from report import REPORT_DIR, latency_stats, write_report
+from synthetic import write_dataset
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SUGGESTIONS_DIR = os.path.join(BENCH_DIR, "..", "ai_suggestions", "scripts")
+GAME_DIR = os.path.join(BENCH_DIR, "..", "game_logic", "scripts")
+
+BACKGROUNDS = ["Mountain", "Beach", "Forest", "City", "Space"]
+ELEMENTS = ["Tree", "River", "House", "Sun", "Mountain", "Cloud", "Flower", "Bird", "Bridge", "Boat", "Castle", "Star"]
+
+
+def serve(app_name, port, latency):
+    """Run one Flask app with the stub model (invoked in a child process)"""
+    sys.path.append(BENCH_DIR)
+    from stub_gemini import StubModel
+    stub = StubModel(latency)
+    if app_name == "suggestions":
+        sys.path.append(SUGGESTIONS_DIR)
+        import art_creation_suggestions
+        import enhanced_suggestion_engine
+        enhanced_suggestion_engine.model = stub
+        art_creation_suggestions.model = stub
+        from api_mock import app
+    else:
+        sys.path.append(GAME_DIR)
+        import enhanced_drag_drop_game
+        enhanced_drag_drop_game.model = stub
+        from game_api import app
+    app.run(host="127.0.0.1", port=port, threaded=True)
+
+
+async def http(port, method, path, body=None):
+    """One request on a fresh connection; returns (status, parsed JSON body or None)"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Connection: close\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    try:
+        return status, json.loads(content)
+    except ValueError:
+        return status, None
+
+
+class LoadClient:
+    """Runs sessions against both servers and records latency per route"""
+
+    def __init__(self, ports, user_ids, item_ids, seed, batched=False):
+        self.ports = ports
+        self.batched = batched
+        self.user_ids = user_ids
+        self.item_ids = item_ids
+        self.rng = random.Random(seed)
+        self.samples = {}
+        self.failures = {}
+
+    async def call(self, server, route, method, path, body=None):
+        start = time.perf_counter()
+        try:
+            status, payload = await http(self.ports[server], method, path, body)
+        except OSError:
+            status, payload = None, None
+        self.samples.setdefault(route, []).append(time.perf_counter() - start)
+        if status != 200:
+            self.failures[route] = self.failures.get(route, 0) + 1
+        return payload
+
+    async def suggestions_session(self):
+        user_id = self.rng.choice(self.user_ids)
+        await self.call("suggestions", "GET /adaptive_suggest", "GET", f"/adaptive_suggest?user_id={user_id}")
+        await self.call("suggestions", "GET /art_creation_suggestions/<id>", "GET",
+                        f"/art_creation_suggestions/{user_id}")
+        event = {"user_id": user_id, "type": "click", "item_id": self.rng.choice(self.item_ids)}
+        await self.call("suggestions", "POST /events", "POST", "/events", {"events": [event]})
+
+    async def game_session(self):
+        user_id = self.rng.choice(self.user_ids)
+        started = await self.call("game", "POST /start_game", "POST", "/start_game",
+                                  {"user_name": f"User {user_id}", "user_id": user_id})
+        if not started or "game_id" not in started:
+            return
+        game_id = started["game_id"]
+        if self.batched:
+            actions = [{"type": "choose_background", "background": self.rng.choice(BACKGROUNDS)}]
+            actions += [{"type": "add_element", "element": self.rng.choice(ELEMENTS)} for _ in range(4)]
+            actions.append({"type": "check_scene"})
+            await self.call("game", "POST /scene/<id>/actions", "POST", f"/scene/{game_id}/actions",
+                            {"actions": actions})
+            await self.call("game", "GET /get_suggestions/<id>", "GET", f"/get_suggestions/{game_id}")
+            return
+        await self.call("game", "POST /choose_background/<id>", "POST", f"/choose_background/{game_id}",
+                        {"background": self.rng.choice(BACKGROUNDS)})
+        for _ in range(4):
+            await self.call("game", "POST /add_element/<id>", "POST", f"/add_element/{game_id}",
+                            {"element": self.rng.choice(ELEMENTS)})
+        await self.call("game", "GET /check_scene/<id>", "GET", f"/check_scene/{game_id}")
+        await self.call("game", "GET /get_suggestions/<id>", "GET", f"/get_suggestions/{game_id}")
+
+    async def worker(self, session, deadline):
+        while time.perf_counter() < deadline:
+            await session()
+
+    async def run(self, concurrency, duration):
+        deadline = time.perf_counter() + duration
+        sessions = [self.suggestions_session, self.game_session]
+        start = time.perf_counter()
+        await asyncio.gather(*(self.worker(sessions[i % 2], deadline) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        results = {}
+        for route, samples in sorted(self.samples.items()):
+            results[route] = dict(latency_stats(samples, elapsed), failures=self.failures.get(route, 0))
+        total = sum(len(samples) for samples in self.samples.values())
+        results["all routes"] = {"count": total, "per_sec": round(total / elapsed, 1),
+                                 "failures": sum(self.failures.values())}
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000, help="synthetic dataset size")
+    parser.add_argument("--clicks", type=float, default=3.0, help="mean clicked artworks per user")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub Gemini latency in seconds")
+    parser.add_argument("--batched", action="store_true", help="build each scene with one /scene/<id>/actions call")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=5911)
+    parser.add_argument("--report-dir", default=REPORT_DIR)
+    parser.add_argument("--serve", choices=["suggestions", "game"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.latency)
+        return
+
+    servers = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_dataset(os.path.join(tmp, "synthetic.json"), users=args.users, clicks=args.clicks, seed=args.seed)
+        with open(path, encoding="utf-8") as f:
+            dataset = json.load(f)
+        env = dict(os.environ, DATASET_PATH=path, INTERACTION_LOG_PATH="", GEMINI_API_KEY="",
+                   NEIGHBOR_TABLE_PATH=os.path.join(tmp, "no-neighbor-table.json"),
+                   GAME_SESSION_PATH=os.path.join(tmp, "games.sqlite"), LEADERBOARD_PATH=os.path.join(tmp, "leaderboard.sqlite"))
+        env.pop("SUGGESTION_STORE_PATH", None)
+        ports = {"suggestions": args.port, "game": args.port + 1}
+        try:
+            for app_name, port in ports.items():
+                servers.append(subprocess.Popen(
+                    [sys.executable, __file__, "--serve", app_name, "--port", str(port), "--latency", str(args.latency)],
+                    env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                ))
+            for port in ports.values():
+                wait_for_port(port, timeout=120)
+            client = LoadClient(ports, [u["id"] for u in dataset["users"]], [a["id"] for a in dataset["artworks"]],
+                                args.seed, args.batched)
+            results = asyncio.run(client.run(args.concurrency, args.duration))
+        finally:
+            for server in servers:
+                server.terminate()
+                server.wait()
+
+    print(f"{'route':<36} {'count':>7} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8} {'failed':>7}")
+    for route, stats in results.items():
+        p50 = f"{stats['p50_ms']:.1f}" if "p50_ms" in stats else "-"
+        p99 = f"{stats['p99_ms']:.1f}" if "p99_ms" in stats else "-"
+        print(f"{route:<36} {stats['count']:>7} {p50:>9} {p99:>9} {stats['per_sec']:>8.1f} {stats['failures']:>7}")
+    params = {key: value for key, value in vars(args).items() if key not in ("serve", "port", "report_dir")}
+    print(f"Report: {write_report('http_load', params, results, args.report_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Memory of the artwork catalog: list of dicts vs column-oriented ItemStore
+
+Usage:
+    python bench_item_store.py --sizes 100000 1000000
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+
+from item_store import ItemStore
+from synthetic import MEDIUMS, STYLES
+
+
+def generate_artworks(count, seed=42):
+    """Artworks with every field the dataset uses; strings are distinct objects, as after json.load"""
+    rng = random.Random(seed)
+    return [
+        {"id": f"A{i}", "title": f"Artwork {i}", "style": rng.choice(STYLES) + "",
+         "medium": rng.choice(MEDIUMS) + "", "artist": f"Artist {i % 5000}",
+         "image": f"https://images.example.com/{i}.jpg", "description": f"Synthetic artwork number {i}."}
+        for i in range(count)
+    ]
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current / 1024 / 1024, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    args = parser.parse_args()
+
+    print(f"{'items':>9} {'dicts MB':>9} {'store MB':>9} {'store B/item':>13} {'build s':>8}")
+    for size in args.sizes:
+        records, dicts_mb, _ = measure(lambda: generate_artworks(size))
+        del records
+        # Built from fresh records that are then dropped, so the retained strings are counted
+        store, store_mb, elapsed = measure(lambda: ItemStore(generate_artworks(size), ("style", "medium")))
+        print(f"{size:>9} {dicts_mb:>9.0f} {store_mb:>9.0f} {store_mb * 1024 * 1024 / size:>13.0f} {elapsed:>8.2f}")
+        del store
+
+
+if __name__ == "__main__":
+    main()
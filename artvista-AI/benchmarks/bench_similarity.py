@@ -0,0 +1,80 @@
+"""Latency of top-k similar-user search: pure-python index vs sparse matrix engine
+
+Usage:
+    python bench_similarity.py --sizes 10000 100000 1000000 --queries 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ai_suggestions", "scripts"))
+
+from catalog_index import CatalogIndex
+from similarity_engine import SparseSimilarityEngine
+from synthetic import generate_users
+
+
+def python_top_k(index, user_id, k):
+    """Same neighbour search as enhanced_suggestion_engine's python backend"""
+    prefs = index.get_preferences(user_id)
+    similarities = []
+    for other_id, shared in index.preference_overlap(user_id).items():
+        union = len(prefs) + len(index.get_preferences(other_id)) - shared
+        similarities.append((other_id, shared / union))
+    similarities.sort(key=lambda x: (-x[1], index.user_positions[x[0]]))
+    return similarities[:k]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def time_queries(fn, user_ids):
+    samples = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        fn(user_id)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--python-queries", type=int, default=20,
+                        help="queries for the slow pure-python backend")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'users':>9} {'backend':>8} {'build s':>8} {'p50 ms':>8} {'p99 ms':>8} {'batch users/s':>14}")
+    for size in args.sizes:
+        users = generate_users(size)
+        rng = random.Random(size)
+        query_ids = [rng.randint(1, size) for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        index = CatalogIndex({"users": users})
+        build = time.perf_counter() - start
+        samples = time_queries(lambda u: python_top_k(index, u, args.k), query_ids[:args.python_queries])
+        print(f"{size:>9} {'python':>8} {build:>8.2f} {percentile(samples, 50):>8.2f} "
+              f"{percentile(samples, 99):>8.2f} {'-':>14}")
+
+        start = time.perf_counter()
+        engine = SparseSimilarityEngine(users)
+        build = time.perf_counter() - start
+        samples = time_queries(lambda u: engine.top_k(u, args.k), query_ids)
+        batch_ids = [rng.randint(1, size) for _ in range(args.batch)]
+        start = time.perf_counter()
+        engine.top_k_batch(batch_ids, args.k)
+        throughput = len(batch_ids) / (time.perf_counter() - start)
+        print(f"{size:>9} {'sparse':>8} {build:>8.2f} {percentile(samples, 50):>8.2f} "
+              f"{percentile(samples, 99):>8.2f} {throughput:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Ingest rate and top-k latency of the trending tracker: count-min sketch vs exact counters
+
+Events follow a Zipf-like popularity over the catalog and arrive over one day,
+so decay is exercised. "top-10 recall" is the share of the exact top 10 that
+the sketch also reports.
+
+Usage:
+    python bench_trending.py --items 100000 1000000 --events 1000000
+"""
+import argparse
+import bisect
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ai_suggestions", "scripts"))
+
+from trending import DecayedTopK
+
+
+def generate_events(items, count, seed=42):
+    """(item_id, timestamp) pairs; item i is drawn with weight 1 / (i + 1)"""
+    rng = random.Random(seed)
+    cumulative = list(itertools.accumulate(1 / (i + 1) for i in range(items)))
+    total = cumulative[-1]
+    start = 1_700_000_000
+    return [(f"A{bisect.bisect(cumulative, rng.random() * total)}", start + i * 86400 / count) for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--events", type=int, default=1000000)
+    parser.add_argument("--half-life-hours", type=float, default=6)
+    parser.add_argument("--sketch-width", type=int, default=65536)
+    args = parser.parse_args()
+
+    print(f"{'items':>9} {'counter':>7} {'events/s':>10} {'top ms':>7} {'top-10 recall':>14}")
+    for items in args.items:
+        events = generate_events(items, args.events)
+        now = events[-1][1]
+        exact_top = None
+        for name, width in (("exact", 0), ("sketch", args.sketch_width)):
+            tracker = DecayedTopK(half_life=args.half_life_hours * 3600, sketch_width=width)
+            add = tracker.add
+            start = time.perf_counter()
+            for item_id, timestamp in events:
+                add(item_id, timestamp)
+            rate = len(events) / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for _ in range(100):
+                top = tracker.top(10, now)
+            top_ms = (time.perf_counter() - start) * 1000 / 100
+            keys = [key for key, _ in top]
+            if exact_top is None:
+                exact_top = keys
+            recall = len(set(keys) & set(exact_top)) / len(exact_top)
+            print(f"{items:>9} {name:>7} {rate:>10.0f} {top_ms:>7.3f} {recall:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
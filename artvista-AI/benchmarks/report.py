@@ -0,0 +1,103 @@
+"""JSON benchmark reports that can be compared across runs
+
+Each report records the benchmark name, when and where it ran (commit, Python,
+CPU count), its parameters and a {case: {metric: value}} results table.
+
+Usage:
+    python report.py reports/engines-20260101-120000.json reports/engines-20260102-120000.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+REPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reports")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def latency_stats(samples, seconds=None):
+    """p50/p99/mean in milliseconds of latency samples (seconds), plus throughput when seconds is given"""
+    stats = {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 4),
+        "p99_ms": round(percentile(samples, 99) * 1000, 4),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 4),
+    }
+    if seconds:
+        stats["per_sec"] = round(len(samples) / seconds, 1)
+    return stats
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def environment():
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def write_report(name, params, results, directory=REPORT_DIR):
+    """Save a report as <directory>/<name>-<timestamp>.json and return its path"""
+    os.makedirs(directory, exist_ok=True)
+    created = time.strftime("%Y%m%d-%H%M%S")
+    report = {"benchmark": name, "created": created, "environment": environment(),
+              "params": params, "results": results}
+    path = os.path.join(directory, f"{name}-{created}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def compare(old, new):
+    """Rows of (case, metric, old value, new value, change in percent) for metrics in both reports"""
+    rows = []
+    for case, new_metrics in new["results"].items():
+        old_metrics = old["results"].get(case, {})
+        for metric, new_value in new_metrics.items():
+            old_value = old_metrics.get(metric)
+            if not isinstance(new_value, (int, float)) or not isinstance(old_value, (int, float)):
+                continue
+            change = (new_value - old_value) / old_value * 100 if old_value else None
+            rows.append((case, metric, old_value, new_value, change))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    args = parser.parse_args()
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    if old["benchmark"] != new["benchmark"]:
+        sys.exit(f"Reports are from different benchmarks: {old['benchmark']} and {new['benchmark']}")
+    if old["params"] != new["params"]:
+        print("Warning: the runs used different parameters")
+    print(f"{old['environment'].get('commit')} -> {new['environment'].get('commit')}")
+    print(f"{'case':<40} {'metric':<10} {'old':>12} {'new':>12} {'change':>8}")
+    for case, metric, old_value, new_value, change in compare(old, new):
+        change_text = f"{change:+.1f}%" if change is not None else "-"
+        print(f"{case:<40} {metric:<10} {old_value:>12} {new_value:>12} {change_text:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import asyncio
+import json
+import time
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """Local stand-in for genai.GenerativeModel with a fixed upstream latency"""
+
+    def __init__(self, latency=0.5):
+        self.latency = latency
+        self.calls = 0
+
+    def _answer(self, prompt):
+        self.calls += 1
+        if "drag-and-drop" in prompt:
+            return StubResponse(json.dumps(["Tree", "Sun", "Bird"]))
+        if "color palettes" in prompt:
+            return StubResponse(json.dumps({
+                "colorPalettes": [{"name": "Stub", "colors": ["#000000", "#FFFFFF", "#FF0000"], "uses": "testing"}],
+                "techniques": [{"name": "Stub", "description": "", "tools": "", "time": "", "difficulty": "Beginner"}],
+                "themes": [{"name": "Stub", "description": ""}]
+            }))
+        if "recommendation engine" in prompt:
+            return StubResponse(json.dumps({
+                "artworks": [{"id": "gen1", "title": "Stub", "style": "abstract", "medium": "oil"}],
+                "tutorials": [{"id": "tut1", "title": "Stub", "style": "abstract"}]
+            }))
+        return StubResponse("Art is the window to the soul.")
+
+    def generate_content(self, prompt, **kwargs):
+        time.sleep(self.latency)
+        return self._answer(prompt)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._answer(prompt)
@@ -0,0 +1,102 @@
+"""Synthetic data shaped like art_suggestions.json, for the benchmarks
+
+Usage:
+    python synthetic.py --users 100000 --clicks 5 --completions 2 --out /tmp/synthetic.json
+"""
+import argparse
+import json
+import random
+
+STYLES = ["landscape", "urban", "abstract", "portrait", "nature", "still-life", "surreal", "minimal"]
+MEDIUMS = ["watercolor", "oil", "digital", "acrylic", "charcoal", "ink", "pastel", "mixed-media"]
+
+
+def generate_users(count, seed=42, max_preferences=4):
+    """Synthetic users shaped like art_suggestions.json, preferences only"""
+    rng = random.Random(seed)
+    vocabulary = STYLES + MEDIUMS
+    users = []
+    for user_id in range(1, count + 1):
+        users.append({
+            "id": user_id,
+            "name": f"User {user_id}",
+            "preferences": rng.sample(vocabulary, rng.randint(1, max_preferences)),
+            "interactions": {"clicked_artworks": [], "completed_tutorials": []}
+        })
+    return users
+
+
+def _cumulative_popularity(count, skew):
+    """Cumulative Zipf weights: item i is picked in proportion to 1 / (i + 1) ** skew"""
+    total = 0.0
+    weights = []
+    for rank in range(count):
+        total += 1.0 / (rank + 1) ** skew
+        weights.append(total)
+    return weights
+
+
+def _picks(rng, ids, cum_weights, mean):
+    """About mean distinct ids drawn by popularity (0 to 2 * mean per user)"""
+    count = rng.randint(0, int(2 * mean)) if mean > 0 else 0
+    return list(dict.fromkeys(rng.choices(ids, cum_weights=cum_weights, k=count))) if count else []
+
+
+def generate_dataset(users, artworks=None, tutorials=None, clicks=3.0, completions=1.0, skew=1.0, seed=42):
+    """Synthetic dataset shaped like art_suggestions.json
+
+    artworks and tutorials default to one per 10 and one per 100 users;
+    clicks and completions are the mean interactions per user, drawn with a
+    Zipf popularity skew so that a few items are much more popular than most.
+    """
+    rng = random.Random(seed)
+    artworks = max(1, users // 10) if artworks is None else artworks
+    tutorials = max(len(STYLES), users // 100) if tutorials is None else tutorials
+    artwork_records = [
+        {"id": f"A{i}", "title": f"Artwork {i}", "style": rng.choice(STYLES), "medium": rng.choice(MEDIUMS)}
+        for i in range(1, artworks + 1)
+    ]
+    tutorial_records = [
+        {"id": f"T{i}", "title": f"Tutorial {i}", "style": rng.choice(STYLES)}
+        for i in range(1, tutorials + 1)
+    ]
+    artwork_ids = [a["id"] for a in artwork_records]
+    tutorial_ids = [t["id"] for t in tutorial_records]
+    # Popularity ranks are shuffled so popular items are spread over styles and mediums
+    rng.shuffle(artwork_ids)
+    rng.shuffle(tutorial_ids)
+    artwork_weights = _cumulative_popularity(len(artwork_ids), skew)
+    tutorial_weights = _cumulative_popularity(len(tutorial_ids), skew)
+
+    dataset_users = generate_users(users, seed)
+    for user in dataset_users:
+        user["interactions"]["clicked_artworks"] = _picks(rng, artwork_ids, artwork_weights, clicks)
+        user["interactions"]["completed_tutorials"] = _picks(rng, tutorial_ids, tutorial_weights, completions)
+    return {"users": dataset_users, "artworks": artwork_records, "tutorials": tutorial_records}
+
+
+def write_dataset(path, **options):
+    """Write generate_dataset(**options) to path as JSON and return the path"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(generate_dataset(**options), f)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic art_suggestions.json-shaped dataset")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--artworks", type=int, help="default: one per 10 users")
+    parser.add_argument("--tutorials", type=int, help="default: one per 100 users")
+    parser.add_argument("--clicks", type=float, default=3.0, help="mean clicked artworks per user")
+    parser.add_argument("--completions", type=float, default=1.0, help="mean completed tutorials per user")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of item popularity")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="synthetic_suggestions.json")
+    args = parser.parse_args()
+    write_dataset(args.out, users=args.users, artworks=args.artworks, tutorials=args.tutorials,
+                  clicks=args.clicks, completions=args.completions, skew=args.skew, seed=args.seed)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
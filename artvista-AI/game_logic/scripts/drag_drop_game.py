@@ -1,4 +1,7 @@
 # scripts/drag_drop_game.py
+import time
+
+from leaderboard import Leaderboard
 
 class DragDropGame:
     def __init__(self, user_name):
@@ -48,13 +51,12 @@ class DragDropGame:
         else:
             self.badges.append("Rising Star")
 
-# Simple leaderboard (in-memory)
-leaderboard = []
+# Simple leaderboard (in-memory): each user's best score, kept sorted (see leaderboard.py)
+leaderboard = Leaderboard()
 
 def update_leaderboard(user_name, points):
-    leaderboard.append({"user": user_name, "points": points})
-    leaderboard.sort(key=lambda x: x["points"], reverse=True)
-    return leaderboard[:5]
+    leaderboard.submit(user_name, user_name, points, time.time())
+    return leaderboard.top(5)
 
 # Simulated gameplay run
 if __name__ == "__main__":
@@ -1,9 +1,19 @@
 import json
 import random
 import os
+import sys
+import time
 from collections import defaultdict
 from dotenv import load_dotenv
 
+from leaderboard import Leaderboard
+
+# Shared helpers used by both AI services
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "shared"))
+from llm_cache import make_key, canonical_elements
+from llm_guard import get_guard, llm_metrics
+from metrics import get_metrics
+
 # Load environment variables
 load_dotenv()
 
@@ -20,34 +30,21 @@ if GEMINI_API_KEY and genai:
 else:
     model = None
 
-def load_dataset():
-    """Load the art suggestions dataset with fallback for deployment environments"""
-    # Get the directory of this script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    # Navigate to the dataset file (handle both local and deployment paths)
-    dataset_path = os.path.join(script_dir, "..", "ai_suggestions", "dataset", "art_suggestions.json")
-    
-    # If that doesn't work, try alternative path for deployment
-    if not os.path.exists(dataset_path):
-        dataset_path = os.path.join(script_dir, "..", "..", "artvista-AI", "ai_suggestions", "dataset", "art_suggestions.json")
-    
-    # Handle case where file might not exist (for deployment safety)
-    try:
-        with open(dataset_path, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        # Fallback to a minimal dataset for deployment
-        return {
-            "users": [],
-            "art_elements": [],
-            "art_styles": [],
-            "art_periods": [],
-            "artists": [],
-            "color_palettes": []
-        }
+# Cached, coalesced and time-boxed Gemini calls (see shared/llm_guard.py)
+llm_guard = get_guard()
+
+# Stage timings served at /metrics (see shared/metrics.py)
+metrics = get_metrics()
+metrics.add_collector("llm", llm_metrics)
 
-# Load dataset when module is imported
-data = load_dataset()
+# Element categories offered by the scene creator
+BACKGROUNDS = ["Mountain", "Beach", "Forest", "City", "Space"]
+ELEMENT_CATEGORIES = {
+    "nature": ["Tree", "River", "Mountain", "Cloud", "Flower", "Bird"],
+    "structures": ["House", "Bridge", "Castle", "Boat"],
+    "decorative": ["Sun", "Star"]
+}
+ALL_ELEMENTS = ELEMENT_CATEGORIES["nature"] + ELEMENT_CATEGORIES["structures"] + ELEMENT_CATEGORIES["decorative"]
 
 class EnhancedDragDropGame:
     def __init__(self, user_name, user_id=None):
@@ -65,6 +62,22 @@ class EnhancedDragDropGame:
         if user_id:
             self._adjust_difficulty_based_on_user()
 
+    # Attributes saved by the session store (see session_store.py)
+    STATE_FIELDS = ("user_name", "user_id", "background", "elements", "points", "badges",
+                    "level", "difficulty", "completed_scenes")
+
+    def to_state(self):
+        """JSON-serializable game state"""
+        return {field: getattr(self, field) for field in self.STATE_FIELDS}
+
+    @classmethod
+    def from_state(cls, state):
+        """Game restored from to_state() output"""
+        game = cls.__new__(cls)
+        for field in cls.STATE_FIELDS:
+            setattr(game, field, state[field])
+        return game
+
     def _adjust_difficulty_based_on_user(self):
         """Adjust difficulty based on user's past performance"""
         # In a real implementation, this would use actual user data
@@ -116,7 +129,7 @@ class EnhancedDragDropGame:
                 "status": "completed",
                 "message": f"Scene created! Total points: {self.points}, Badges: {self.badges}",
                 "points": self.points,
-                "badges": self.badges,
+                "badges": list(self.badges),
                 "level": self.level
             }
         else:
@@ -125,7 +138,7 @@ class EnhancedDragDropGame:
                 "status": "incomplete",
                 "message": f"Add {needed} more elements to complete the scene.",
                 "points": self.points,
-                "badges": self.badges,
+                "badges": list(self.badges),
                 "level": self.level
             }
 
@@ -158,57 +171,102 @@ class EnhancedDragDropGame:
         else:
             self.badges.append("Scene Builder")
 
+    def _suggestion_prompt(self):
+        """Gemini prompt asking for the next elements to add"""
+        return f"""
+        You are an AI game designer for a drag-and-drop scene creator game.
+        The player is building a scene with the background "{self.background}".
+        They have already added these elements: {", ".join(self.elements) if self.elements else "None"}.
+        Suggest exactly 3 new elements for them to add from this exact list of available elements: 
+        {", ".join(ALL_ELEMENTS)}.
+        Do NOT suggest elements they have already added.
+        Return ONLY a JSON array of strings containing your 3 suggested elements. Example: ["Tree", "Sun", "Bird"]
+        """
+
+    @staticmethod
+    def _parse_suggestions(text):
+        if text.startswith('```json'): text = text[7:]
+        if text.startswith('```'): text = text[3:]
+        if text.endswith('```'): text = text[:-3]
+        
+        return json.loads(text.strip())
+
+    def _generate_gemini_suggestions(self, prompt):
+        """Ask Gemini for the next elements to add; returns the parsed JSON array"""
+        with metrics.stage("gemini", endpoint="scene_suggestions"):
+            response = model.generate_content(prompt)
+        with metrics.stage("json_parse", endpoint="scene_suggestions"):
+            return self._parse_suggestions(response.text)
+
+    async def _generate_gemini_suggestions_async(self, prompt):
+        """Non-blocking variant of _generate_gemini_suggestions"""
+        with metrics.stage("gemini", endpoint="scene_suggestions"):
+            response = await model.generate_content_async(prompt)
+        with metrics.stage("json_parse", endpoint="scene_suggestions"):
+            return self._parse_suggestions(response.text)
+
+    def _suggestion_cache_key(self):
+        return make_key("scene_suggestions", background=self.background.strip().lower(),
+                        elements=canonical_elements(self.elements))
+
+    def _valid_gemini_suggestions(self, suggestions):
+        """Element suggestion response from Gemini's answer, or None to fall back"""
+        if suggestions is None:
+            return None
+        try:
+            # Filter strictly against available and unused
+            valid_suggestions = [s for s in suggestions if s in ALL_ELEMENTS and s not in self.elements]
+            if len(valid_suggestions) > 0:
+                return {"suggestion_type": "element", "suggestions": valid_suggestions[:3]}
+        except Exception as e:
+            print(f"Gemini AI suggestion error: {e}. Falling back to default logic.")
+        return None
+
     def get_ai_suggestions(self):
         """Get AI-powered suggestions for the next elements to add"""
-        # Define element categories
-        backgrounds = ["Mountain", "Beach", "Forest", "City", "Space"]
-        elements = {
-            "nature": ["Tree", "River", "Mountain", "Cloud", "Flower", "Bird"],
-            "structures": ["House", "Bridge", "Castle", "Boat"],
-            "decorative": ["Sun", "Star"]
-        }
-        all_elements = elements["nature"] + elements["structures"] + elements["decorative"]
-        
         # If no background is selected, suggest one
         if not self.background:
-            return {"suggestion_type": "background", "suggestions": backgrounds[:3]}
+            return {"suggestion_type": "background", "suggestions": BACKGROUNDS[:3]}
         
         # Try using Gemini for intelligent element suggestions
         if model:
-            try:
-                prompt = f"""
-                You are an AI game designer for a drag-and-drop scene creator game.
-                The player is building a scene with the background "{self.background}".
-                They have already added these elements: {", ".join(self.elements) if self.elements else "None"}.
-                Suggest exactly 3 new elements for them to add from this exact list of available elements: 
-                {", ".join(all_elements)}.
-                Do NOT suggest elements they have already added.
-                Return ONLY a JSON array of strings containing your 3 suggested elements. Example: ["Tree", "Sun", "Bird"]
-                """
-                response = model.generate_content(prompt)
-                text = response.text
-                if text.startswith('```json'): text = text[7:]
-                if text.startswith('```'): text = text[3:]
-                if text.endswith('```'): text = text[:-3]
-                
-                suggestions = json.loads(text.strip())
-                # Filter strictly against available and unused
-                valid_suggestions = [s for s in suggestions if s in all_elements and s not in self.elements]
-                if len(valid_suggestions) > 0:
-                    return {"suggestion_type": "element", "suggestions": valid_suggestions[:3]}
-            except Exception as e:
-                print(f"Gemini AI suggestion error: {e}. Falling back to default logic.")
-
-        # Fallback if background is selected, suggest elements that match the background
+            prompt = self._suggestion_prompt()
+            suggestions = llm_guard.call("scene_suggestions", self._suggestion_cache_key(),
+                                         lambda: self._generate_gemini_suggestions(prompt))
+            result = self._valid_gemini_suggestions(suggestions)
+            if result is not None:
+                return result
+            metrics.inc("fallbacks_total", endpoint="scene_suggestions", reason="gemini_unavailable")
+
+        return self._local_suggestions()
+
+    async def get_ai_suggestions_async(self):
+        """Async variant of get_ai_suggestions: awaits Gemini instead of blocking"""
+        if not self.background:
+            return {"suggestion_type": "background", "suggestions": BACKGROUNDS[:3]}
+        
+        if model:
+            prompt = self._suggestion_prompt()
+            suggestions = await llm_guard.call_async("scene_suggestions", self._suggestion_cache_key(),
+                                                     lambda: self._generate_gemini_suggestions_async(prompt))
+            result = self._valid_gemini_suggestions(suggestions)
+            if result is not None:
+                return result
+            metrics.inc("fallbacks_total", endpoint="scene_suggestions", reason="gemini_unavailable")
+
+        return self._local_suggestions()
+
+    def _local_suggestions(self):
+        """Suggest elements that match the selected background"""
         suggestions = []
         background_lower = self.background.lower()
         
         if "mountain" in background_lower or "forest" in background_lower:
-            suggestions = elements["nature"][:4]
+            suggestions = ELEMENT_CATEGORIES["nature"][:4]
         elif "beach" in background_lower:
             suggestions = ["Boat", "Sun", "Cloud", "Bird"]
         elif "city" in background_lower:
-            suggestions = elements["structures"][:3] + ["Sun"]
+            suggestions = ELEMENT_CATEGORIES["structures"][:3] + ["Sun"]
         elif "space" in background_lower:
             suggestions = ["Star", "Castle", "Cloud"]
         else:
@@ -239,14 +297,13 @@ class EnhancedDragDropGame:
         
         return f"Difficulty adjusted to {self.difficulty}"
 
-# Simple leaderboard (in-memory)
-leaderboard = []
+# Simple leaderboard (in-memory): each user's best score, kept sorted (see leaderboard.py)
+leaderboard = Leaderboard()
 
 def update_leaderboard(user_name, points):
-    """Update the leaderboard with user's points"""
-    leaderboard.append({"user": user_name, "points": points})
-    leaderboard.sort(key=lambda x: x["points"], reverse=True)
-    return leaderboard[:5]
+    """Update the leaderboard with user's points (kept if it is their best) and return the top 5"""
+    leaderboard.submit(user_name, user_name, points, time.time())
+    return leaderboard.top(5)
 
 # Simulated gameplay run
 if __name__ == "__main__":
@@ -1,161 +1,157 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, send_file
 from flask_cors import CORS
+import hmac
 import sys
 import os
+import time
 
 # Add the scripts directory to the path so we can import our modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "shared"))
 
-from enhanced_drag_drop_game import EnhancedDragDropGame
+import game_service
+from leaderboard_stream import HEADERS as STREAM_HEADERS
+from metrics import CONTENT_TYPE, get_metrics
+from profiling import profiler_from_env
+
+# Shared secret for /admin/* endpoints; unset disables them
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
 
 app = Flask(__name__)
 # Enable CORS for all routes so the React frontend / Node backend can access it
 CORS(app)
 
+# Request counts and latencies per route, plus stage timings and cache statistics (see shared/metrics.py)
+metrics = get_metrics()
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # The URL rule (e.g. /check_scene/<int:game_id>) rather than the path keeps the series bounded
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    metrics.track_request(route, request.method, response.status_code, time.perf_counter() - g.request_start)
+    return response
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics_text():
+    """Prometheus text-format metrics"""
+    return metrics.render(), 200, {"Content-Type": CONTENT_TYPE}
+
+# Opt-in request profiles, saved for download from /admin/profiles (see shared/profiling.py)
+profiler = profiler_from_env()
+
+def is_admin():
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN)
+
+@app.before_request
+def start_profile():
+    # Admins ask with X-Profile: cprofile|sample; any request may also be sampled at PROFILE_SAMPLE_RATE
+    mode = request.headers.get("X-Profile")
+    g.profile = profiler.start(request.endpoint or "unmatched", mode if mode and is_admin() else None)
+
+@app.after_request
+def finish_profile(response):
+    profile = g.pop("profile", None)
+    if profile is not None:
+        profile_id = profile.stop()
+        if profile_id:
+            response.headers["X-Profile-Id"] = profile_id
+    return response
+
+@app.teardown_request
+def discard_profile(error):
+    # Stops the profiler when after_request did not run
+    profile = g.pop("profile", None)
+    if profile is not None:
+        profile.stop()
+
+@app.route("/admin/profiles", methods=["GET"])
+def list_profiles():
+    """Ids of the saved request profiles, newest first"""
+    if not is_admin():
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify({"profiles": profiler.list()})
+
+@app.route("/admin/profiles/<profile_id>", methods=["GET"])
+def download_profile(profile_id):
+    """A saved profile: .pstats (cProfile) or .collapsed (flame graph stacks)"""
+    if not is_admin():
+        return jsonify({"error": "forbidden"}), 403
+    path = profiler.path(profile_id)
+    if path is None:
+        return jsonify({"error": "profile not found"}), 404
+    return send_file(path, as_attachment=True, download_name=profile_id)
+
+def respond(result):
+    payload, status = result
+    return jsonify(payload), status
+
 @app.route('/')
 def home():
-    return jsonify({
-        'message': 'Welcome to ArtVista AI Game API',
-        'endpoints': [
-            '/start_game',
-            '/choose_background/<int:game_id>',
-            '/add_element/<int:game_id>',
-            '/check_scene/<int:game_id>',
-            '/get_suggestions/<int:game_id>',
-            '/adjust_difficulty/<int:game_id>',
-            '/leaderboard'
-        ],
-        'method': 'POST for game creation, GET for other endpoints'
-    })
-
-# In-memory storage for active games
-games = {}
+    return respond(game_service.home())
 
 @app.route('/start_game', methods=['POST'])
 def start_game():
     """Start a new game session"""
-    data = request.json
-    if data is None:
-        return jsonify({'error': 'JSON data is required'}), 400
-    user_name = data.get('user_name')
-    user_id = data.get('user_id')
-    
-    if not user_name:
-        return jsonify({'error': 'user_name is required'}), 400
-    
-    # Create a new game instance
-    game = EnhancedDragDropGame(user_name, user_id)
-    game_id = len(games) + 1
-    games[game_id] = game
-    
-    return jsonify({
-        'game_id': game_id,
-        'message': f'Game started for {user_name}',
-        'difficulty': game.difficulty,
-        'level': game.level
-    })
+    return respond(game_service.start_game(request.json))
 
 @app.route('/choose_background/<int:game_id>', methods=['POST'])
 def choose_background(game_id):
     """Choose a background for the game"""
-    if game_id not in games:
-        return jsonify({'error': 'Game not found'}), 404
-    
-    data = request.json
-    if data is None:
-        return jsonify({'error': 'JSON data is required'}), 400
-    background = data.get('background')
-    
-    if not background:
-        return jsonify({'error': 'background is required'}), 400
-    
-    game = games[game_id]
-    result = game.choose_background(background)
-    
-    return jsonify({
-        'message': result,
-        'background': game.background
-    })
+    return respond(game_service.choose_background(game_id, request.json))
 
 @app.route('/add_element/<int:game_id>', methods=['POST'])
 def add_element(game_id):
     """Add an element to the scene"""
-    if game_id not in games:
-        return jsonify({'error': 'Game not found'}), 404
-    
-    data = request.json
-    if data is None:
-        return jsonify({'error': 'JSON data is required'}), 400
-    element = data.get('element')
-    
-    if not element:
-        return jsonify({'error': 'element is required'}), 400
-    
-    game = games[game_id]
-    result = game.add_element(element)
-    
-    return jsonify({
-        'message': result,
-        'points': game.points,
-        'elements': game.elements
-    })
+    return respond(game_service.add_element(game_id, request.json))
 
 @app.route('/check_scene/<int:game_id>', methods=['GET'])
 def check_scene(game_id):
     """Check if the scene is complete"""
-    if game_id not in games:
-        return jsonify({'error': 'Game not found'}), 404
-    
-    game = games[game_id]
-    result = game.check_scene()
-    
-    return jsonify(result)
+    return respond(game_service.check_scene(game_id))
 
 @app.route('/get_suggestions/<int:game_id>', methods=['GET'])
 def get_suggestions(game_id):
     """Get AI-powered suggestions for the next elements"""
-    if game_id not in games:
-        return jsonify({'error': 'Game not found'}), 404
-    
-    game = games[game_id]
-    suggestions = game.get_ai_suggestions()
-    
-    return jsonify(suggestions)
+    return respond(game_service.get_suggestions(game_id))
 
 @app.route('/adjust_difficulty/<int:game_id>', methods=['POST'])
 def adjust_difficulty(game_id):
     """AI-powered dynamic difficulty adjustment"""
-    if game_id not in games:
-        return jsonify({'error': 'Game not found'}), 404
-    
-    game = games[game_id]
-    result = game.ai_adjust_difficulty()
-    
-    return jsonify({
-        'message': result,
-        'difficulty': game.difficulty,
-        'level': game.level
-    })
+    return respond(game_service.adjust_difficulty(game_id))
+
+@app.route('/scene/<int:game_id>/actions', methods=['POST'])
+def scene_actions(game_id):
+    """Apply an ordered list of scene actions in one request"""
+    return respond(game_service.scene_actions(game_id, request.json))
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint to verify the API is running"""
-    return jsonify({'status': 'healthy', 'message': 'AI Game API is running'})
+    return respond(game_service.health_check())
 
 @app.route('/leaderboard', methods=['GET'])
 def get_leaderboard():
-    """Get the current leaderboard"""
-    # In a real implementation, this would be stored in a database
-    # For now, we'll return a mock leaderboard
-    mock_leaderboard = [
-        {"user": "Aditi", "points": 45},
-        {"user": "Rohan", "points": 32},
-        {"user": "Priya", "points": 28},
-        {"user": "Amit", "points": 21},
-        {"user": "Sneha", "points": 17}
-    ]
-    return jsonify(mock_leaderboard)
+    """Top players, all-time or for today / this week"""
+    return respond(game_service.get_leaderboard(request.args))
+
+@app.route('/leaderboard/players/<player>', methods=['GET'])
+def get_player_rank(player):
+    """A player's rank and the players around them"""
+    return respond(game_service.get_player_rank(player, request.args))
+
+@app.route('/leaderboard/stream', methods=['GET'])
+def stream_leaderboard():
+    """Server-sent events: the top players, then only their rank changes"""
+    window, error = game_service.leaderboard_window(request.args)
+    if error:
+        return respond(error)
+    frames = game_service.leaderboard_stream.events(window, request.headers.get('Last-Event-ID'))
+    return Response(frames, mimetype='text/event-stream', headers=STREAM_HEADERS)
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5002))
-    app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,126 @@
+"""Async (ASGI) serving mode for the AI Game API
+
+Same routes and JSON shapes as game_api.py; Gemini suggestions are awaited
+instead of pinning a worker thread. Run with any ASGI server, e.g.:
+
+    hypercorn game_asgi:app --bind 0.0.0.0:5002
+    python game_asgi.py
+"""
+from quart import Quart, g, request, jsonify, make_response
+from quart_cors import cors
+import asyncio
+import sys
+import os
+import time
+
+# Add the scripts directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "shared"))
+
+import game_service
+from leaderboard_stream import HEADERS as STREAM_HEADERS
+from metrics import CONTENT_TYPE, get_metrics
+
+app = Quart(__name__)
+# Enable CORS for all routes so the React frontend / Node backend can access it
+app = cors(app, allow_origin="*")
+
+# Request counts and latencies per route, plus stage timings and cache statistics (see shared/metrics.py)
+metrics = get_metrics()
+
+@app.before_request
+async def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+async def record_request_metrics(response):
+    # The URL rule (e.g. /check_scene/<int:game_id>) rather than the path keeps the series bounded
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    metrics.track_request(route, request.method, response.status_code, time.perf_counter() - g.request_start)
+    return response
+
+@app.route("/metrics", methods=["GET"])
+async def get_metrics_text():
+    """Prometheus text-format metrics"""
+    return metrics.render(), 200, {"Content-Type": CONTENT_TYPE}
+
+def respond(result):
+    payload, status = result
+    return jsonify(payload), status
+
+@app.route('/')
+async def home():
+    return respond(game_service.home())
+
+@app.route('/start_game', methods=['POST'])
+async def start_game():
+    """Start a new game session"""
+    data = await request.get_json(silent=True)
+    # Game changes take a per-game lock and write to SQLite; keep them off the event loop
+    return respond(await asyncio.to_thread(game_service.start_game, data))
+
+@app.route('/choose_background/<int:game_id>', methods=['POST'])
+async def choose_background(game_id):
+    """Choose a background for the game"""
+    data = await request.get_json(silent=True)
+    return respond(await asyncio.to_thread(game_service.choose_background, game_id, data))
+
+@app.route('/add_element/<int:game_id>', methods=['POST'])
+async def add_element(game_id):
+    """Add an element to the scene"""
+    data = await request.get_json(silent=True)
+    return respond(await asyncio.to_thread(game_service.add_element, game_id, data))
+
+@app.route('/check_scene/<int:game_id>', methods=['GET'])
+async def check_scene(game_id):
+    """Check if the scene is complete"""
+    return respond(await asyncio.to_thread(game_service.check_scene, game_id))
+
+@app.route('/get_suggestions/<int:game_id>', methods=['GET'])
+async def get_suggestions(game_id):
+    """Get AI-powered suggestions for the next elements"""
+    return respond(await game_service.get_suggestions_async(game_id))
+
+@app.route('/adjust_difficulty/<int:game_id>', methods=['POST'])
+async def adjust_difficulty(game_id):
+    """AI-powered dynamic difficulty adjustment"""
+    return respond(await asyncio.to_thread(game_service.adjust_difficulty, game_id))
+
+@app.route('/scene/<int:game_id>/actions', methods=['POST'])
+async def scene_actions(game_id):
+    """Apply an ordered list of scene actions in one request"""
+    data = await request.get_json(silent=True)
+    # The whole batch is applied under the game's lock and saved in one SQLite write
+    return respond(await asyncio.to_thread(game_service.scene_actions, game_id, data))
+
+@app.route('/health', methods=['GET'])
+async def health_check():
+    """Health check endpoint to verify the API is running"""
+    return respond(game_service.health_check())
+
+@app.route('/leaderboard', methods=['GET'])
+async def get_leaderboard():
+    """Top players, all-time or for today / this week"""
+    # Rankings are read from the shared SQLite store
+    return respond(await asyncio.to_thread(game_service.get_leaderboard, request.args))
+
+@app.route('/leaderboard/players/<player>', methods=['GET'])
+async def get_player_rank(player):
+    """A player's rank and the players around them"""
+    return respond(await asyncio.to_thread(game_service.get_player_rank, player, request.args))
+
+@app.route('/leaderboard/stream', methods=['GET'])
+async def stream_leaderboard():
+    """Server-sent events: the top players, then only their rank changes"""
+    window, error = game_service.leaderboard_window(request.args)
+    if error:
+        return respond(error)
+    frames = game_service.leaderboard_stream.events_async(window, request.headers.get('Last-Event-ID'))
+    response = await make_response(frames, dict(STREAM_HEADERS, **{'Content-Type': 'text/event-stream'}))
+    # The stream stays open until the client leaves
+    response.timeout = None
+    return response
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 5002))
+    app.run(host='0.0.0.0', port=port, debug=False)
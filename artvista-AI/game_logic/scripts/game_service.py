@@ -0,0 +1,278 @@
+"""Request handling shared by the Flask (game_api.py) and ASGI (game_asgi.py) game servers
+
+Each handler takes the route arguments and parsed JSON body and returns
+(payload, status_code); the servers only translate to and from HTTP.
+"""
+import asyncio
+
+from enhanced_drag_drop_game import EnhancedDragDropGame
+from leaderboard import WINDOWS, leaderboards_from_env
+from leaderboard_stream import leaderboard_stream_from_env
+from metrics import get_metrics
+from session_store import session_store_from_env
+
+ENDPOINTS = [
+    '/start_game',
+    '/choose_background/<int:game_id>',
+    '/add_element/<int:game_id>',
+    '/check_scene/<int:game_id>',
+    '/get_suggestions/<int:game_id>',
+    '/adjust_difficulty/<int:game_id>',
+    '/scene/<int:game_id>/actions',
+    '/leaderboard?window=all|daily|weekly&limit=10',
+    '/leaderboard/players/<user_id or user_name>?window=all&radius=2',
+    '/leaderboard/stream?window=all (server-sent events)',
+    '/metrics'
+]
+
+# Game sessions: recently used games in memory, every game in SQLite (see session_store.py)
+sessions = session_store_from_env()
+
+# Best score per player, all-time, daily and weekly, shared by every worker through SQLite (see leaderboard.py)
+leaderboards = leaderboards_from_env()
+
+# Top-N changes pushed to /leaderboard/stream subscribers, once per tick (see leaderboard_stream.py)
+leaderboard_stream = leaderboard_stream_from_env(leaderboards)
+
+# Actions accepted by POST /scene/<game_id>/actions, with the field each one requires
+SCENE_ACTIONS = {
+    'choose_background': 'background',
+    'add_element': 'element',
+    'check_scene': None,
+    'adjust_difficulty': None
+}
+MAX_SCENE_ACTIONS = 50
+
+# Largest limit / radius accepted by the leaderboard endpoints
+MAX_LEADERBOARD_ENTRIES = 100
+
+def game_metrics():
+    """Scrape-time gauges for /metrics"""
+    stats = sessions.stats()
+    yield "active_games", "gauge", {}, stats["cached"]
+    yield "game_session_lookups_total", "counter", {"result": "hit"}, stats["hits"]
+    yield "game_session_lookups_total", "counter", {"result": "load"}, stats["loads"]
+    yield "game_session_evictions_total", "counter", {}, stats["evictions"]
+    for window in WINDOWS:
+        yield "leaderboard_players", "gauge", {"window": window}, leaderboards.players(window)
+    stream = leaderboard_stream.stats()
+    yield "leaderboard_stream_subscribers", "gauge", {}, stream["subscribers"]
+    yield "leaderboard_stream_updates_total", "counter", {}, stream["updates"]
+
+get_metrics().add_collector("games", game_metrics)
+
+def home():
+    return {
+        'message': 'Welcome to ArtVista AI Game API',
+        'endpoints': ENDPOINTS,
+        'method': 'POST for game creation, GET for other endpoints'
+    }, 200
+
+def health_check():
+    return {'status': 'healthy', 'message': 'AI Game API is running'}, 200
+
+def _not_found():
+    return {'error': 'Game not found'}, 404
+
+def _invalid(game_id, error):
+    """400 for a bad request body, unless the game does not exist (404 takes precedence)"""
+    if sessions.get(game_id) is None:
+        return _not_found()
+    return {'error': error}, 400
+
+def _updated(game_id, change):
+    """Apply change(game) under the game's lock and save it; change returns the response payload"""
+    updated = sessions.update(game_id, change)
+    if updated is None:
+        return _not_found()
+    return updated[1], 200
+
+def start_game(data):
+    """Start a new game session"""
+    if data is None:
+        return {'error': 'JSON data is required'}, 400
+    user_name = data.get('user_name')
+    user_id = data.get('user_id')
+
+    if not user_name:
+        return {'error': 'user_name is required'}, 400
+
+    # Create a new game instance
+    game = EnhancedDragDropGame(user_name, user_id)
+    game_id = sessions.create(game)
+
+    return {
+        'game_id': game_id,
+        'message': f'Game started for {user_name}',
+        'difficulty': game.difficulty,
+        'level': game.level
+    }, 200
+
+def choose_background(game_id, data):
+    """Choose a background for the game"""
+    if data is None:
+        return _invalid(game_id, 'JSON data is required')
+    background = data.get('background')
+
+    if not background:
+        return _invalid(game_id, 'background is required')
+
+    return _updated(game_id, lambda game: {
+        'message': game.choose_background(background),
+        'background': game.background
+    })
+
+def add_element(game_id, data):
+    """Add an element to the scene"""
+    if data is None:
+        return _invalid(game_id, 'JSON data is required')
+    element = data.get('element')
+
+    if not element:
+        return _invalid(game_id, 'element is required')
+
+    return _updated(game_id, lambda game: {
+        'message': game.add_element(element),
+        'points': game.points,
+        'elements': list(game.elements)
+    })
+
+def player_key(user_id, user_name):
+    """Leaderboard key of a player: their user id when the game has one, else their name"""
+    return f"user:{user_id}" if user_id is not None else f"name:{user_name}"
+
+def _submit_completed(game, result):
+    """Put a completed check_scene result on the leaderboards"""
+    if result['status'] == 'completed':
+        leaderboards.submit(player_key(game.user_id, game.user_name), game.user_name, result['points'])
+
+def check_scene(game_id):
+    """Check if the scene is complete; completed scenes go on the leaderboards"""
+    updated = sessions.update(game_id, lambda game: game.check_scene())
+    if updated is None:
+        return _not_found()
+    game, result = updated
+    _submit_completed(game, result)
+    return result, 200
+
+def get_suggestions(game_id):
+    """Get AI-powered suggestions for the next elements"""
+    game = sessions.get(game_id)
+    if game is None:
+        return _not_found()
+
+    return game.get_ai_suggestions(), 200
+
+async def get_suggestions_async(game_id):
+    """Non-blocking variant of get_suggestions"""
+    # The lookup may check or load the game from SQLite
+    game = await asyncio.to_thread(sessions.get, game_id)
+    if game is None:
+        return _not_found()
+
+    return await game.get_ai_suggestions_async(), 200
+
+def adjust_difficulty(game_id):
+    """AI-powered dynamic difficulty adjustment"""
+    return _updated(game_id, lambda game: {
+        'message': game.ai_adjust_difficulty(),
+        'difficulty': game.difficulty,
+        'level': game.level
+    })
+
+def _scene_actions(data):
+    """(validated action list from the request body, None), or (None, error message)"""
+    if data is None:
+        return None, 'JSON data is required'
+    actions = data.get('actions')
+    if not isinstance(actions, list) or not actions:
+        return None, 'actions must be a non-empty list'
+    if len(actions) > MAX_SCENE_ACTIONS:
+        return None, f'at most {MAX_SCENE_ACTIONS} actions per request'
+    for position, action in enumerate(actions):
+        if not isinstance(action, dict) or action.get('type') not in SCENE_ACTIONS:
+            return None, f"actions[{position}]: type must be one of {', '.join(SCENE_ACTIONS)}"
+        field = SCENE_ACTIONS[action['type']]
+        if field and not action.get(field):
+            return None, f'actions[{position}]: {field} is required'
+    return actions, None
+
+def _apply_action(game, action):
+    """Result of one scene action: its message, or the full check_scene result"""
+    kind = action['type']
+    if kind == 'choose_background':
+        return {'type': kind, 'message': game.choose_background(action['background'])}
+    if kind == 'add_element':
+        return {'type': kind, 'message': game.add_element(action['element'])}
+    if kind == 'check_scene':
+        return dict(game.check_scene(), type=kind)
+    return {'type': kind, 'message': game.ai_adjust_difficulty()}
+
+def scene_actions(game_id, data):
+    """Apply an ordered list of actions to the scene in one update
+
+    Every action is validated before any is applied, so the game either gets
+    all of them or none. The response lists each action's result followed by
+    the scene's final state once.
+    """
+    actions, error = _scene_actions(data)
+    if error:
+        return _invalid(game_id, error)
+
+    updated = sessions.update(game_id, lambda game: [_apply_action(game, action) for action in actions])
+    if updated is None:
+        return _not_found()
+    game, results = updated
+    for result in results:
+        if result['type'] == 'check_scene':
+            _submit_completed(game, result)
+    return {
+        'results': results,
+        'background': game.background,
+        'elements': list(game.elements),
+        'points': game.points,
+        'badges': list(game.badges),
+        'difficulty': game.difficulty,
+        'level': game.level
+    }, 200
+
+def leaderboard_window(args):
+    """(window from the query string, None), or (None, error response)"""
+    window = args.get('window', 'all')
+    if window not in WINDOWS:
+        return None, ({'error': f"window must be one of {', '.join(WINDOWS)}"}, 400)
+    return window, None
+
+def _leaderboard_args(args, count_name, default):
+    """(window, count) from the query string, or an error response"""
+    window, error = leaderboard_window(args)
+    if error:
+        return None, error
+    try:
+        count = int(args.get(count_name, default))
+    except (TypeError, ValueError):
+        count = -1
+    if not 0 <= count <= MAX_LEADERBOARD_ENTRIES:
+        return None, ({'error': f'{count_name} must be an integer from 0 to {MAX_LEADERBOARD_ENTRIES}'}, 400)
+    return (window, count), None
+
+def get_leaderboard(args):
+    """Top players of a leaderboard window"""
+    parsed, error = _leaderboard_args(args, 'limit', 10)
+    if error:
+        return error
+    window, limit = parsed
+    return leaderboards.top(window, limit), 200
+
+def get_player_rank(player, args):
+    """A player's rank and score, with the players radius ranks above and below them"""
+    parsed, error = _leaderboard_args(args, 'radius', 2)
+    if error:
+        return error
+    window, radius = parsed
+    # Numeric players are user ids, anything else a user name
+    key = f"user:{player}" if player.isdigit() else f"name:{player}"
+    entry = leaderboards.entry(window, key)
+    if entry is None:
+        return {'error': 'Player not on this leaderboard'}, 404
+    return dict(entry, window=window, around=leaderboards.around(window, key, radius)), 200
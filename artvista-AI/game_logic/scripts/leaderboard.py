@@ -0,0 +1,264 @@
+"""Leaderboards of each player's best score: all-time, today and this week
+
+Leaderboard ranks one board in memory: a sorted list of (-points, achieved_at,
+player) next to a player -> entry dict, so a new best, a rank lookup, the top
+N and the entries around a player each take O(log n) (plus the entries read;
+sortedcontainers.SortedList, or without it a plain list with bisect that keeps
+the same results with O(n) inserts).
+
+Leaderboards, used by the game API, keeps every board as rows of a SQLite
+table shared by all worker processes on the same file. Each new best bumps a
+version counter in the same file and stamps the rows it wrote with it; every
+process keeps a Leaderboard per window and, before answering, applies only the
+rows stamped after the version it last saw (one indexed query, none when
+nothing changed). Reads therefore cost O(log n) in every worker, while
+rankings include the completions handled by all of them.
+
+Ties go to whoever reached the score first. Daily and weekly boards start
+empty when their UTC day or ISO week changes.
+"""
+import bisect
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+try:
+    from sortedcontainers import SortedList
+except ModuleNotFoundError:
+    SortedList = None
+
+DEFAULT_LEADERBOARD_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sessions", "leaderboard.sqlite")
+
+WINDOWS = ("all", "daily", "weekly")
+
+
+class _BisectList:
+    """The SortedList methods used here, on a plain list"""
+
+    def __init__(self, items=()):
+        self._items = sorted(items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, item):
+        bisect.insort(self._items, item)
+
+    def remove(self, item):
+        del self._items[self.index(item)]
+
+    def index(self, item):
+        position = bisect.bisect_left(self._items, item)
+        if position == len(self._items) or self._items[position] != item:
+            raise ValueError(f"{item!r} is not in list")
+        return position
+
+    def islice(self, start, stop):
+        return iter(self._items[start:stop])
+
+
+def period_of(window, timestamp):
+    """Period a timestamp falls in: None (all-time), "2026-10-18" (daily) or "2026-W42" (weekly)"""
+    if window == "all":
+        return None
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    if window == "daily":
+        return moment.strftime("%Y-%m-%d")
+    year, week, _ = moment.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class Leaderboard:
+    """Best score per player, ranked"""
+
+    def __init__(self, rows=()):
+        """rows: (player, name, points, achieved_at) with one per player, sorted once"""
+        self._entries = {player: (points, achieved_at, name) for player, name, points, achieved_at in rows}
+        ranked = [(-points, achieved_at, player) for player, (points, achieved_at, _) in self._entries.items()]
+        self._ranked = SortedList(ranked) if SortedList is not None else _BisectList(ranked)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def submit(self, player, name, points, achieved_at):
+        """Record a score; True if it is the player's new best"""
+        entry = self._entries.get(player)
+        if entry is not None:
+            if points <= entry[0]:
+                return False
+            self._ranked.remove((-entry[0], entry[1], player))
+        self._entries[player] = (points, achieved_at, name)
+        self._ranked.add((-points, achieved_at, player))
+        return True
+
+    def _entry(self, rank, player):
+        points, _, name = self._entries[player]
+        return {"rank": rank, "user": name, "points": points}
+
+    def top(self, n):
+        """The n best entries as {"rank", "user", "points"}"""
+        return [entry for _, entry in self.top_players(n)]
+
+    def top_players(self, n):
+        """The n best entries as (player, entry) pairs"""
+        return [(player, self._entry(rank, player))
+                for rank, (_, _, player) in enumerate(self._ranked.islice(0, max(n, 0)), 1)]
+
+    def rank(self, player):
+        """1-based rank of a player, or None if they have no score"""
+        entry = self._entries.get(player)
+        if entry is None:
+            return None
+        return self._ranked.index((-entry[0], entry[1], player)) + 1
+
+    def entry(self, player):
+        rank = self.rank(player)
+        return self._entry(rank, player) if rank is not None else None
+
+    def around(self, player, radius):
+        """Entries from radius ranks above the player to radius below, or None if they have no score"""
+        rank = self.rank(player)
+        if rank is None:
+            return None
+        start = max(rank - 1 - radius, 0)
+        return [self._entry(position, other)
+                for position, (_, _, other) in enumerate(self._ranked.islice(start, rank + radius), start + 1)]
+
+
+class Leaderboards:
+    """The all-time, daily and weekly boards in one SQLite file (path=None keeps them in memory)"""
+
+    def __init__(self, path=None):
+        self.path = path
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False, timeout=30)
+        if path:
+            # WAL lets other workers read while one writes; NORMAL skips the fsync per commit
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS scores (board TEXT NOT NULL, period TEXT NOT NULL, player TEXT NOT NULL, "
+            "name TEXT NOT NULL, points INTEGER NOT NULL, achieved_at REAL NOT NULL, seq INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (board, period, player))"
+        )
+        # Files written before rows carried the version that changed them
+        if "seq" not in [column[1] for column in self._db.execute("PRAGMA table_info(scores)")]:
+            self._db.execute("ALTER TABLE scores ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+        self._db.execute("DROP INDEX IF EXISTS rank_order")
+        self._db.execute("CREATE INDEX IF NOT EXISTS changes ON scores (seq)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._db.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('version', 0)")
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._periods = {}      # board -> period whose predecessors this process has deleted
+        self._boards = {}       # window -> (period, Leaderboard) ranked in this process
+        self._synced = None     # version the boards reflect
+
+    @staticmethod
+    def _period(window, now):
+        # The all-time board is stored under period ""
+        return period_of(window, now) or ""
+
+    def _expire(self, window, period):
+        """Drop a daily or weekly board's earlier periods, once per new period in this process"""
+        if window != "all" and self._periods.get(window) != period:
+            self._db.execute("DELETE FROM scores WHERE board = ? AND period < ?", (window, period))
+            self._periods[window] = period
+
+    def submit(self, player, name, points, achieved_at=None):
+        """Record a finished scene's points on every board; True if it is the player's new all-time best"""
+        achieved_at = time.time() if achieved_at is None else achieved_at
+        improved = {}
+        periods = {window: self._period(window, achieved_at) for window in WINDOWS}
+        with self._lock:
+            for window, period in periods.items():
+                self._expire(window, period)
+            self._db.commit()
+            # Rows written here are stamped with the new version; undone below if nothing improved
+            version = self._db.execute(
+                "UPDATE counters SET value = value + 1 WHERE name = 'version' RETURNING value"
+            ).fetchone()[0]
+            for window, period in periods.items():
+                improved[window] = self._db.execute(
+                    "INSERT INTO scores (board, period, player, name, points, achieved_at, seq) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(board, period, player) DO UPDATE SET "
+                    "name = excluded.name, points = excluded.points, achieved_at = excluded.achieved_at, "
+                    "seq = excluded.seq WHERE excluded.points > points",
+                    (window, period, player, name, points, achieved_at, version)
+                ).rowcount > 0
+            if any(improved.values()):
+                self._db.commit()
+            else:
+                self._db.rollback()
+        return improved["all"]
+
+    def version(self):
+        """Bumped on every new best score by any process sharing the file"""
+        with self._lock:
+            return self._version()
+
+    def _version(self):
+        return self._db.execute("SELECT value FROM counters WHERE name = 'version'").fetchone()[0]
+
+    def _load(self, window, period):
+        return Leaderboard(self._db.execute(
+            "SELECT player, name, points, achieved_at FROM scores WHERE board = ? AND period = ?", (window, period)
+        ))
+
+    def _board(self, window):
+        """This process's Leaderboard for window, brought up to date with the shared file (lock held)"""
+        if window not in WINDOWS:
+            raise ValueError(f"window must be one of {', '.join(WINDOWS)}")
+        version = self._version()
+        now = time.time()
+        for name in WINDOWS:
+            period = self._period(name, now)
+            if self._boards.get(name, (None,))[0] != period:
+                self._boards[name] = (period, self._load(name, period))
+        if version != self._synced:
+            if self._synced is not None:
+                # Rows are only ever replaced by better scores, so applying one twice is harmless
+                for board, period, player, name, points, achieved_at in self._db.execute(
+                        "SELECT board, period, player, name, points, achieved_at FROM scores WHERE seq > ?",
+                        (self._synced,)):
+                    current = self._boards.get(board)
+                    if current is not None and current[0] == period:
+                        current[1].submit(player, name, points, achieved_at)
+            self._synced = version
+        return self._boards[window][1]
+
+    def top_players(self, window, n):
+        """The n best entries as (player, entry) pairs"""
+        with self._lock:
+            return self._board(window).top_players(n)
+
+    def top(self, window, n):
+        """The n best entries as {"rank", "user", "points"}"""
+        with self._lock:
+            return self._board(window).top(n)
+
+    def entry(self, window, player):
+        """{"rank", "user", "points"} for player, or None if they have no score"""
+        with self._lock:
+            return self._board(window).entry(player)
+
+    def around(self, window, player, radius):
+        """Entries from radius ranks above the player to radius below, or None if they have no score"""
+        with self._lock:
+            return self._board(window).around(player, radius)
+
+    def players(self, window):
+        with self._lock:
+            return len(self._board(window))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def leaderboards_from_env():
+    """Leaderboards stored at LEADERBOARD_PATH ("" keeps them in this process's memory only)"""
+    return Leaderboards(os.environ.get("LEADERBOARD_PATH", DEFAULT_LEADERBOARD_PATH) or None)
@@ -0,0 +1,229 @@
+"""Server-sent events of leaderboard changes (GET /leaderboard/stream)
+
+A broadcaster thread in each worker process wakes every tick and reads the
+version counter of the shared score store (see leaderboard.py). If any worker
+submitted a new best score since the last tick (or a day or week rolled over),
+it compares each window's top N with what it last published. Only the entries whose rank or points changed
+and the players who left the top N are sent, so a burst of completed scenes
+within one tick becomes a single update.
+
+Each update is encoded once as an SSE frame and kept in a short shared
+history. Subscribers only remember the sequence number they have reached and
+write the same bytes as everyone else: no per-subscriber queue or
+serialization. Threads (Flask) wait on one Condition; tasks (Quart) on one
+future per event loop, so a publish costs the same for 10 or 10,000 watchers.
+
+A new subscriber first gets the window's full top N (event "leaderboard"),
+then "delta" events. Event ids carry a token of the process that sent them: a
+client reconnecting to the same process with Last-Event-ID still in the
+history is replayed what it missed; one that fell further behind, or lands on
+another worker or a restarted one, gets the full top N again.
+"""
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from leaderboard import WINDOWS, period_of
+
+# Updates kept for slow or reconnecting subscribers
+HISTORY = 256
+
+# Idle subscribers get a comment line this often so proxies keep the connection open
+KEEPALIVE_SECONDS = 25
+KEEPALIVE = b": ping\n\n"
+
+HEADERS = {"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"}
+
+
+def sse_frame(event, data, event_id):
+    payload = json.dumps(data, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode()
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class LeaderboardStream:
+    """Publishes the top `top` players of every window to SSE subscribers, at most once per tick"""
+
+    def __init__(self, leaderboards, top=10, tick=1.0):
+        self.leaderboards = leaderboards
+        self.top = top
+        self.tick = tick
+        self.subscribers = 0
+        self.updates = 0
+        # Event ids are "<token>.<seq>"; ids from another process or before a restart are never replayed
+        self._token = os.urandom(4).hex()
+        self._seq = 0
+        self._events = deque(maxlen=HISTORY)    # (seq, window, frame), oldest first
+        self._snapshots = {}                    # window -> full top N frame as of its last update
+        self._published = {}                    # window -> {player: entry} last sent
+        self._version = None
+        self._periods = None
+        self._condition = threading.Condition()
+        self._async_waiters = {}                # event loop -> future resolved by the next update
+        self._refresh_lock = threading.Lock()
+        self._broadcaster = None
+
+    def _start(self):
+        """Build the first snapshots and start the broadcaster on the first subscriber"""
+        with self._refresh_lock:
+            if self._broadcaster is not None:
+                return
+            self._refresh()
+            self._broadcaster = threading.Thread(target=self._broadcast_loop, name="leaderboard-stream", daemon=True)
+            self._broadcaster.start()
+
+    def _broadcast_loop(self):
+        while True:
+            time.sleep(self.tick)
+            try:
+                with self._refresh_lock:
+                    self._refresh()
+            except Exception as e:
+                print(f"Leaderboard stream error: {e}")
+
+    def _refresh(self):
+        """Publish what changed in each window's top N since the last refresh"""
+        # Read from the shared file, so new bests submitted by other workers are seen too
+        version = self.leaderboards.version()
+        now = time.time()
+        periods = {window: period_of(window, now) for window in WINDOWS}
+        if version == self._version and periods == self._periods:
+            return
+        self._version, self._periods = version, periods
+
+        updates = []
+        for window in WINDOWS:
+            top = self.leaderboards.top_players(window, self.top)
+            current = dict(top)
+            previous = self._published.get(window)
+            if previous == current:
+                continue
+            self._published[window] = current
+            full = [dict(entry, player=player) for player, entry in top]
+            delta = None
+            if previous is not None:
+                delta = {"window": window,
+                         "changed": [dict(entry, player=player) for player, entry in top
+                                     if previous.get(player) != entry],
+                         "removed": [player for player in previous if player not in current]}
+            updates.append((window, delta, full))
+        if not updates:
+            return
+
+        with self._condition:
+            for window, delta, full in updates:
+                if delta is not None:
+                    self._seq += 1
+                    self._events.append((self._seq, window, sse_frame("delta", delta, self._event_id())))
+                self._snapshots[window] = sse_frame("leaderboard", {"window": window, "top": full}, self._event_id())
+            self.updates += 1
+            self._condition.notify_all()
+            for loop, future in self._async_waiters.items():
+                try:
+                    loop.call_soon_threadsafe(_resolve, future)
+                except RuntimeError:
+                    pass    # the loop has closed
+            self._async_waiters.clear()
+
+    def _event_id(self):
+        return f"{self._token}.{self._seq}"
+
+    def _open(self, last_id):
+        """Sequence number a new subscriber starts after: last_id if it can still be replayed"""
+        self._start()
+        with self._condition:
+            self.subscribers += 1
+            token, _, seq = (last_id or "").partition(".")
+            if token != self._token or not seq.isdigit():
+                return None
+            last_id = int(seq)
+            oldest = self._events[0][0] if self._events else self._seq + 1
+            return last_id if oldest - 1 <= last_id <= self._seq else None
+
+    def _close(self):
+        with self._condition:
+            self.subscribers -= 1
+
+    def _pending(self, window, seq):
+        """(frames for window after seq, new seq); seq None means the subscriber needs the full top N"""
+        if seq is not None and seq >= self._seq:
+            return [], seq
+        oldest = self._events[0][0] if self._events else self._seq + 1
+        if seq is None or seq < oldest - 1:
+            return [self._snapshots[window]], self._seq
+        frames = [frame for event_seq, event_window, frame
+                  in itertools.islice(self._events, seq - oldest + 1, None) if event_window == window]
+        return frames, self._seq
+
+    def events(self, window, last_id=None):
+        """SSE frames for one thread-served subscriber of window, until the client disconnects"""
+        seq = self._open(last_id)
+        written = time.monotonic()
+        try:
+            while True:
+                with self._condition:
+                    if seq is not None and seq >= self._seq:
+                        self._condition.wait(KEEPALIVE_SECONDS)
+                    frames, seq = self._pending(window, seq)
+                if frames:
+                    yield b"".join(frames)
+                elif time.monotonic() - written >= KEEPALIVE_SECONDS:
+                    yield KEEPALIVE
+                else:
+                    continue    # an update for another window
+                written = time.monotonic()
+        finally:
+            self._close()
+
+    async def events_async(self, window, last_id=None):
+        """Async variant of events() for ASGI servers"""
+        # The first subscriber builds the snapshots from SQLite, and later ones may wait for a refresh
+        seq = await asyncio.to_thread(self._open, last_id)
+        loop = asyncio.get_running_loop()
+        written = time.monotonic()
+        try:
+            while True:
+                waiter = None
+                with self._condition:
+                    if seq is not None and seq >= self._seq:
+                        waiter = self._async_waiters.get(loop)
+                        if waiter is None:
+                            waiter = self._async_waiters[loop] = loop.create_future()
+                if waiter is not None:
+                    try:
+                        # shield: a timeout must not cancel the future other subscribers share
+                        await asyncio.wait_for(asyncio.shield(waiter), KEEPALIVE_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                with self._condition:
+                    frames, seq = self._pending(window, seq)
+                if frames:
+                    yield b"".join(frames)
+                elif time.monotonic() - written >= KEEPALIVE_SECONDS:
+                    yield KEEPALIVE
+                else:
+                    continue
+                written = time.monotonic()
+        finally:
+            self._close()
+
+    def stats(self):
+        with self._condition:
+            return {"subscribers": self.subscribers, "updates": self.updates}
+
+
+def leaderboard_stream_from_env(leaderboards):
+    """LeaderboardStream configured by LEADERBOARD_STREAM_TOP and LEADERBOARD_STREAM_TICK_MS"""
+    return LeaderboardStream(
+        leaderboards,
+        top=int(os.environ.get("LEADERBOARD_STREAM_TOP", 10)),
+        tick=float(os.environ.get("LEADERBOARD_STREAM_TICK_MS", 1000)) / 1000,
+    )
@@ -0,0 +1,307 @@
+"""Game sessions: an in-memory LRU/TTL tier over an optional SQLite tier
+
+The memory tier keeps recently used EnhancedDragDropGame objects; games idle
+for longer than idle_ttl, or beyond max_entries, are dropped from it. With a
+path, every saved game is also written as compact JSON to SQLite, so sessions
+survive restarts and every worker process opened on the same files sees the
+same games. Each row carries a version bumped on every save: get() serves a
+cached game for up to `fresh_for` seconds after its version was last confirmed,
+then checks it is still the stored one, so a game changed by another worker is
+reloaded instead of served stale for longer than that.
+
+Games are spread over `shards` database files by id, so writers for different
+games rarely wait on the same file lock.
+
+Ids come from a counter row in the first shard, incremented in one SQLite
+write, so concurrent start_game calls in any thread or worker get distinct ids
+that are never reused. Changes go through update(), which holds a per-game lock
+in this process and saves only if nobody else saved the game meanwhile; when
+another worker did, the change is re-applied to the newer state. Changes are
+made to a copy, so a change that fails or loses the race never reaches the
+cached game.
+"""
+import copy
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from enhanced_drag_drop_game import EnhancedDragDropGame
+
+DEFAULT_SESSION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sessions", "games.sqlite")
+
+# Rows untouched for longer than the retention period are deleted once per this many saves
+PURGE_EVERY_SAVES = 1000
+
+# Per-game locks are striped: games whose ids are equal modulo this share a lock
+LOCK_STRIPES = 64
+
+
+def shard_paths(path, shards):
+    """games.sqlite, or games-0.sqlite ... games-<shards - 1>.sqlite"""
+    if shards <= 1:
+        return [path]
+    root, ext = os.path.splitext(path)
+    return [f"{root}-{shard}{ext}" for shard in range(shards)]
+
+
+class SessionShard:
+    """One SQLite file of game rows (id, state JSON, version, updated_at)"""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # WAL lets other processes read while one writes; NORMAL skips the fsync per commit
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS games ("
+            "id INTEGER PRIMARY KEY, state TEXT NOT NULL, version INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def version(self, game_id):
+        with self._lock:
+            row = self._db.execute("SELECT version FROM games WHERE id = ?", (game_id,)).fetchone()
+        return row[0] if row else None
+
+    def load(self, game_id):
+        """(state dict, version), or None"""
+        with self._lock:
+            row = self._db.execute("SELECT state, version FROM games WHERE id = ?", (game_id,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def save(self, game_id, state, version=None):
+        """Write state and return its new version
+
+        With version, only replace the row if it still has that version, and
+        return None otherwise (another writer saved or deleted it).
+        """
+        payload = json.dumps(state, separators=(",", ":"))
+        with self._lock:
+            if version is None:
+                row = self._db.execute(
+                    "INSERT INTO games (id, state, version, updated_at) VALUES (?, ?, 1, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET state = excluded.state, version = version + 1, "
+                    "updated_at = excluded.updated_at RETURNING version",
+                    (game_id, payload, time.time())
+                ).fetchone()
+            else:
+                row = self._db.execute(
+                    "UPDATE games SET state = ?, version = version + 1, updated_at = ? "
+                    "WHERE id = ? AND version = ? RETURNING version",
+                    (payload, time.time(), game_id, version)
+                ).fetchone()
+            self._db.commit()
+        return row[0] if row else None
+
+    def max_id(self):
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(MAX(id), 0) FROM games").fetchone()[0]
+
+    def next_id(self, start):
+        """Increment the game id counter (created at start if missing) and return it"""
+        with self._lock:
+            self._db.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('game_id', ?)", (start,))
+            row = self._db.execute(
+                "UPDATE counters SET value = value + 1 WHERE name = 'game_id' RETURNING value"
+            ).fetchone()
+            self._db.commit()
+        return row[0]
+
+    def delete(self, game_id):
+        with self._lock:
+            self._db.execute("DELETE FROM games WHERE id = ?", (game_id,))
+            self._db.commit()
+
+    def purge(self, older_than):
+        with self._lock:
+            self._db.execute("DELETE FROM games WHERE updated_at < ?", (older_than,))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class SessionStore:
+    """Thread-safe game_id -> EnhancedDragDropGame store
+
+    Games returned by get() are shared with other requests in this process
+    and must not be modified; create() and update() save changes.
+    """
+
+    def __init__(self, max_entries=10000, idle_ttl=1800, path=None, shards=1, retention=7 * 86400, fresh_for=1.0):
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.fresh_for = fresh_for
+        self.retention = retention
+        self.shards = [SessionShard(p) for p in shard_paths(path, shards)] if path else []
+        # game_id -> (game, version, last_used, checked_at), least recently used first; checked_at is
+        # when version was last known to be the stored one
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._game_locks = [threading.RLock() for _ in range(LOCK_STRIPES)]
+        self._ids = itertools.count(1)  # memory-only stores
+        # The durable counter starts after any game saved before it existed
+        self._first_id = max(shard.max_id() for shard in self.shards) if self.shards else 0
+        self._saves = 0
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def _shard(self, game_id):
+        return self.shards[game_id % len(self.shards)]
+
+    def _remember(self, game_id, game, version, now, checked_at):
+        self._entries[game_id] = (game, version, now, checked_at)
+        self._entries.move_to_end(game_id)
+        # Least recently used first: drop idle entries from the front, then any over the limit
+        while self._entries:
+            oldest_id, (_, _, last_used, _) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and now - last_used <= self.idle_ttl:
+                break
+            del self._entries[oldest_id]
+            self.evictions += 1
+
+    def _lookup(self, game_id, trust_cached=False):
+        """(game, version) or (None, None); version is None without a durable tier
+
+        A cached game is returned without asking SQLite while its version was
+        confirmed less than fresh_for seconds ago, or always with trust_cached
+        (for update(), whose conditional save catches a stale version anyway).
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(game_id)
+            if entry is not None and now - entry[2] > self.idle_ttl:
+                del self._entries[game_id]
+                self.evictions += 1
+                entry = None
+            if not self.shards:
+                if entry is None:
+                    return None, None
+                self._remember(game_id, entry[0], entry[1], now, now)
+                self.hits += 1
+                return entry[0], entry[1]
+            if entry is not None and (trust_cached or now - entry[3] < self.fresh_for):
+                self._remember(game_id, entry[0], entry[1], now, entry[3])
+                self.hits += 1
+                return entry[0], entry[1]
+
+        shard = self._shard(game_id)
+        if entry is not None and shard.version(game_id) == entry[1]:
+            with self._lock:
+                self._remember(game_id, entry[0], entry[1], now, now)
+                self.hits += 1
+            return entry[0], entry[1]
+        loaded = shard.load(game_id)
+        with self._lock:
+            if loaded is None:
+                self._entries.pop(game_id, None)
+                return None, None
+            state, version = loaded
+            game = EnhancedDragDropGame.from_state(state)
+            self._remember(game_id, game, version, now, now)
+            self.loads += 1
+        return game, version
+
+    def get(self, game_id):
+        """The game, or None if it does not exist (or was evicted without a durable tier)
+
+        Read only; change games through update().
+        """
+        return self._lookup(game_id)[0]
+
+    def lock(self, game_id):
+        """Re-entrant lock serializing changes to one game within this process"""
+        return self._game_locks[game_id % LOCK_STRIPES]
+
+    def next_id(self):
+        """A game id never handed out before, by any thread or worker sharing the store"""
+        if not self.shards:
+            return next(self._ids)
+        return self.shards[0].next_id(self._first_id)
+
+    def create(self, game):
+        """Save a new game under a fresh id and return the id"""
+        game_id = self.next_id()
+        self._save(game_id, game, None)
+        return game_id
+
+    def update(self, game_id, change):
+        """Apply change(game) and save the game; returns (game, change's result), or None if not found
+
+        Changes to one game are serialized in this process. When another
+        worker saved the game after it was read, the change is applied again
+        to the newer state, so change must only modify the game. The cached
+        game is only replaced once the change is saved.
+        """
+        with self.lock(game_id):
+            while True:
+                cached, version = self._lookup(game_id, trust_cached=True)
+                if cached is None:
+                    return None
+                game = copy.deepcopy(cached)
+                result = change(game)
+                if self._save(game_id, game, version):
+                    return game, result
+                # Lost the race: the cached game is stale, so reload it
+                with self._lock:
+                    self._entries.pop(game_id, None)
+
+    def _save(self, game_id, game, version):
+        """Write game through both tiers; False if the stored version is no longer version"""
+        if self.shards:
+            shard = self._shard(game_id)
+            version = shard.save(game_id, game.to_state(), version)
+            if version is None:
+                return False
+            self._saves += 1
+            if self._saves % PURGE_EVERY_SAVES == 0:
+                shard.purge(time.time() - self.retention)
+        with self._lock:
+            now = time.time()
+            self._remember(game_id, game, version, now, now)
+        return True
+
+    def delete(self, game_id):
+        with self._lock:
+            self._entries.pop(game_id, None)
+        if self.shards:
+            self._shard(game_id).delete(game_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached": len(self._entries),
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "persistent": bool(self.shards)
+            }
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+
+def session_store_from_env():
+    """SessionStore configured from GAME_SESSION_* environment variables
+
+    GAME_SESSION_PATH="" keeps sessions in memory only.
+    """
+    path = os.environ.get("GAME_SESSION_PATH", DEFAULT_SESSION_PATH)
+    return SessionStore(
+        max_entries=int(os.environ.get("GAME_SESSION_MAX_ENTRIES", 10000)),
+        idle_ttl=float(os.environ.get("GAME_SESSION_IDLE_SECONDS", 1800)),
+        path=path or None,
+        shards=int(os.environ.get("GAME_SESSION_SHARDS", 4)),
+        retention=float(os.environ.get("GAME_SESSION_RETENTION_SECONDS", 7 * 86400)),
+        fresh_for=float(os.environ.get("GAME_SESSION_FRESH_SECONDS", 1.0)),
+    )
@@ -0,0 +1,264 @@
+import copy
+import json
+import os
+import pickle
+import threading
+import time
+from collections import namedtuple
+
+from item_store import as_item_store
+
+try:
+    import ijson
+except ModuleNotFoundError:
+    ijson = None
+
+_here = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATASET_PATH = os.path.join(_here, "..", "ai_suggestions", "dataset", "art_suggestions.json")
+# Deployments that copy the services without the artvista-AI/ prefix
+ALTERNATE_DATASET_PATH = os.path.join(_here, "..", "..", "artvista-AI", "ai_suggestions", "dataset", "art_suggestions.json")
+
+SNAPSHOT_VERSION = 2
+
+# Catalog sections held column-oriented in memory, with their categorical fields
+COLUMNAR_SECTIONS = {"artworks": ("style", "medium"), "tutorials": ("style",)}
+
+# Served when the dataset file is missing (e.g. minimal deployments)
+FALLBACK_DATASET = {
+    "users": [
+        {"id": 1, "name": "Aditi", "preferences": ["landscape", "watercolor", "nature"], "interactions": {"clicked_artworks": [], "completed_tutorials": []}},
+        {"id": 2, "name": "Rohan", "preferences": ["urban", "abstract", "oil"], "interactions": {"clicked_artworks": [], "completed_tutorials": []}}
+    ],
+    "artworks": [
+        {"id": "A1", "title": "Sunset Valley", "style": "landscape", "medium": "watercolor", "artist": "Aditi Rao", "image": "https://images.unsplash.com/photo-1579783902614-a3f140026229?w=500&q=80", "description": "A tranquil valley at sunset."},
+        {"id": "A2", "title": "City Rush", "style": "urban", "medium": "oil", "artist": "Rohan Sharma", "image": "https://images.unsplash.com/photo-1578301978693-85fa9c0320b9?w=500&q=80", "description": "The vibrant energy of a metropolis."},
+        {"id": "A3", "title": "Dream Shapes", "style": "abstract", "medium": "digital", "artist": "Priya Singh", "image": "https://images.unsplash.com/photo-1541701494587-cb58502866ab?w=500&q=80", "description": "An ethereal abstract composition."}
+    ],
+    "tutorials": [
+        {"id": "T1", "title": "How to paint landscapes with watercolor", "style": "landscape", "description": "Master the basics of outdoor painting.", "duration": "20 min", "level": "Beginner"},
+        {"id": "T2", "title": "Urban sketching for beginners", "style": "urban", "description": "Capture the city in your sketchbook.", "duration": "15 min", "level": "Beginner"},
+        {"id": "T3", "title": "Abstract art basics", "style": "abstract", "description": "Explore the world of non-representational art.", "duration": "25 min", "level": "Intermediate"}
+    ]
+}
+
+
+def dataset_path():
+    """DATASET_PATH, else the repo's art_suggestions.json"""
+    path = os.environ.get("DATASET_PATH")
+    if path:
+        return path
+    if os.path.exists(DEFAULT_DATASET_PATH) or not os.path.exists(ALTERNATE_DATASET_PATH):
+        return DEFAULT_DATASET_PATH
+    return ALTERNATE_DATASET_PATH
+
+
+def snapshot_path(path=None):
+    """DATASET_SNAPSHOT_PATH, else the dataset path with a .snapshot extension"""
+    return os.environ.get("DATASET_SNAPSHOT_PATH") or os.path.splitext(path or dataset_path())[0] + ".snapshot"
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def read_json(path, streaming=None):
+    """Parse a dataset JSON file; large files stream through ijson when it is installed"""
+    if streaming is None:
+        # Opt-in: ijson avoids holding the raw text but parses slower than json.load
+        min_bytes = os.environ.get("DATASET_STREAMING_MIN_BYTES")
+        streaming = ijson is not None and min_bytes is not None and os.path.getsize(path) >= int(min_bytes)
+    with open(path, "rb") as f:
+        if streaming:
+            # Builds one top-level section at a time without holding the raw text
+            return dict(ijson.kvitems(f, "", use_float=True))
+        return json.load(f)
+
+
+def columnar(data):
+    """data with its catalog sections converted to ItemStores (see item_store.py)"""
+    converted = dict(data)
+    for section, categorical in COLUMNAR_SECTIONS.items():
+        if section in converted:
+            converted[section] = as_item_store(converted[section], categorical)
+    return converted
+
+
+def read_snapshot(path, source=None):
+    """Data from a snapshot written by write_snapshot, or None if missing or older than source"""
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            if header.get("version") != SNAPSHOT_VERSION:
+                return None
+            if source is not None and os.path.exists(source) and header.get("source") != _source_stamp(source):
+                print(f"Dataset snapshot {path} is out of date. Reading {source} instead.")
+                return None
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _share_strings(value, pool):
+    """Copy of value where equal short strings are one object, so pickle stores them once"""
+    if isinstance(value, dict):
+        return {key: _share_strings(item, pool) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_share_strings(item, pool) for item in value]
+    if isinstance(value, str) and len(value) <= 64:
+        return pool.setdefault(value, value)
+    return value
+
+
+def write_snapshot(data, path, source=None):
+    """Write data as a binary snapshot stamped with the source file's size and mtime"""
+    data = _share_strings(data, {})
+    header = {"version": SNAPSHOT_VERSION, "source": _source_stamp(source) if source else None}
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def read_dataset(path=None):
+    """Read the dataset from its snapshot if current, else from JSON, else the fallback"""
+    path = path or dataset_path()
+    try:
+        data = read_snapshot(snapshot_path(path), path)
+        if data is not None:
+            return data
+        if os.path.exists(path):
+            return columnar(read_json(path))
+    except Exception as e:
+        print(f"Dataset load error: {e}")
+    return columnar(copy.deepcopy(FALLBACK_DATASET))
+
+
+def _read_strict(path):
+    """Like read_dataset, but raises instead of falling back, so a reload never swaps in bad data"""
+    data = read_snapshot(snapshot_path(path), path)
+    if data is None:
+        data = columnar(read_json(path))
+    return data
+
+
+def _stamp(path):
+    try:
+        return _source_stamp(path)
+    except OSError:
+        return None
+
+
+DatasetVersion = namedtuple("DatasetVersion", ["version", "data", "built", "stamp"])
+
+
+class DatasetHolder:
+    """The current dataset and everything derived from it, swapped in one step on reload
+
+    Services register builders (e.g. index construction); reload() reads the file
+    and runs every builder before replacing the current version, so readers keep
+    the old version until the new one is complete and never see a mix.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or dataset_path()
+        self._reload_lock = threading.Lock()
+        self._builders = {}
+        self._watcher = None
+        self._failed_stamp = None
+        stamp = _stamp(self.path)
+        self._current = DatasetVersion(1, read_dataset(self.path), {}, stamp)
+
+    @property
+    def version(self):
+        return self._current.version
+
+    @property
+    def data(self):
+        return self._current.data
+
+    def get(self, name):
+        """What the builder registered as name made from the current dataset"""
+        return self._current.built[name]
+
+    def register(self, name, build):
+        """Derive build(data) now and again on every reload; returns the first result"""
+        with self._reload_lock:
+            current = self._current
+            built = dict(current.built)
+            built[name] = build(current.data)
+            self._builders[name] = build
+            self._current = current._replace(built=built)
+            return built[name]
+
+    def reload(self, force=False):
+        """Re-read the dataset if the file changed (or always, with force); True if swapped"""
+        with self._reload_lock:
+            current = self._current
+            stamp = _stamp(self.path)
+            if not force and stamp in (current.stamp, self._failed_stamp):
+                return False
+            start = time.perf_counter()
+            try:
+                data = _read_strict(self.path)
+                built = {name: build(data) for name, build in self._builders.items()}
+            except Exception as e:
+                # Not retried until the file changes again (e.g. a write still in progress)
+                self._failed_stamp = stamp
+                print(f"Dataset reload error: {e}. Keeping version {current.version}.")
+                return False
+            self._current = DatasetVersion(current.version + 1, data, built, stamp)
+        print(f"Dataset reloaded as version {current.version + 1} in {time.perf_counter() - start:.2f}s")
+        return True
+
+    def watch(self, interval=5):
+        """Poll the dataset file every interval seconds and reload when it changes"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.reload()
+
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=loop, name="dataset-watcher", daemon=True)
+            self._watcher.start()
+
+
+_holder = None
+_lock = threading.Lock()
+
+
+def get_holder():
+    """Process-wide holder; DATASET_WATCH_SECONDS turns on file watching"""
+    global _holder
+    with _lock:
+        if _holder is None:
+            _holder = DatasetHolder()
+            interval = float(os.environ.get("DATASET_WATCH_SECONDS", 0))
+            if interval > 0:
+                _holder.watch(interval)
+        return _holder
+
+
+def load_dataset():
+    """The current dataset, read once per process and shared by every module; treat it as read-only"""
+    return get_holder().data
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a binary snapshot of the dataset for faster startup")
+    parser.add_argument("--path", default=None, help="dataset JSON (default: DATASET_PATH or the repo dataset)")
+    parser.add_argument("--snapshot", default=None, help="output path (default: <dataset>.snapshot)")
+    args = parser.parse_args()
+
+    path = args.path or dataset_path()
+    output = args.snapshot or snapshot_path(path)
+    start = time.perf_counter()
+    write_snapshot(columnar(read_json(path)), output, source=path)
+    print(f"snapshot of {path} written to {output} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
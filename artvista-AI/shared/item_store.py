@@ -0,0 +1,219 @@
+import heapq
+from array import array
+from collections import defaultdict
+from collections.abc import Sequence
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+
+class TextColumn:
+    """Strings packed into one UTF-8 buffer with per-row offsets (about 12 bytes per row plus the text)"""
+
+    def __init__(self, values):
+        parts = []
+        self.starts = array("q")
+        self.lengths = array("i")     # -1 for None
+        offset = 0
+        for value in values:
+            if value is None:
+                self.starts.append(offset)
+                self.lengths.append(-1)
+                continue
+            encoded = value.encode("utf-8")
+            parts.append(encoded)
+            self.starts.append(offset)
+            self.lengths.append(len(encoded))
+            offset += len(encoded)
+        self.buffer = b"".join(parts)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, row):
+        length = self.lengths[row]
+        if length < 0:
+            return None
+        start = self.starts[row]
+        return self.buffer[start:start + length].decode("utf-8")
+
+
+class ItemStore(Sequence):
+    """Column-oriented catalog records (artworks, tutorials)
+
+    Each field is one column instead of a key in every record; categorical
+    fields such as style and medium are stored as int codes into a small list
+    of names, and other text fields are packed into one buffer per field
+    (TextColumn). Records are materialized as dicts only when read (store[row],
+    get(item_id)), so a large catalog costs a few list slots per item. Keys a
+    record lacked (or held null) are omitted from its materialized dict.
+    """
+
+    def __init__(self, records=(), categorical=()):
+        self.fields = []                    # field names in order of first appearance
+        self.columns = {}                   # field -> list of values (None when absent)
+        self.categorical = tuple(categorical)
+        self.categories = {field: [] for field in self.categorical}        # field -> code -> value
+        self.category_codes = {field: {} for field in self.categorical}    # field -> value -> code
+        self.codes = {field: array("i") for field in self.categorical}     # field -> code per row (-1 if absent)
+        self.positions = {}                 # id -> row
+
+        for row, record in enumerate(records):
+            for field in record:
+                if field not in self.columns and field not in self.codes:
+                    self.columns[field] = [None] * row
+                if field not in self.fields:
+                    self.fields.append(field)
+            for field in self.categorical:
+                self.codes[field].append(self._code(field, record.get(field)))
+            for field, column in self.columns.items():
+                column.append(record.get(field))
+            self.positions[record["id"]] = row
+        self.ids = self.columns.get("id", [])
+        self.postings = None
+
+        # Pack text columns; ids stay a list since positions already holds those strings
+        for field, column in self.columns.items():
+            if field != "id" and all(value is None or isinstance(value, str) for value in column):
+                self.columns[field] = TextColumn(column)
+
+    def _postings(self):
+        """field -> code -> rows; built on first use, only when scoring without NumPy"""
+        if self.postings is None:
+            postings = {field: defaultdict(list) for field in self.categorical}
+            for field in self.categorical:
+                for row, code in enumerate(self.codes[field]):
+                    if code >= 0:
+                        postings[field][code].append(row)
+            self.postings = postings
+        return self.postings
+
+    def _code(self, field, value):
+        if value is None:
+            return -1
+        codes = self.category_codes[field]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.categories[field])
+            self.categories[field].append(value)
+        return code
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self.record(r) for r in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("item row out of range")
+        return self.record(row)
+
+    def __contains__(self, record):
+        return isinstance(record, dict) and record.get("id") in self.positions and self.get(record["id"]) == record
+
+    def value(self, row, field):
+        """One field of one record without building the dict"""
+        if field in self.codes:
+            code = self.codes[field][row]
+            return self.categories[field][code] if code >= 0 else None
+        column = self.columns.get(field)
+        return column[row] if column is not None else None
+
+    def record(self, row):
+        """The full record at row as a new dict"""
+        record = {}
+        for field in self.fields:
+            value = self.value(row, field)
+            if value is not None:
+                record[field] = value
+        return record
+
+    def get(self, item_id):
+        """The record with this id, or None"""
+        row = self.positions.get(item_id)
+        return None if row is None else self.record(row)
+
+    def rows(self, rows):
+        """Lazy sequence of the records at the given rows"""
+        return ItemRows(self, rows)
+
+    def rank(self, values, weights, limit=None):
+        """Rows where any categorical field in weights takes one of values, best first
+
+        A row scores weights[field] for every field whose value is in values;
+        ties keep dataset order. With a limit, only the best limit rows are
+        selected (argpartition, or a heap without NumPy) rather than sorting
+        every match. Returns a list of row numbers.
+        """
+        if limit is not None and limit <= 0:
+            return []
+        if np is not None:
+            return self._rank_vectorized(values, weights, limit)
+
+        postings = self._postings()
+        scores = defaultdict(int)
+        for field, points in weights.items():
+            for value in values:
+                code = self.category_codes[field].get(value)
+                if code is not None:
+                    for row in postings[field][code]:
+                        scores[row] += points
+        if limit is not None and len(scores) > limit:
+            return heapq.nsmallest(limit, scores, key=lambda row: (-scores[row], row))
+        return sorted(scores, key=lambda row: (-scores[row], row))
+
+    def _rank_vectorized(self, values, weights, limit):
+        scores = None
+        for field, points in weights.items():
+            category_codes = self.category_codes[field]
+            wanted = [category_codes[v] for v in values if v in category_codes]
+            if not wanted:
+                continue
+            # Points per category (the preference vector against one-hot codes), gathered
+            # for every row at once; the extra last slot is read by code -1 and stays 0
+            lookup = np.zeros(len(self.categories[field]) + 1, dtype=np.int32)
+            lookup[wanted] = points
+            field_scores = lookup[np.frombuffer(self.codes[field], dtype=np.int32)]
+            if scores is None:
+                scores = field_scores
+            else:
+                scores += field_scores
+        if scores is None:
+            return []
+
+        rows = np.flatnonzero(scores)
+        row_scores = scores[rows]
+        if limit is not None and len(rows) > limit:
+            # One key ordering by score, then earlier row: partition out the best limit
+            key = row_scores.astype(np.int64) * len(self) - rows
+            best = np.argpartition(-key, limit - 1)[:limit]
+            rows, row_scores = rows[best], row_scores[best]
+        order = np.lexsort((rows, -row_scores))
+        return rows[order].tolist()
+
+
+class ItemRows(Sequence):
+    """Records at a list of rows of an ItemStore, built on access"""
+
+    def __init__(self, store, rows):
+        self.store = store
+        self.row_numbers = rows
+
+    def __len__(self):
+        return len(self.row_numbers)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.store.record(row) for row in self.row_numbers[i]]
+        return self.store.record(self.row_numbers[i])
+
+
+def as_item_store(records, categorical=()):
+    """records as an ItemStore (returned unchanged if it already is one)"""
+    if isinstance(records, ItemStore):
+        return records
+    return ItemStore(records, categorical)
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def canonical_preferences(preferences):
+    """Order- and case-insensitive form of a preference list"""
+    return sorted({str(p).strip().lower() for p in preferences or []})
+
+
+def canonical_elements(elements):
+    """Sorted multiset of scene elements (duplicates kept)"""
+    return sorted(str(e).strip() for e in elements or [])
+
+
+def make_key(namespace, **parts):
+    """Stable cache key for a prompt built from already-canonicalized parts"""
+    payload = json.dumps({"namespace": namespace, "parts": parts}, sort_keys=True, separators=(",", ":"))
+    return namespace + ":" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Thread-safe TTL + LRU cache for parsed LLM responses, optionally persisted to SQLite
+
+    Cached values are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600, path=None, max_disk_entries=100000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.path = path
+        self._entries = OrderedDict()   # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db = None
+        # Rows may pass max_disk_entries by this many before a trim, so most writes skip it
+        self._trim_slack = max(1, max_disk_entries // 100)
+        self._disk_rows = 0     # rows on disk, counting a replaced key as new
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_stored_at ON llm_cache (stored_at)")
+            self._db.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+            self._disk_rows = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def persistent(self):
+        """True if misses in memory fall through to the SQLite tier"""
+        return self._db is not None
+
+    def _remember(self, key, expires_at, value):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, memory_only=False):
+        """Return the cached value, or None on a miss or expired entry
+
+        memory_only skips the SQLite tier (and does not count a miss), so async
+        callers can try memory inline and read the disk from a thread.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            if memory_only:
+                return None
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        """Store a JSON-serializable value"""
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, expires_at, value)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, stored_at) VALUES (?, ?, ?, ?)",
+                        (key, json.dumps(value), expires_at, now)
+                    )
+                    self._disk_rows += 1
+                    if self._disk_rows > self.max_disk_entries + self._trim_slack:
+                        self._trim(now)
+                    self._db.commit()
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    print(f"LLM cache write error: {e}")
+
+    def _trim(self, now):
+        """Drop expired rows, then the oldest beyond max_disk_entries (lock held)"""
+        self._db.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+        self._db.execute(
+            "DELETE FROM llm_cache WHERE stored_at < ("
+            "SELECT stored_at FROM llm_cache ORDER BY stored_at DESC LIMIT 1 OFFSET ?)",
+            (self.max_disk_entries - 1,)
+        )
+        self._disk_rows = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+                self._disk_rows = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "evictions": self.evictions,
+                "persistent": self._db is not None
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache configured from LLM_CACHE_* environment variables"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = LLMResponseCache(
+                max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 1024)),
+                ttl=float(os.environ.get("LLM_CACHE_TTL", 3600)),
+                path=os.environ.get("LLM_CACHE_PATH") or None,
+                max_disk_entries=int(os.environ.get("LLM_CACHE_MAX_DISK_ENTRIES", 100000))
+            )
+        return _shared_cache
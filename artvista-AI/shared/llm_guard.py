@@ -0,0 +1,254 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from llm_cache import get_cache
+from single_flight import get_flight
+
+DEFAULT_TIMEOUT_MS = 800
+
+
+def deadline_for(endpoint):
+    """Latency budget in seconds: LLM_TIMEOUT_MS_<ENDPOINT>, else LLM_TIMEOUT_MS, else 800 ms"""
+    value = os.environ.get(f"LLM_TIMEOUT_MS_{endpoint.upper()}") or os.environ.get("LLM_TIMEOUT_MS")
+    return float(value or DEFAULT_TIMEOUT_MS) / 1000
+
+
+class CircuitBreaker:
+    """Stop calling upstream after repeated failures; let one probe through after a cooldown"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self.probe_started = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call may go upstream now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                # Probe: one caller gets through until it succeeds or fails
+                self.state = self.HALF_OPEN
+                self.probe_started = now
+                return True
+            if self.state == self.HALF_OPEN and now - self.probe_started >= self.reset_timeout:
+                # The previous probe never reported back; try another
+                self.probe_started = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class LLMGuard:
+    """Cache, coalesce, time-box and circuit-break upstream LLM calls
+
+    call() returns the parsed result, or None when the caller should use its
+    local fallback (upstream error, deadline exceeded, or breaker open). A call
+    that misses its deadline keeps running and stores its result in the cache
+    for the next request.
+    """
+
+    def __init__(self, cache, flight, breaker, max_workers=16):
+        self.cache = cache
+        self.flight = flight
+        self.breaker = breaker
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        self.errors = 0
+        self.short_circuits = 0
+        self._async_flights = {}    # key -> (task, outcome) for call_async
+
+    def _settle(self, outcome, success):
+        """Report one upstream call to the breaker exactly once"""
+        with self._lock:
+            if outcome["settled"]:
+                return
+            outcome["settled"] = True
+        if success:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def _fetch(self, key, fetch, deadline, outcome):
+        start = time.monotonic()
+        try:
+            result = fetch()
+        except Exception:
+            self._settle(outcome, False)
+            raise
+        self.cache.set(key, result)
+        self._settle(outcome, time.monotonic() - start <= deadline)
+        return result
+
+    def call(self, endpoint, key, fetch, timeout=None):
+        """Return fetch()'s result via the cache, or None to fall back locally"""
+        return self.call_many(endpoint, [(key, fetch)], timeout).get(key)
+
+    def call_many(self, endpoint, requests, timeout=None):
+        """call() for several (key, fetch) pairs at once, run concurrently under one deadline
+
+        Returns {key: result} for the keys that succeeded in time.
+        """
+        results = {}
+        pending = []
+        deadline = deadline_for(endpoint) if timeout is None else timeout
+        for key, fetch in requests:
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[key] = cached
+                continue
+            if not self.breaker.allow():
+                with self._lock:
+                    self.short_circuits += 1
+                continue
+            outcome = {"settled": False}
+            future, leader = self.flight.submit(
+                key, lambda key=key, fetch=fetch, outcome=outcome: self._fetch(key, fetch, deadline, outcome),
+                self.executor
+            )
+            pending.append((key, future, leader, outcome))
+
+        expires_at = time.monotonic() + deadline
+        for key, future, leader, outcome in pending:
+            try:
+                results[key] = future.result(timeout=max(0, expires_at - time.monotonic()))
+            except FutureTimeout:
+                with self._lock:
+                    self.timeouts += 1
+                if leader:
+                    self._settle(outcome, False)
+                print(f"Gemini AI timeout after {deadline * 1000:.0f} ms ({endpoint}). Falling back to local suggestions.")
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                print(f"Gemini AI error ({endpoint}): {e}. Falling back to local suggestions.")
+        return results
+
+    async def _fetch_async(self, key, fetch, deadline, outcome):
+        start = time.monotonic()
+        try:
+            result = await fetch()
+        except Exception:
+            self._settle(outcome, False)
+            raise
+        if self.cache.persistent:
+            # The SQLite write and commit stay off the event loop
+            await asyncio.to_thread(self.cache.set, key, result)
+        else:
+            self.cache.set(key, result)
+        self._settle(outcome, time.monotonic() - start <= deadline)
+        return result
+
+    def _finish_async(self, key, task):
+        self._async_flights.pop(key, None)
+        # Retrieve the exception so a late failure after a timeout is not reported as unhandled
+        if not task.cancelled():
+            task.exception()
+
+    async def call_async(self, endpoint, key, fetch, timeout=None):
+        """Awaitable call(): fetch is an async function; identical in-flight keys share one task"""
+        if self.cache.persistent:
+            # Memory hits are answered inline; only the SQLite tier is read from a thread
+            cached = self.cache.get(key, memory_only=True)
+            if cached is None:
+                cached = await asyncio.to_thread(self.cache.get, key)
+        else:
+            cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        if not self.breaker.allow():
+            with self._lock:
+                self.short_circuits += 1
+            return None
+
+        deadline = deadline_for(endpoint) if timeout is None else timeout
+        flight = self._async_flights.get(key)
+        leader = flight is None
+        if leader:
+            outcome = {"settled": False}
+            task = asyncio.ensure_future(self._fetch_async(key, fetch, deadline, outcome))
+            task.add_done_callback(lambda t: self._finish_async(key, t))
+            flight = self._async_flights[key] = (task, outcome)
+        task, outcome = flight
+        try:
+            # shield() keeps the upstream call running after our deadline so it can fill the cache
+            return await asyncio.wait_for(asyncio.shield(task), deadline)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            if leader:
+                self._settle(outcome, False)
+            print(f"Gemini AI timeout after {deadline * 1000:.0f} ms ({endpoint}). Falling back to local suggestions.")
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            print(f"Gemini AI error ({endpoint}): {e}. Falling back to local suggestions.")
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "short_circuits": self.short_circuits,
+                "breaker_state": self.breaker.state
+            }
+
+
+_shared_guard = None
+_shared_lock = threading.Lock()
+
+
+def get_guard():
+    """Process-wide guard configured from LLM_BREAKER_* / LLM_MAX_WORKERS environment variables"""
+    global _shared_guard
+    with _shared_lock:
+        if _shared_guard is None:
+            breaker = CircuitBreaker(
+                failure_threshold=int(os.environ.get("LLM_BREAKER_FAILURES", 5)),
+                reset_timeout=float(os.environ.get("LLM_BREAKER_RESET_SECONDS", 30))
+            )
+            _shared_guard = LLMGuard(get_cache(), get_flight(), breaker,
+                                     max_workers=int(os.environ.get("LLM_MAX_WORKERS", 16)))
+        return _shared_guard
+
+
+def llm_metrics():
+    """Metrics collector (see metrics.py) for the shared LLM cache, single-flight group and guard"""
+    cache = get_cache().stats()
+    yield "llm_cache_lookups_total", "counter", {"result": "hit"}, cache["hits"]
+    yield "llm_cache_lookups_total", "counter", {"result": "miss"}, cache["misses"]
+    yield "llm_cache_evictions_total", "counter", {}, cache["evictions"]
+    yield "llm_cache_entries", "gauge", {}, cache["entries"]
+    flight = get_flight().stats()
+    yield "llm_calls_total", "counter", {}, flight["calls"]
+    yield "llm_calls_shared_total", "counter", {}, flight["shared"]
+    yield "llm_calls_in_flight", "gauge", {}, flight["in_flight"]
+    guard = get_guard().stats()
+    for outcome in ("timeouts", "errors", "short_circuits"):
+        yield "llm_failures_total", "counter", {"reason": outcome}, guard[outcome]
+    yield "llm_breaker_open", "gauge", {}, int(guard["breaker_state"] != CircuitBreaker.CLOSED)
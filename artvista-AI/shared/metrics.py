@@ -0,0 +1,141 @@
+"""In-process counters and latency histograms, exported in the Prometheus text format
+
+Both services record per-route request counts and latencies and per-stage
+timings here and serve them from /metrics. Recording is a dict lookup and a
+few additions under one lock (about a microsecond); values such as cache
+statistics that other modules already keep are read only when /metrics is
+scraped, through collectors.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """Counts of observations per bucket (not cumulative) plus their sum"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)    # the last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class Metrics:
+    """Named counters and histograms with labels, plus collectors read at scrape time"""
+
+    def __init__(self, prefix="artvista"):
+        self.prefix = prefix
+        self._counters = {}      # name -> {labels: value}
+        self._histograms = {}    # name -> {labels: Histogram}
+        self._collectors = {}    # name -> fn() yielding (metric, "counter"|"gauge", labels dict, value)
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the with-block in histogram name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def stage(self, stage, **labels):
+        """Time one step of request handling (e.g. "content", "gemini")"""
+        return self.timer("stage_duration_seconds", stage=stage, **labels)
+
+    def track_request(self, route, method, status, seconds):
+        """Count one HTTP request and observe its latency; route is the URL rule, not the path"""
+        self.inc("requests_total", route=route, method=method, status=str(status))
+        self.observe("request_duration_seconds", seconds, route=route, method=method)
+
+    def add_collector(self, name, collect):
+        """Read collect() on every scrape; registering the same name again replaces it"""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: (list(h.counts), h.sum, h.buckets) for key, h in series.items()}
+                for name, series in self._histograms.items()
+            }
+            collectors = list(self._collectors.values())
+
+        lines = []
+        for name, series in sorted(counters.items()):
+            lines.append(f"# TYPE {self.prefix}_{name} counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{self.prefix}_{name}{_format_labels(key)} {value}")
+
+        for name, series in sorted(histograms.items()):
+            lines.append(f"# TYPE {self.prefix}_{name} histogram")
+            for key, (counts, total, buckets) in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(buckets + ("+Inf",), counts):
+                    cumulative += count
+                    lines.append(f"{self.prefix}_{name}_bucket{_format_labels(key + (('le', bound),))} {cumulative}")
+                lines.append(f"{self.prefix}_{name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.prefix}_{name}_count{_format_labels(key)} {cumulative}")
+
+        collected = {}
+        for collect in collectors:
+            try:
+                for name, kind, labels, value in collect():
+                    collected.setdefault((name, kind), []).append((_labels(labels), value))
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+        for (name, kind), series in sorted(collected.items()):
+            lines.append(f"# TYPE {self.prefix}_{name} {kind}")
+            for key, value in series:
+                lines.append(f"{self.prefix}_{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Content type of render() for HTTP responses
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_shared_metrics = Metrics()
+
+
+def get_metrics():
+    """Process-wide metrics shared by every module of a service"""
+    return _shared_metrics
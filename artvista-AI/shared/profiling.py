@@ -0,0 +1,186 @@
+"""Opt-in profiles of single requests, written to disk for download
+
+A request is profiled when an admin asks for it (see the Flask servers' X-Profile
+header) or, with PROFILE_SAMPLE_RATE > 0, at random. Two modes:
+
+- "cprofile": deterministic cProfile of the request thread, saved as a .pstats
+  file (python -m pstats, snakeviz, flameprof, gprof2dot)
+- "sample": a background thread records the request thread's stack every
+  PROFILE_SAMPLE_INTERVAL_MS and saves collapsed stacks ("a;b;c count" lines,
+  as read by flamegraph.pl and speedscope); cheap enough for random sampling
+
+Both only observe the thread serving the profiled request, and at most one
+request is profiled at a time so the overhead stays bounded; requests that ask
+while another profile runs are served normally without one.
+"""
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "profiles")
+
+MODES = ("cprofile", "sample")
+
+# File extension per mode
+EXTENSIONS = {"cprofile": ".pstats", "sample": ".collapsed"}
+
+_PROFILE_ID = re.compile(r"^[\w-]+\.(pstats|collapsed)$")
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Counts the stacks one thread is in, sampled from another thread"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RequestProfile:
+    """One running profile; stop() saves it and returns its id"""
+
+    def __init__(self, profiler, mode, name):
+        self.profiler = profiler
+        self.mode = mode
+        self.name = name
+        self.profile_id = None
+        if mode == "cprofile":
+            self._collector = cProfile.Profile()
+            self._collector.enable()
+        else:
+            self._collector = StackSampler(threading.get_ident(), profiler.sample_interval)
+            self._collector.start()
+
+    def stop(self):
+        """Save the profile (once; later calls return the same id)"""
+        if self.profile_id is not None or self._collector is None:
+            return self.profile_id
+        collector, self._collector = self._collector, None
+        try:
+            if self.mode == "cprofile":
+                collector.disable()
+                collector.create_stats()
+            else:
+                collector.stop()
+            self.profile_id = self.profiler.save(self, collector)
+        finally:
+            self.profiler.release()
+        return self.profile_id
+
+
+class RequestProfiler:
+    """Starts request profiles and keeps the newest `keep` of them in directory"""
+
+    def __init__(self, directory=DEFAULT_PROFILE_DIR, sample_rate=0.0, sample_interval=0.005, keep=50):
+        self.directory = os.path.abspath(directory)
+        self.sample_rate = sample_rate
+        self.sample_interval = sample_interval
+        self.keep = keep
+        self._busy = threading.Lock()
+        self._counter = 0
+
+    def start(self, name, mode=None):
+        """Profile the rest of this thread's request in mode, or at random in "sample" mode
+
+        Returns a RequestProfile, or None when the request is not profiled
+        (no mode, not sampled, or another profile is running).
+        """
+        if mode is None:
+            if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+                return None
+            mode = "sample"
+        if mode not in MODES or not self._busy.acquire(blocking=False):
+            return None
+        try:
+            return RequestProfile(self, mode, name)
+        except Exception as e:
+            self._busy.release()
+            print(f"Profiler error: {e}")
+            return None
+
+    def release(self):
+        self._busy.release()
+
+    def save(self, profile, collector):
+        os.makedirs(self.directory, exist_ok=True)
+        self._counter += 1
+        safe_name = re.sub(r"[^\w-]+", "_", profile.name).strip("_") or "request"
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{self._counter}-{safe_name}{EXTENSIONS[profile.mode]}"
+        path = os.path.join(self.directory, profile_id)
+        try:
+            if profile.mode == "cprofile":
+                collector.dump_stats(path)
+            else:
+                collector.dump(path)
+        except OSError as e:
+            print(f"Could not save profile {path}: {e}")
+            return None
+        self._prune()
+        return profile_id
+
+    def _prune(self):
+        saved = self.list()
+        for profile_id in saved[self.keep:]:
+            try:
+                os.remove(os.path.join(self.directory, profile_id))
+            except OSError:
+                pass
+
+    def list(self):
+        """Ids of the saved profiles, newest first"""
+        try:
+            names = [n for n in os.listdir(self.directory) if _PROFILE_ID.match(n)]
+        except FileNotFoundError:
+            return []
+        return sorted(names, key=lambda n: (os.path.getmtime(os.path.join(self.directory, n)), n), reverse=True)
+
+    def path(self, profile_id):
+        """Path of a saved profile, or None if the id is not one"""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, profile_id)
+        return path if os.path.isfile(path) else None
+
+
+def profiler_from_env():
+    """RequestProfiler configured by PROFILE_DIR, PROFILE_SAMPLE_RATE, PROFILE_SAMPLE_INTERVAL_MS and PROFILE_KEEP"""
+    return RequestProfiler(
+        directory=os.environ.get("PROFILE_DIR", DEFAULT_PROFILE_DIR),
+        sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", 0)),
+        sample_interval=float(os.environ.get("PROFILE_SAMPLE_INTERVAL_MS", 5)) / 1000,
+        keep=int(os.environ.get("PROFILE_KEEP", 50)),
+    )
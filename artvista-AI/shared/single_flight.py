@@ -0,0 +1,72 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one upstream call
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for the same result (or exception) instead of calling again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures = {}
+        self.calls = 0
+        self.shared = 0
+
+    def _join(self, key):
+        """Return (future, is_leader) for key"""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = Future()
+            self._futures[key] = future
+            self.calls += 1
+            return future, True
+
+    def _run(self, key, future, fn):
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._futures.pop(key, None)
+
+    def do(self, key, fn):
+        """Run fn() once for all concurrent callers with this key and return its result"""
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, fn)
+        return future.result()
+
+    def submit(self, key, fn, executor):
+        """Start fn() on executor unless a call for key is already in flight
+
+        Returns (future, is_leader); every caller for the key gets the same future.
+        """
+        future, leader = self._join(key)
+        if leader:
+            executor.submit(self._run, key, future, fn)
+        return future, leader
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._futures)
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._futures)}
+
+
+_shared_flight = SingleFlight()
+
+
+def get_flight():
+    """Process-wide single-flight group shared by all LLM call sites"""
+    return _shared_flight
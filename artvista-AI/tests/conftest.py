@@ -0,0 +1,62 @@
+"""Puts the service scripts on sys.path and keeps test runs away from the real data files
+
+Environment variables are set before any service module is imported: Gemini
+is disabled, and sessions, leaderboards and live events stay in memory.
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in ("shared", "ai_suggestions/scripts", "game_logic/scripts"):
+    sys.path.insert(0, os.path.join(ROOT, directory))
+
+os.environ.update(
+    GEMINI_API_KEY="",
+    INTERACTION_LOG_PATH="",
+    SUGGESTION_STORE_PATH="",
+    LLM_CACHE_PATH="",
+    GAME_SESSION_PATH="",
+    LEADERBOARD_PATH="",
+)
+
+
+class _QuartClient:
+    """Synchronous calls into the ASGI app's test client"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def post(self, path, json=None):
+        async def call():
+            client = self.app.test_client()
+            if json is not None:
+                response = await client.post(path, json=json)
+            else:
+                response = await client.post(path, data=b"", headers={"Content-Type": "application/json"})
+            return response.status_code, await response.get_json()
+        return asyncio.run(call())
+
+
+class _FlaskClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def post(self, path, json=None):
+        if json is not None:
+            response = self.client.post(path, json=json)
+        else:
+            response = self.client.post(path, data=b"", content_type="application/json")
+        return response.status_code, response.get_json()
+
+
+@pytest.fixture(params=["flask", "asgi"])
+def ai_client(request):
+    """post(path, json) -> (status, body) against api_mock.py and api_asgi.py; json=None sends an empty body"""
+    if request.param == "flask":
+        from api_mock import app
+        return _FlaskClient(app)
+    from api_asgi import app
+    return _QuartClient(app)
@@ -0,0 +1,37 @@
+import pytest
+
+
+# None posts an empty, unparseable body
+@pytest.mark.parametrize("body", [
+    None,
+    [1, 2],
+    {},
+    {"user_ids": 1},
+    {"user_ids": "1,2"},
+    {"user_ids": [1, "2"]},
+    {"user_ids": [1, 2.5]},
+    {"user_ids": [True]},
+    {"user_ids": [1, None]},
+])
+def test_rejects_anything_but_a_list_of_integers(ai_client, body):
+    status, response = ai_client.post("/adaptive_suggest/batch", json=body)
+    assert status == 400
+    assert response == {"error": "user_ids must be a list of integers"}
+
+
+def test_rejects_too_many_users(ai_client, monkeypatch):
+    import api_asgi
+    import api_mock
+    monkeypatch.setattr(api_mock, "MAX_BATCH_SIZE", 2)
+    monkeypatch.setattr(api_asgi, "MAX_BATCH_SIZE", 2)
+    status, response = ai_client.post("/adaptive_suggest/batch", json={"user_ids": [1, 2, 3]})
+    assert status == 400
+    assert response == {"error": "at most 2 user_ids per request"}
+
+
+def test_answers_every_user_in_request_order(ai_client):
+    status, response = ai_client.post("/adaptive_suggest/batch", json={"user_ids": [2, 1, 2, 999]})
+    assert status == 200
+    assert [result["user_id"] for result in response["results"]] == [2, 1, 2, 999]
+    assert all("artworks" in result and "tutorials" in result for result in response["results"])
+    assert ai_client.post("/adaptive_suggest/batch", json={"user_ids": []}) == (200, {"results": []})
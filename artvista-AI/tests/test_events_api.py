@@ -0,0 +1,75 @@
+import itertools
+import time
+
+import pytest
+
+from interaction_log import InteractionLog
+
+# Live events outlive a test, so each test that records some uses users of its own
+fresh_users = itertools.count(500)
+
+
+@pytest.mark.parametrize("body, error", [
+    (None, "events must be a list"),
+    ({}, "events must be a list"),
+    ({"events": {"user_id": 1}}, "events must be a list"),
+    ({"events": ["click"]}, "event 0: each event must be an object"),
+    ({"events": [{"user_id": "1", "type": "click", "item_id": "A1"}]}, "event 0: user_id must be an integer"),
+    ({"events": [{"user_id": True, "type": "click", "item_id": "A1"}]}, "event 0: user_id must be an integer"),
+    ({"events": [{"user_id": 1, "type": "view", "item_id": "A1"}]}, "event 0: type must be one of click, complete"),
+    ({"events": [{"user_id": 1, "type": "click", "item_id": "T1"}]}, "event 0: unknown item_id 'T1'"),
+    ({"events": [{"user_id": 1, "type": "complete", "item_id": True}]}, "event 0: unknown item_id True"),
+    ({"events": [{"user_id": 1, "type": "click", "item_id": "A1", "timestamp": "now"}]},
+     "event 0: timestamp must be a number"),
+    ({"events": [{"user_id": 1, "type": "click", "item_id": "A1", "timestamp": -1}]},
+     "event 0: timestamp must be in seconds since the epoch and not in the future"),
+    ({"events": [{"user_id": 1, "type": "click", "item_id": "A1", "timestamp": 1.7e12}]},
+     "event 0: timestamp must be in seconds since the epoch and not in the future"),
+])
+def test_rejects_invalid_events(ai_client, body, error):
+    assert ai_client.post("/events", json=body) == (400, {"error": error})
+
+
+def test_one_bad_event_rejects_the_whole_batch(ai_client):
+    import enhanced_suggestion_engine
+    user_id = next(fresh_users)
+    events = [{"user_id": user_id, "type": "click", "item_id": "A1"},
+              {"user_id": user_id, "type": "click", "item_id": "X"}]
+    assert ai_client.post("/events", json={"events": events}) == (400, {"error": "event 1: unknown item_id 'X'"})
+    assert enhanced_suggestion_engine.interaction_log.version(user_id) == 0
+
+
+def test_rejects_too_many_events(ai_client, monkeypatch):
+    import api_asgi
+    import api_mock
+    monkeypatch.setattr(api_mock, "MAX_EVENTS_PER_REQUEST", 1)
+    monkeypatch.setattr(api_asgi, "MAX_EVENTS_PER_REQUEST", 1)
+    events = [{"user_id": 1, "type": "click", "item_id": "A1"}] * 2
+    assert ai_client.post("/events", json={"events": events}) == (400, {"error": "at most 1 events per request"})
+
+
+def test_records_new_events_once(ai_client):
+    user_id = next(fresh_users)
+    events = [{"user_id": user_id, "type": "click", "item_id": "A2"},
+              {"user_id": user_id, "type": "complete", "item_id": "T1", "timestamp": 0}]
+    assert ai_client.post("/events", json={"events": events}) == (200, {"received": 2, "recorded": 2})
+    assert ai_client.post("/events", json={"events": events}) == (200, {"received": 2, "recorded": 0})
+
+
+def test_log_keeps_timestamps_and_compacts_repeats(tmp_path, monkeypatch):
+    import interaction_log
+    monkeypatch.setattr(interaction_log, "COMPACT_MIN_LINES", 10)
+    path = str(tmp_path / "interactions.log")
+    log = InteractionLog(path)
+    assert not (tmp_path / "interactions.log").exists()
+    log.append([{"user_id": 1, "type": "click", "item_id": "A1", "timestamp": 0},
+                {"user_id": 1, "type": "click", "item_id": "A2", "timestamp": time.time() + 3600}])
+    for _ in range(10):
+        log.append([{"user_id": 1, "type": "click", "item_id": "A1"}])
+    log.close()
+
+    replayed = []
+    InteractionLog(path, listener=replayed.append)
+    assert len(open(path).readlines()) < 10
+    assert [(event["item_id"], event["timestamp"]) for event in replayed][0] == ("A1", 0)
+    assert replayed[1]["timestamp"] <= time.time()
@@ -0,0 +1,100 @@
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+import leaderboard
+from leaderboard import Leaderboard, Leaderboards
+
+WEDNESDAY = datetime(2026, 10, 14, 12, tzinfo=timezone.utc).timestamp()
+THURSDAY = WEDNESDAY + 86400
+NEXT_MONDAY = WEDNESDAY + 5 * 86400
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(WEDNESDAY)
+    monkeypatch.setattr(leaderboard, "time", clock)
+    return clock
+
+
+def reference(scores):
+    """(player, points) best first: more points, then the earlier score, then the player"""
+    ranked = sorted(scores.items(), key=lambda item: (-item[1][0], item[1][1], item[0]))
+    return [(player, points) for player, (points, _) in ranked]
+
+
+def test_rank_top_and_around_match_a_sorted_reference():
+    rng = random.Random(4)
+    board = Leaderboard()
+    best = {}
+    for step in range(2000):
+        player = f"p{rng.randrange(60)}"
+        # Few distinct points and timestamps, so ties are common
+        points, achieved_at = rng.randrange(10), rng.randrange(5)
+        improved = player not in best or points > best[player][0]
+        assert board.submit(player, player.upper(), points, achieved_at) == improved
+        if improved:
+            best[player] = (points, achieved_at)
+        if step % 100:
+            continue
+        expected = reference(best)
+        assert [(entry["user"].lower(), entry["points"]) for entry in board.top(10)] == expected[:10]
+        for rank, (player, points) in enumerate(expected, 1):
+            assert board.rank(player) == rank
+            assert board.entry(player) == {"rank": rank, "user": player.upper(), "points": points}
+            around = board.around(player, 2)
+            assert [entry["rank"] for entry in around] == list(range(max(rank - 2, 1), min(rank + 2, len(expected)) + 1))
+            assert [entry["user"].lower() for entry in around] == [p for p, _ in expected[max(rank - 3, 0):rank + 2]]
+    assert board.rank("nobody") is None
+    assert board.around("nobody", 2) is None
+
+
+def test_ties_go_to_the_earlier_score():
+    board = Leaderboard([("b", "B", 10, 2.0), ("a", "A", 10, 3.0), ("c", "C", 12, 9.0)])
+    assert [entry["user"] for entry in board.top(3)] == ["C", "B", "A"]
+    board.submit("a", "A", 10, 1.0)    # equal points are not a new best
+    assert board.rank("a") == 3
+
+
+def test_daily_and_weekly_boards_roll_over(clock):
+    boards = Leaderboards()
+    assert boards.submit("u1", "Ann", 30, WEDNESDAY)
+    assert not boards.submit("u1", "Ann", 20, WEDNESDAY)
+    boards.submit("u2", "Bob", 10, WEDNESDAY)
+    assert [entry["user"] for entry in boards.top("daily", 5)] == ["Ann", "Bob"]
+
+    clock.now = THURSDAY
+    assert boards.top("daily", 5) == []
+    assert [entry["user"] for entry in boards.top("weekly", 5)] == ["Ann", "Bob"]
+    # A lower score than the all-time best still counts on today's board
+    assert not boards.submit("u1", "Ann", 5, THURSDAY)
+    assert boards.entry("daily", "u1") == {"rank": 1, "user": "Ann", "points": 5}
+
+    clock.now = NEXT_MONDAY
+    assert boards.top("daily", 5) == [] and boards.top("weekly", 5) == []
+    assert boards.top("all", 5) == [{"rank": 1, "user": "Ann", "points": 30}, {"rank": 2, "user": "Bob", "points": 10}]
+    assert boards.around("all", "u2", 1) == boards.top("all", 5)
+    with pytest.raises(ValueError):
+        boards.top("monthly", 5)
+
+
+def test_boards_sharing_a_file_see_each_others_scores(clock, tmp_path):
+    path = str(tmp_path / "leaderboard.sqlite")
+    first, second = Leaderboards(path), Leaderboards(path)
+    first.submit("u1", "Ann", 10, WEDNESDAY)
+    assert second.entry("all", "u1")["points"] == 10
+    version = second.version()
+    second.submit("u1", "Ann", 25, WEDNESDAY)
+    second.submit("u2", "Bob", 15, WEDNESDAY)
+    assert first.version() > version
+    assert first.top("weekly", 5) == second.top("weekly", 5) == [
+        {"rank": 1, "user": "Ann", "points": 25}, {"rank": 2, "user": "Bob", "points": 15}]
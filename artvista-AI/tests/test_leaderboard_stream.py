@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+import leaderboard_stream
+from leaderboard import Leaderboards
+from leaderboard_stream import LeaderboardStream
+
+
+def parse(frames):
+    """[(id, event, data)] from concatenated SSE frames"""
+    events = []
+    for frame in b"".join(frames).decode().split("\n\n")[:-1]:
+        fields = dict(line.split(": ", 1) for line in frame.split("\n"))
+        events.append((fields["id"], fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+def stream():
+    # A broadcaster that never wakes in a test; refreshes are driven by hand
+    stream = LeaderboardStream(Leaderboards(), top=3, tick=3600)
+    stream._start()
+    return stream
+
+
+def test_new_subscriber_gets_the_full_top(stream):
+    stream.leaderboards.submit("u1", "Ann", 10)
+    stream.leaderboards.submit("u2", "Bob", 20)
+    stream._refresh()
+    seq = stream._open(None)
+    frames, seq = stream._pending("all", seq)
+    [(event_id, event, data)] = parse(frames)
+    assert event == "leaderboard"
+    assert [(entry["player"], entry["points"]) for entry in data["top"]] == [("u2", 20), ("u1", 10)]
+    assert stream._pending("all", seq) == ([], seq)
+
+
+def test_resume_replays_only_the_missed_deltas(stream):
+    stream.leaderboards.submit("u1", "Ann", 10)
+    stream._refresh()
+    last_id = parse(stream._pending("all", None)[0])[0][0]
+    for player, points in (("u2", 5), ("u1", 30)):
+        stream.leaderboards.submit(player, player, points)
+        stream._refresh()
+
+    frames, _ = stream._pending("all", stream._open(last_id))
+    deltas = parse(frames)
+    assert [event for _, event, _ in deltas] == ["delta", "delta"]
+    assert [[entry["player"] for entry in data["changed"]] for _, _, data in deltas] == [["u2"], ["u1"]]
+    # Each delta lists what changed in the top 3 and who left it
+    stream.leaderboards.submit("u3", "Cy", 40)
+    stream.leaderboards.submit("u4", "Di", 50)
+    stream._refresh()
+    frames, _ = stream._pending("all", stream._open(deltas[-1][0]))
+    [(_, _, data)] = parse(frames)
+    assert data["removed"] == ["u2"]
+
+
+@pytest.mark.parametrize("last_id", ["garbage", "0123abcd.1", ""])
+def test_ids_from_another_process_get_the_snapshot(stream, last_id):
+    stream.leaderboards.submit("u1", "Ann", 10)
+    stream._refresh()
+    assert stream._open(last_id) is None
+    assert [event for _, event, _ in parse(stream._pending("daily", None)[0])] == ["leaderboard"]
+
+
+def test_subscriber_behind_the_history_gets_the_snapshot(monkeypatch):
+    monkeypatch.setattr(leaderboard_stream, "HISTORY", 2)
+    stream = LeaderboardStream(Leaderboards(), top=3, tick=3600)
+    stream._start()
+    stream.leaderboards.submit("u0", "u0", 1)
+    stream._refresh()
+    last_id = parse(stream._pending("all", None)[0])[0][0]
+    for points in range(2, 6):
+        stream.leaderboards.submit(f"u{points}", f"u{points}", points)
+        stream._refresh()
+    assert stream._open(last_id) is None
+    frames, _ = stream._pending("all", stream._open(last_id))
+    [(_, event, data)] = parse(frames)
+    assert event == "leaderboard" and len(data["top"]) == 3
+
+
+def test_thread_subscriber_gets_snapshot_then_deltas(stream):
+    stream.leaderboards.submit("u1", "Ann", 10)
+    stream._refresh()
+    events = stream.events("weekly")
+    assert parse([next(events)])[0][1] == "leaderboard"
+    assert stream.stats()["subscribers"] == 1
+    stream.leaderboards.submit("u2", "Bob", 15)
+    stream._refresh()
+    [(_, event, data)] = parse([next(events)])
+    assert event == "delta" and data["window"] == "weekly"
+    events.close()
+    assert stream.stats()["subscribers"] == 0
@@ -0,0 +1,40 @@
+import asyncio
+import sqlite3
+
+from llm_cache import LLMResponseCache, canonical_preferences, make_key
+from llm_guard import CircuitBreaker, LLMGuard, get_flight
+
+
+def test_keys_ignore_preference_order_and_case():
+    first = make_key("adaptive", preferences=canonical_preferences(["Oil", "landscape "]))
+    assert first == make_key("adaptive", preferences=canonical_preferences(["landscape", "oil", "OIL"]))
+    assert first != make_key("adaptive", preferences=canonical_preferences(["oil"]))
+
+
+def test_disk_tier_keeps_the_newest_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = LLMResponseCache(max_entries=2, path=path, max_disk_entries=100)
+    for i in range(250):
+        cache.set(f"k{i}", {"value": i})
+    rows = sqlite3.connect(path).execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+    # Trimmed back to the limit whenever it runs 1% over
+    assert 100 <= rows <= 101
+
+    reopened = LLMResponseCache(max_entries=2, path=path, max_disk_entries=100)
+    assert reopened.get("k249") == {"value": 249}
+    assert reopened.get("k0") is None
+    assert reopened.get("k249", memory_only=True) == {"value": 249}
+    assert reopened.get("k248", memory_only=True) is None
+
+
+def test_async_calls_read_the_disk_tier_on_a_miss(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    LLMResponseCache(path=path).set("key", ["cached"])
+    guard = LLMGuard(LLMResponseCache(path=path), get_flight(), CircuitBreaker())
+
+    async def fetch():
+        return ["fetched"]
+
+    assert asyncio.run(guard.call_async("adaptive_suggestions", "key", fetch)) == ["cached"]
+    assert asyncio.run(guard.call_async("adaptive_suggestions", "other", fetch)) == ["fetched"]
+    assert LLMResponseCache(path=path).get("other") == ["fetched"]
@@ -0,0 +1,52 @@
+import random
+
+from neighbor_table import NeighborTable
+
+STYLES = ["landscape", "portrait", "abstract", "urban", "watercolor", "oil", "digital", "nature"]
+
+
+def random_user(rng, user_id):
+    return {
+        "id": user_id,
+        "preferences": rng.sample(STYLES, rng.randint(0, 3)),
+        "interactions": {"clicked_artworks": rng.sample(["A1", "A2", "A3"], rng.randint(0, 2)),
+                         "completed_tutorials": []},
+    }
+
+
+def test_incremental_updates_match_a_rebuild():
+    rng = random.Random(3)
+    for trial in range(30):
+        include_interactions = trial % 2 == 1
+        users = [random_user(rng, user_id) for user_id in range(1, rng.randint(2, 40))]
+        table = NeighborTable(3, include_interactions).build(users)
+        for _ in range(15):
+            if rng.random() < 0.2:
+                users.append(random_user(rng, len(users) + 1))
+                table.update_user(users[-1])
+            else:
+                position = rng.randrange(len(users))
+                users[position] = random_user(rng, users[position]["id"])
+                table.update_user(users[position])
+            rebuilt = NeighborTable(3, include_interactions).build(users)
+            assert table.rows == rebuilt.rows
+
+
+def test_sync_updates_only_changed_users():
+    rng = random.Random(11)
+    users = [random_user(rng, user_id) for user_id in range(1, 30)]
+    table = NeighborTable(3).build(users)
+    users[4] = dict(users[4], preferences=["abstract", "oil"])
+    users.append(random_user(rng, 30))
+    assert table.sync(users, rebuild_ratio=1.0).rows == NeighborTable(3).build(users).rows
+
+
+def test_save_and_load_round_trip(tmp_path):
+    rng = random.Random(5)
+    users = [random_user(rng, user_id) for user_id in range(1, 20)]
+    table = NeighborTable(2).build(users)
+    table.save(str(tmp_path / "neighbors.json"))
+    loaded = NeighborTable.load(str(tmp_path / "neighbors.json"))
+    assert loaded.rows == {user_id: [tuple(entry) for entry in row] for user_id, row in table.rows.items()}
+    assert loaded.get(users[0]["id"], 1) == table.get(users[0]["id"], 1)
+    assert loaded.get(users[0]["id"], 3) is None
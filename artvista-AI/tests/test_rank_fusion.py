@@ -0,0 +1,60 @@
+import random
+
+from rank_fusion import fuse
+
+
+def brute_force(rankings, limit, exclude=()):
+    """Score every item of every list, read in step one rank at a time"""
+    lists = []
+    for weight, items in rankings:
+        accepted = []
+        seen = set()
+        for item in items:
+            if item["id"] not in exclude and item["id"] not in seen:
+                seen.add(item["id"])
+                accepted.append(item)
+        lists.append((weight, accepted))
+    scores = {}
+    first_seen = {}
+    for depth in range(max((len(accepted) for _, accepted in lists), default=0)):
+        for weight, accepted in lists:
+            if depth < len(accepted):
+                item_id = accepted[depth]["id"]
+                scores[item_id] = scores.get(item_id, 0) + weight / (depth + 1)
+                first_seen.setdefault(item_id, len(first_seen))
+    return sorted(scores, key=lambda item_id: (-scores[item_id], first_seen[item_id]))[:limit]
+
+
+def random_rankings(rng):
+    pool = [f"A{i}" for i in range(rng.randint(1, 12))]
+    weights = rng.choice([(0.4, 0.3, 0.3), (1, 1), (0.5,), (1, 2, 1, 3)])
+    return [(weight, [{"id": rng.choice(pool)} for _ in range(rng.randint(0, 10))]) for weight in weights]
+
+
+def test_matches_brute_force():
+    rng = random.Random(7)
+    for _ in range(2000):
+        rankings = random_rankings(rng)
+        limit = rng.randint(0, 6)
+        exclude = {f"A{i}" for i in range(12) if rng.random() < 0.2}
+        fused = [item["id"] for item in fuse(rankings, limit, exclude)]
+        assert fused == brute_force(rankings, limit, exclude), (rankings, limit, exclude)
+
+
+def test_returns_the_first_item_record_seen():
+    first = {"id": "A1", "source": "content"}
+    fused = fuse([(0.4, [first]), (0.3, [{"id": "A1", "source": "trending"}])], 1)
+    assert fused[0] is first
+
+
+def test_stops_reading_once_the_top_is_settled():
+    class CountingList(list):
+        reads = 0
+
+        def __getitem__(self, index):
+            CountingList.reads += 1
+            return list.__getitem__(self, index)
+
+    items = CountingList({"id": f"A{i}"} for i in range(1000))
+    assert [item["id"] for item in fuse([(1.0, items)], 3)] == ["A0", "A1", "A2"]
+    assert CountingList.reads < 10
@@ -0,0 +1,71 @@
+import pytest
+
+import game_service
+
+VALID = [
+    {"type": "choose_background", "background": "Forest"},
+    {"type": "add_element", "element": "Tree"},
+    {"type": "add_element", "element": "River"},
+    {"type": "add_element", "element": "House"},
+    {"type": "check_scene"},
+    {"type": "adjust_difficulty"},
+]
+
+
+def new_game(name="Ann", user_id=None):
+    payload, status = game_service.start_game({"user_name": name, "user_id": user_id})
+    assert status == 200
+    return payload["game_id"]
+
+
+def state(game_id):
+    game = game_service.sessions.get(game_id)
+    return game.background, list(game.elements), game.points, list(game.badges), game.completed_scenes
+
+
+@pytest.mark.parametrize("body, error", [
+    (None, "JSON data is required"),
+    ({}, "actions must be a non-empty list"),
+    ({"actions": []}, "actions must be a non-empty list"),
+    ({"actions": {"type": "check_scene"}}, "actions must be a non-empty list"),
+    ({"actions": [{"type": "check_scene"}] * 51}, "at most 50 actions per request"),
+    ({"actions": VALID + ["add_element"]},
+     "actions[6]: type must be one of choose_background, add_element, check_scene, adjust_difficulty"),
+    ({"actions": VALID + [{"type": "remove_element"}]},
+     "actions[6]: type must be one of choose_background, add_element, check_scene, adjust_difficulty"),
+    ({"actions": VALID + [{"type": "add_element"}]}, "actions[6]: element is required"),
+    ({"actions": [{"type": "choose_background", "background": ""}] + VALID}, "actions[0]: background is required"),
+])
+def test_invalid_batches_change_nothing(body, error):
+    game_id = new_game()
+    before = state(game_id)
+    assert game_service.scene_actions(game_id, body) == ({"error": error}, 400)
+    assert state(game_id) == before
+
+
+def test_unknown_game_is_a_404_even_with_a_bad_body():
+    assert game_service.scene_actions(10 ** 9, {"actions": VALID})[1] == 404
+    assert game_service.scene_actions(10 ** 9, {"actions": []})[1] == 404
+
+
+def test_batch_matches_the_single_action_endpoints():
+    batched, single = new_game(), new_game()
+    payload, status = game_service.scene_actions(batched, {"actions": VALID})
+    assert status == 200
+    assert [result["type"] for result in payload["results"]] == [action["type"] for action in VALID]
+
+    results = payload["results"]
+    assert results[0]["message"] == game_service.choose_background(single, {"background": "Forest"})[0]["message"]
+    for result, element in zip(results[1:4], ["Tree", "River", "House"]):
+        assert result["message"] == game_service.add_element(single, {"element": element})[0]["message"]
+    assert results[4] == dict(game_service.check_scene(single)[0], type="check_scene")
+    assert results[5]["message"] == game_service.adjust_difficulty(single)[0]["message"]
+    assert state(batched) == state(single)
+    assert (payload["elements"], payload["points"]) == (["Tree", "River", "House"], 20)
+
+
+def test_completed_scene_in_a_batch_reaches_the_leaderboard():
+    game_id = new_game("Cleo", user_id=4242)
+    game_service.scene_actions(game_id, {"actions": VALID})
+    entry = game_service.leaderboards.entry("all", game_service.player_key(4242, "Cleo"))
+    assert entry["user"] == "Cleo" and entry["points"] == 20
@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from enhanced_drag_drop_game import EnhancedDragDropGame
+from session_store import SessionStore
+
+
+def run_threads(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make():
+        if request.param == "memory":
+            return SessionStore()
+        return SessionStore(path=str(tmp_path / "games.sqlite"), shards=3)
+    return make
+
+
+def test_concurrent_creates_get_distinct_ids(make_store):
+    store = make_store()
+    ids = []
+    lock = threading.Lock()
+
+    def create():
+        for _ in range(50):
+            game_id = store.create(EnhancedDragDropGame("player"))
+            with lock:
+                ids.append(game_id)
+
+    run_threads(8, create)
+    assert len(ids) == len(set(ids)) == 400
+
+
+def test_stores_sharing_files_never_reuse_ids(tmp_path):
+    path = str(tmp_path / "games.sqlite")
+    first, second = SessionStore(path=path, shards=2), SessionStore(path=path, shards=2)
+    ids = [store.create(EnhancedDragDropGame("player")) for _ in range(20) for store in (first, second)]
+    assert len(set(ids)) == len(ids)
+    # A restarted worker continues after every id handed out
+    assert SessionStore(path=path, shards=2).next_id() > max(ids)
+
+
+def test_concurrent_updates_are_not_lost(make_store):
+    store = make_store()
+    game_id = store.create(EnhancedDragDropGame("player"))
+
+    def add():
+        for _ in range(25):
+            store.update(game_id, lambda game: game.add_element("Tree"))
+
+    run_threads(8, add)
+    assert len(store.get(game_id).elements) == 200
+    assert store.get(game_id).points == 200 * 5
+
+
+def test_updates_from_two_workers_are_merged(tmp_path):
+    path = str(tmp_path / "games.sqlite")
+    first, second = SessionStore(path=path), SessionStore(path=path)
+    game_id = first.create(EnhancedDragDropGame("player"))
+    second.get(game_id)
+    first.update(game_id, lambda game: game.add_element("Tree"))
+    # second's cached copy is stale; its conditional save fails and the change is re-applied
+    second.update(game_id, lambda game: game.add_element("Sun"))
+    assert SessionStore(path=path).get(game_id).elements == ["Tree", "Sun"]
+
+
+def test_failed_change_leaves_the_cached_game_untouched(make_store):
+    store = make_store()
+    game_id = store.create(EnhancedDragDropGame("player"))
+
+    def fail(game):
+        game.add_element("Tree")
+        raise RuntimeError("change failed")
+
+    with pytest.raises(RuntimeError):
+        store.update(game_id, fail)
+    assert store.get(game_id).elements == []
+    assert store.update(game_id, lambda game: "ok") is not None
+    assert store.update(10 ** 9, lambda game: "ok") is None
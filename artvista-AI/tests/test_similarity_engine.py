@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from similarity_engine import SparseSimilarityEngine, is_available, user_features
+
+pytestmark = pytest.mark.skipif(not is_available(), reason="numpy/scipy not installed")
+
+STYLES = ["landscape", "portrait", "abstract", "urban", "watercolor", "oil"]
+
+
+def brute_force(users, user_id, k, metric, include_interactions):
+    """Score the user against everyone else, best first, ties in dataset order"""
+    features = {user["id"]: user_features(user, include_interactions) for user in users}
+    mine = features[user_id]
+    scored = []
+    for position, user in enumerate(users):
+        if user["id"] == user_id:
+            continue
+        other = features[user["id"]]
+        shared = len(mine & other)
+        if metric == "jaccard":
+            score = shared / (len(mine) + len(other) - shared) if shared else 0.0
+        else:
+            score = shared / (len(mine) * len(other)) ** 0.5 if shared else 0.0
+        scored.append((-score, position, user["id"]))
+    return [(other_id, -score) for score, _, other_id in sorted(scored)[:k]]
+
+
+def random_users(rng, count):
+    return [{
+        "id": user_id,
+        "preferences": rng.sample(STYLES, rng.randint(0, 3)),
+        "interactions": {"clicked_artworks": rng.sample(["A1", "A2", "A3", "A4"], rng.randint(0, 2)),
+                         "completed_tutorials": []},
+    } for user_id in range(1, count + 1)]
+
+
+@pytest.mark.parametrize("metric", ["jaccard", "cosine"])
+@pytest.mark.parametrize("include_interactions", [False, True])
+def test_top_k_matches_brute_force(metric, include_interactions):
+    rng = random.Random(2)
+    for count in (1, 2, 5, 60):
+        users = random_users(rng, count)
+        engine = SparseSimilarityEngine(users, metric, include_interactions)
+        ids = [user["id"] for user in users]
+        for k in (1, 3, 8):
+            # A tiny nnz bound puts every profile in its own chunk
+            for results in (engine.top_k_batch(ids, k), engine.top_k_batch(ids, k, max_product_nnz=1)):
+                for user_id in ids:
+                    expected = brute_force(users, user_id, k, metric, include_interactions)
+                    assert results[user_id] == pytest.approx(expected), (count, k, user_id)
+
+
+def test_unknown_users_and_k_zero():
+    engine = SparseSimilarityEngine(random_users(random.Random(1), 5))
+    assert engine.top_k_batch([1, 999], 2)[999] == []
+    assert engine.top_k_batch([1], 0) == {1: []}
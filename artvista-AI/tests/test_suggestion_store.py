@@ -0,0 +1,44 @@
+import os
+
+import precompute_suggestions
+from catalog_index import CatalogIndex
+from precompute_suggestions import SuggestionStore
+
+CATALOG = CatalogIndex({
+    "users": [],
+    "artworks": [{"id": "A1", "title": "One", "style": "oil", "medium": "canvas"},
+                 {"id": "A2", "title": "Two", "style": "oil", "medium": "canvas"}],
+    "tutorials": [{"id": "T1", "title": "Intro", "style": "oil"}],
+})
+
+
+def write_store(path, rows):
+    """A finished run: written to a temporary file, then renamed over path like precompute()"""
+    store = SuggestionStore(path + ".tmp")
+    store.put_many(rows)
+    store.close()
+    os.replace(path + ".tmp", path)
+
+
+def test_readonly_store_follows_new_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(precompute_suggestions, "REOPEN_CHECK_SECONDS", 0)
+    path = str(tmp_path / "suggestions.sqlite")
+    store = SuggestionStore(path, readonly=True)
+    assert store.get(1, CATALOG) is None and len(store) == 0 and store.meta() == {}
+
+    write_store(path, [(1, ["A1", "A9"], ["T1"])])
+    assert [artwork["id"] for artwork in store.get(1, CATALOG)["artworks"]] == ["A1"]
+
+    write_store(path, [(1, ["A2"], []), (2, ["A1"], [])])
+    assert store.get(1, CATALOG) == {"artworks": [CATALOG.artworks.get("A2")], "tutorials": []}
+    assert len(store) == 2
+    store.close()
+
+
+def test_readonly_store_checks_the_file_at_most_once_per_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr(precompute_suggestions, "REOPEN_CHECK_SECONDS", 3600)
+    path = str(tmp_path / "suggestions.sqlite")
+    write_store(path, [(1, ["A1"], [])])
+    store = SuggestionStore(path, readonly=True)
+    write_store(path, [(1, ["A2"], [])])
+    assert [artwork["id"] for artwork in store.get(1, CATALOG)["artworks"]] == ["A1"]
@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+from trending import TrendingTracker
+
+DAY = 86400
+# In the past: add() clamps timestamps from the future to the current time
+NOW = time.time() - 10 * DAY
+
+USERS = [
+    {"id": 1, "interactions": {"clicked_artworks": ["A1", "A2"], "completed_tutorials": ["T1"]}},
+    {"id": 2, "interactions": {"clicked_artworks": ["A1"], "completed_tutorials": []}},
+]
+
+
+@pytest.mark.parametrize("sketch_width", [0, 4096])
+def test_seeded_counts_decay_from_the_dataset_time(sketch_width):
+    tracker = TrendingTracker(half_life=DAY, sketch_width=sketch_width)
+    fresh = tracker.seeded(USERS, NOW)
+    stale = tracker.seeded(USERS, NOW - 3 * DAY)
+    assert tracker.top("artworks", now=NOW, seed=fresh) == [("A1", pytest.approx(2)), ("A2", pytest.approx(1))]
+    assert tracker.top("artworks", now=NOW, seed=stale) == [("A1", pytest.approx(0.25)), ("A2", pytest.approx(0.125))]
+    # Seeding leaves the recorded counts alone
+    assert tracker.top("artworks", now=NOW) == []
+
+
+@pytest.mark.parametrize("sketch_width", [0, 4096])
+def test_recorded_events_add_to_the_seed(sketch_width):
+    tracker = TrendingTracker(half_life=DAY, sketch_width=sketch_width)
+    seed = tracker.seeded(USERS, NOW - DAY)
+    tracker.record("click", "A2", NOW)
+    tracker.record("click", "A3", NOW)
+    tracker.record("complete", "T2", NOW)
+    assert tracker.top("artworks", now=NOW, seed=seed) == [
+        ("A2", pytest.approx(1.5)), ("A1", pytest.approx(1)), ("A3", pytest.approx(1))]
+    assert tracker.top("tutorials", 1, now=NOW, seed=seed) == [("T2", pytest.approx(1))]
+    # A reload swaps in a new seed; recorded events carry over
+    assert tracker.top("artworks", now=NOW, seed=tracker.seeded([], NOW)) == [
+        ("A2", pytest.approx(1)), ("A3", pytest.approx(1))]